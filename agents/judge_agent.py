@@ -5,36 +5,23 @@ TrendSelectAgent에서 전달받은 트렌드를 평가
 평균 계산 후 적합 여부 판단
 """
 
-from agents.state_schema import SystemState
+from agents.state_schema import SystemState, JudgeOutput
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from dotenv import load_dotenv
-import json
+from utils.config import env_int, env_str
+from utils.clients import get_llm
+from utils.structured_output import StructuredOutputError, batch_structured, invoke_structured
 
-load_dotenv()
-llm = ChatOpenAI(model="gpt-4o-mini")
 
-##JudgeAgent
-def judge_agent(state: SystemState) -> SystemState:
-    """TrendSelectAgent에서 넘겨받은 current_trend 평가"""
-    trend = state.get("current_trend")
-    if not trend:
-        print("평가할 트렌드가 없습니다.")
-        state["is_qualified"] = False
-        return state
-    
-    if not state.get("remaining_trends"):
-        print("🚫 남은 트렌드가 없습니다. 워크플로우 종료.")
-        return state
-
-    
-    print(f"\n JudgeAgent: '{trend}' 트렌드 평가 중...")
+# single: current_trend 하나씩 평가 (기존 select ↔ judge 루프)
+# batch : 첫 평가 때 남은 후보 전체를 동시에 평가하고 state["trend_scores"]에 저장
+JUDGE_MODE = env_str("JUDGE_MODE", "single")
+JUDGE_MAX_CONCURRENCY = env_int("JUDGE_MAX_CONCURRENCY", 5)
 
-    prompt = ChatPromptTemplate.from_template("""
+JUDGE_PROMPT = ChatPromptTemplate.from_template("""
     당신은 2030년을 바라보는 미래 기술 분석가입니다.
     당신의 역할은 ‘냉철한 평가자’로서 기술을 객관적으로 판단하는 것입니다.  
     AI 기술에 대해 과도한 낙관 평가를 피하고,  
@@ -77,40 +64,72 @@ def judge_agent(state: SystemState) -> SystemState:
     판단 기준:
     - total_score ≥ 0.65 → true (적합)
     - total_score < 0.65 → false (부적합)
-    """)
+""")
+
+
+def _fallback_result(trend: str, reason: str) -> dict:
+    return {
+        "trend": trend,
+        "scores": {
+            "maturity": 0,
+            "growth": 0,
+            "applicability": 0,
+            "impact": 0,
+            "innovation": 0
+        },
+        "total_score": 0,
+        "is_qualified": False,
+        "reason": reason
+    }
+
+
+def evaluate_trends(trends) -> dict:
+    """여러 트렌드를 동시에 평가 → {트렌드명: 평가 결과}"""
+    outputs = batch_structured(
+        JUDGE_PROMPT, [{"trend": t} for t in trends], JudgeOutput,
+        node="judge", llm=get_llm("judge"), max_concurrency=JUDGE_MAX_CONCURRENCY,
+    )
+    results = {}
+    for trend, output in zip(trends, outputs):
+        if isinstance(output, StructuredOutputError):
+            results[trend] = _fallback_result(trend, "LLM 응답 파싱 실패")
+        elif isinstance(output, Exception):
+            print(f"⚠️ '{trend}' 평가 실패: {output}")
+            results[trend] = _fallback_result(trend, f"LLM 호출 실패: {output}")
+        else:
+            results[trend] = output
+    return results
 
 
-    chain = prompt | llm
-    response = chain.invoke({"trend": trend})
-    raw_text = response.content.strip()
+##JudgeAgent
+def judge_agent(state: SystemState) -> SystemState:
+    """TrendSelectAgent에서 넘겨받은 current_trend 평가"""
+    trend = state.get("current_trend")
+    if not trend:
+        print("평가할 트렌드가 없습니다.")
+        state["is_qualified"] = False
+        return state
 
-    # JSON 파싱
-    try:
-        result = json.loads(raw_text)
-    except Exception:
-        import re
-        cleaned = re.sub(r"^```[a-zA-Z]*\n?|```$", "", raw_text).strip()
+    if JUDGE_MODE == "batch":
+        trend_scores = dict(state.get("trend_scores") or {})
+        pending = [t for t in [trend] + list(state.get("remaining_trends") or []) if t not in trend_scores]
+        if pending:
+            print(f"\n JudgeAgent(batch): 후보 {len(pending)}개 트렌드 동시 평가 중...")
+            trend_scores.update(evaluate_trends(pending))
+        state["trend_scores"] = trend_scores
+        result = trend_scores[trend]
+    else:
+        if not state.get("remaining_trends"):
+            print("🚫 남은 트렌드가 없습니다. 워크플로우 종료.")
+            return state
+
+        print(f"\n JudgeAgent: '{trend}' 트렌드 평가 중...")
         try:
-            result = json.loads(cleaned)
-        except Exception:
-            print("⚠️ JSON 파싱 실패. LLM 원문:\n", raw_text)
-            result = {
-                "trend": trend,
-                "scores": {
-                    "maturity": 0,
-                    "growth": 0,
-                    "applicability": 0,
-                    "impact": 0,
-                    "innovation": 0
-                },
-                "total_score": 0,
-                "is_qualified": False,
-                "reason": "LLM 응답 파싱 실패"
-            }
-
+            result = invoke_structured(JUDGE_PROMPT, {"trend": trend}, JudgeOutput, node="judge", llm=get_llm("judge"))
+        except StructuredOutputError:
+            result = _fallback_result(trend, "LLM 응답 파싱 실패")
 
     # 평가 결과 출력
-        # 평가 결과 출력
     s = result.get("scores", {})
 
     print(f"  ▪ 기술 성숙도 (Maturity): {s.get('maturity')}")
@@ -120,7 +139,7 @@ def judge_agent(state: SystemState) -> SystemState:
     print(f"  ▪ 총점: {result.get('total_score')} ({'적합' if result.get('is_qualified') else '부적합'})")
     print(f"  ▪ 사유: {result.get('reason')}")
 
-    state["state"] = s
+    state["scores"] = s
     state["total_score"] = result.get("total_score", 0)
     state["is_qualified"] = result.get("is_qualified", False)
     state["judge_result"] = "기준 통과" if result.get("is_qualified") else "기준 미달"
@@ -129,23 +148,31 @@ def judge_agent(state: SystemState) -> SystemState:
     return state
 
 
+def batch_judge_agent(state: SystemState) -> SystemState:
+    """포트폴리오 모드: current_trend와 남은 후보 전체를 한 번에 평가해 trend_scores에 저장"""
+    candidates = [t for t in [state.get("current_trend")] + list(state.get("remaining_trends") or []) if t]
+    trend_scores = dict(state.get("trend_scores") or {})
+    pending = [t for t in candidates if t not in trend_scores]
+    if pending:
+        print(f"\n JudgeAgent(batch): 후보 {len(pending)}개 트렌드 동시 평가 중...")
+        trend_scores.update(evaluate_trends(pending))
+
+    for t in candidates:
+        r = trend_scores[t]
+        print(f"  ▪ {t}: {r.get('total_score')} ({'적합' if r.get('is_qualified') else '부적합'})")
+
+    return {"trend_scores": trend_scores}
+
+
 if __name__ == "__main__":
     from agents.trend_select_agent import trend_select_agent
     from agents.search_agent import search_agent
-    from agents.state_schema import SystemState
 
     # ✅ state 초기화
     state: SystemState = {}
 
-    query = (
-        "Emerging AI technologies 2026 and beyond OR "
-        "Next-generation AI research frontiers OR "
-        "AI technologies expected to grow in next 5 years OR "
-        "Future directions of AI innovation"
-    )
-
-    # ✅ search_agent 호출 시 state와 query 둘 다 전달
-    state = search_agent(state, query)
+    # ✅ search_agent가 고정 쿼리 목록으로 검색 결과를 state에 채운다
+    state = search_agent(state)
 
     # 1️⃣ 트렌드 하나 선택
     selected = trend_select_agent(state)
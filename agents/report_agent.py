@@ -1,97 +1,282 @@
 """
 ReportAgent
 이전 모든 Agent의 결과를 종합해 완전한 트렌드 분석 보고서 생성
+- sections 모드(기본): 본문 소제목(2.1~2.5, 3.1~3.3)을 필요한 state 필드만 넣어 동시에 생성하고
+  목차 순서로 이어 붙인 뒤, 짧은 호출 하나로 SUMMARY / APPENDIX를 작성한다
+- single 모드: 보고서 전체를 한 번의 호출로 생성 (REPORT_STREAMING으로 섹션 단위 렌더링 가능)
 """
 import os
+import re
 import json
-from fpdf import FPDF
-from langchain_openai import ChatOpenAI
+import time
+from typing import TYPE_CHECKING
 from langchain_core.prompts import ChatPromptTemplate
-from agents.state_schema import SystemState
-from dotenv import load_dotenv
-load_dotenv()
-
-llm = ChatOpenAI(model="gpt-4o-mini")
-
-
-
-class PDF(FPDF):
-    def __init__(self):
-        super().__init__()
-        self.add_font('NotoSans', '', 'fonts/NotoSansKR-Regular.ttf')
-        self.add_font('NotoSans', 'B', 'fonts/NotoSansKR-Bold.ttf')
-        self.set_auto_page_break(auto=True, margin=15)
-
-    def add_title_page(self):
-        """표지 — AI 트렌드 분석 보고서만 출력"""
-        self.add_page()
-        self.set_font('NotoSans', 'B', 26)
-        self.cell(0, 15, "AI 트렌드 분석 보고서", align="C", new_x="LMARGIN", new_y="NEXT")
-        self.ln(7)  
-
-    def add_section(self, title, text):
-        """본문 섹션"""
-        self.set_font('NotoSans', 'B', 16)
-        self.multi_cell(0, 8, title)
-        self.ln(3)
-
-        lines = text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            if line.startswith("### "):
-                self.ln(2)
-                self.set_font('NotoSans', 'B', 13)
-                self.multi_cell(0, 7, line.replace("### ", ""))
-                self.ln(2)
-
-            elif line.startswith("## "):
-                self.ln(4)
-                self.set_font('NotoSans', 'B', 14)
-                self.multi_cell(0, 8, line.replace("## ", ""))
-                self.ln(2)
-
-            elif line.startswith("# "):
-                self.set_font('NotoSans', 'B', 16)
-                self.multi_cell(0, 9, line.replace("# ", ""))
-                self.ln(4)
-
-            else:
-                self.set_font('NotoSans', '', 11)
-                self.multi_cell(0, 6, line)
-                self.ln(5)
-
-
-
-
-
-
-def report_agent(state: SystemState) -> SystemState:
-    """TrendAnalysis, Predict, Risk 결과를 종합해 보고서 생성"""
+from langchain_core.runnables import RunnableLambda
+from langgraph.config import get_config
+from agents.state_schema import ReportWrapUpOutput, SystemState
+from utils.config import env_bool, env_int, env_str
+from utils.clients import get_llm
+from utils.context_packer import (budget_for, compact_json, count_tokens, normalize_ws, pack_documents, pack_fields,
+                                  report_packing)
+from utils.data_cleaner import dedupe_by_url
+from utils.structured_output import invoke_structured
+
+if TYPE_CHECKING:
+    from utils.pdf_renderer import PDF
+
+
+# sections: 소제목별 동시 생성 후 목차 순서로 결합 / single: 보고서 전체를 한 번의 호출로 생성
+REPORT_MODE = env_str("REPORT_MODE", "sections").lower()
+# sections 모드에서 동시에 생성할 소제목 수
+REPORT_MAX_CONCURRENCY = env_int("REPORT_MAX_CONCURRENCY", 8)
+# True면 토큰을 스트리밍으로 받아 섹션이 완성될 때마다 PDF에 바로 렌더링 (single 모드)
+REPORT_STREAMING = env_bool("REPORT_STREAMING", False)
+
+# 보고서 입력이 예산을 넘을 때 보존 우선순위 (높을수록 나중에 잘림)
+SECTION_PRIORITIES = {"analysis": 3, "prediction": 2, "risk": 2}
+
+
+# 본문 목차 — (제목, 작성 지침, 참고할 "<섹션>.<필드>") / 필드가 없는 중제목은 제목만 둔다
+REPORT_OUTLINE = [
+    ("2. 트렌드 분석", None, ()),
+    ("2.1 트렌드 정의 및 등장 배경", "역사적 맥락, 연구 전환점 포함",
+     ("analysis.definition", "analysis.key_technologies")),
+    ("2.2 주요 기술 및 사례", "연구 논문, 기업 제품, 오픈소스 프레임워크 예시 포함",
+     ("analysis.key_technologies", "prediction.tech_path")),
+    ("2.3 산업 및 시장 동향", "산업별 적용 현황, CAGR, 시장 점유율 예시 포함",
+     ("analysis.industry_trends", "prediction.market_outlook")),
+    ("2.4 산업별 적용 흐름", "제조, 헬스케어, 교육, 금융 등 주요 도메인별 분석",
+     ("analysis.adoption_flow", "prediction.industry_applications")),
+    ("2.5 향후 5년간의 기술 발전 및 시장 변화 예측", "AI 혁신의 방향성과 기술 융합 가능성 설명",
+     ("analysis.future_outlook", "prediction.tech_path", "prediction.market_outlook", "prediction.summary")),
+    ("3. 기업 전략 인사이트", None, ()),
+    ("3.1 비즈니스 기회 요인", "혁신 기업의 성공 요인, 신규 비즈니스 모델 제시",
+     ("risk.opportunities", "prediction.market_outlook", "risk.summary")),
+    ("3.2 리스크 및 대응 전략", "기술적·정책적 리스크 및 규제 대응 방향",
+     ("risk.risks", "risk.policy_factors", "prediction.barriers", "risk.strategic_response")),
+    ("3.3 기업 적용을 위한 제안", "구체적 산업 사례, 적용 전략, 정책적 시사점 포함",
+     ("risk.strategic_response", "analysis.adoption_flow", "prediction.summary", "risk.summary")),
+]
+
+SECTION_PROMPT = ChatPromptTemplate.from_template("""
+    당신은 미래 기술 전략 보고서를 작성하는 전문 분석가입니다.
+    {trend} 트렌드 심층 보고서 중 아래 [소제목] 하나의 본문만 작성하세요.
 
-    print(f"[DEBUG] ReportAgent 진입 - state keys: {list(state.keys())}")
-    print(f"[DEBUG] ReportAgent 진입 - trend_prediction 타입: {type(state.get('trend_prediction'))}")
-    print(f"[DEBUG] ReportAgent 진입 - trend_prediction 내용: {state.get('trend_prediction')}")
+    [작성 규칙]
+    - 공백 포함 최소 2500자 이상, 여러 문단으로 작성할 것
+    - 구체적인 사례, 수치, 기업명, 기술 연구를 반드시 포함할 것
+    - 소제목은 다시 쓰지 말고 본문만 출력할 것
+    - 목차의 다른 소제목에서 다룰 내용은 쓰지 말 것
+    - 출력 시 마크다운 기호(예: *, -, #)나 불릿포인트 사용 금지
+    - 한국어로 작성하되, 기술 용어는 영어 병기 가능
+    - 기술·시장·사회적 관점을 균형 있게 반영할 것
 
+    [보고서 목차]
+    {outline}
 
-    trend = state.get("current_trend")
-    if not trend:
-        print("current_trend가 없습니다.")
-        return state
-    print(f"ReportAgent: '{trend}' 보고서 생성중...")
+    [소제목]
+    {title} — {guide}
 
-    # 개별 섹션 내용 가져오기
-    analysis = state.get("trend_analysis", {})
-    prediction = state.get("trend_prediction", {})
-    risk = state.get("risk_analysis", {})
-    search_results = state.get("search_results", [])
+    [분석 데이터]
+    {data}
+    """)
 
-    # 참고 문헌 URL 정리
-    reference_urls = [r["url"] for r in search_results if r.get("url")] if search_results else []
+WRAPUP_PROMPT = ChatPromptTemplate.from_template("""
+    당신은 미래 기술 전략 보고서를 작성하는 전문 분석가입니다.
+    아래는 {trend} 트렌드 보고서의 소제목별 본문과 트렌드 선정 평가 결과입니다.
+    이를 바탕으로 보고서의 summary(1. SUMMARY)와 appendix(5. APPENDIX)를 작성하세요.
+
+    [작성 규칙]
+    - summary: 주요 AI 트렌드 요약과 기업 관점 핵심 시사점을 한 문단 이내로 작성
+    - appendix: 트렌드 선정 지표인 기술 성숙도(Maturity), 성장성(Growth), 산업 적용성(Applicability), 혁신성(Innovation)을
+      사용했음을 설명하고, 점수 구간(0.0~0.3: 매우 낮음 / 0.4~0.6: 중간 수준 / 0.7~0.8: 유망 / 0.9~1.0: 매우 유망)에 따라
+      각 점수를 받은 이유를 서술
+    - 마크다운 기호나 불릿포인트 사용 금지, 한국어로 작성
+    - 다음 형식의 JSON 객체만 출력: {{"summary": "...", "appendix": "..."}}
+
+    [평가 결과]
+    {scores}
+
+    [본문]
+    {body}
+    """)
 
 
+# 보고서 목차 제목 전체 (1. SUMMARY ~ 5. APPENDIX)
+REPORT_HEADINGS = ["1. SUMMARY"] + [title for title, _, _ in REPORT_OUTLINE] + ["4. 참고 문헌", "5. APPENDIX"]
+
+
+def _heading_key(line: str) -> str:
+    """제목 비교 키 — 마크다운 기호 / 공백 / 구두점과 프롬프트에서 따라 쓴 ' — 작성 지침' 부분은 무시"""
+    line = re.split(r"\s[—–-]\s", line, maxsplit=1)[0]
+    return re.sub(r"[\s#*.:]+", "", line).casefold()
+
+
+_HEADING_KEYS = frozenset(_heading_key(title) for title in REPORT_HEADINGS)
+
+
+def is_section_heading(line: str) -> bool:
+    """목차 제목 줄인지 — 숫자로 시작하는 본문 줄("1. 첫째, ...")은 제목으로 보지 않는다"""
+    return len(line) <= 120 and _heading_key(line) in _HEADING_KEYS
+
+
+class SectionStreamRenderer:
+    """
+    스트리밍 토큰을 줄 단위로 모으다가 다음 목차 제목이 나오면
+    직전 섹션을 완성된 것으로 보고 PDF.add_section으로 렌더링한다.
+    """
+
+    def __init__(self, pdf: "PDF"):
+        self.pdf = pdf
+        self.started = time.perf_counter()
+        self.first_section_at = None
+        self.sections = 0
+        self.chunks = []
+        self._buffer = ""
+        self._title = ""
+        self._lines = []
+
+    def feed(self, chunk: str):
+        self.chunks.append(chunk)
+        self._buffer += chunk
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._on_line(line)
+
+    def _on_line(self, line: str):
+        stripped = line.strip()
+        if stripped and is_section_heading(stripped):
+            self._flush()
+            self._title = stripped.strip("#*").strip()
+        else:
+            self._lines.append(line)
+
+    def _flush(self):
+        body = "\n".join(self._lines)
+        if self._title or body.strip():
+            self.pdf.add_section(self._title, body)
+            self.sections += 1
+            elapsed = time.perf_counter() - self.started
+            if self.first_section_at is None:
+                self.first_section_at = elapsed
+            print(f"  ▪ 섹션 렌더링 완료 ({elapsed:.1f}s): {self._title or '(서문)'}")
+        self._title, self._lines = "", []
+
+    def close(self) -> str:
+        if self._buffer:
+            self._on_line(self._buffer)
+            self._buffer = ""
+        self._flush()
+        return "".join(self.chunks).strip()
+
+    def timings(self) -> dict:
+        return {
+            "time_to_first_section": round(self.first_section_at, 3) if self.first_section_at is not None else None,
+            "total_time": round(time.perf_counter() - self.started, 3),
+            "sections": self.sections,
+        }
+
+
+def pack_report_inputs(trend: str, sections: dict, reference_urls: list, budget: int) -> dict:
+    """
+    분석 / 예측 / 리스크의 하위 필드와 참고 문헌을 하나의 토큰 예산 안에 맞춘다.
+    각 섹션의 summary를 가장 오래 보존하고, 참고 문헌 목록을 가장 먼저 줄인다.
+    """
+    fields = {
+        f"{name}.{key}": normalize_ws(str(value))
+        for name, data in sections.items() if isinstance(data, dict)
+        for key, value in data.items() if value
+    }
+    fields["references"] = "\n".join(reference_urls)
+    priorities = {
+        k: 0 if k == "references" else SECTION_PRIORITIES.get(k.split(".")[0], 1) + (2 if k.endswith(".summary") else 0)
+        for k in fields
+    }
+    before = sum(count_tokens(json.dumps(v, ensure_ascii=False, indent=2)) for v in sections.values())
+    before += count_tokens(json.dumps(reference_urls, ensure_ascii=False))
+    packed = pack_fields(fields, budget, priorities=priorities)
+
+    inputs = {"trend": trend, "references": packed["references"]}
+    for name in sections:
+        prefix = f"{name}."
+        inputs[name] = compact_json({k[len(prefix):]: v for k, v in packed.items() if k.startswith(prefix)})
+    report_packing("report", before, sum(count_tokens(v) for v in inputs.values()))
+    return inputs
+
+
+def _section_data(sections: dict, fields: tuple, budget: int) -> str:
+    """소제목 하나에 필요한 state 필드만 골라 예산 안에 담는다"""
+    data = {}
+    for field in fields:
+        name, key = field.split(".", 1)
+        value = (sections.get(name) or {}).get(key)
+        if value:
+            data[field] = normalize_ws(str(value))
+    return compact_json(pack_fields(data, budget))
+
+
+def _wrap_up(trend: str, body: list, state: SystemState) -> dict:
+    """본문 요약본과 평가 점수로 SUMMARY / APPENDIX 작성 — 실패하면 state 값으로 대신한다"""
+    scores = {k: state.get(k) for k in ("scores", "total_score", "reason") if state.get(k) is not None}
+    budget = budget_for("report", WRAPUP_PROMPT, reserve=count_tokens(compact_json(scores)))
+    docs = [f"[{title}]\n{text}" for title, text in body if text]
+    # 소제목마다 앞부분을 같은 분량만큼 남긴다
+    packed = pack_documents(docs, budget, max_tokens_per_doc=max(64, budget // max(1, len(docs))))
+    try:
+        return invoke_structured(WRAPUP_PROMPT, {"trend": trend, "scores": compact_json(scores), "body": packed},
+                                 ReportWrapUpOutput, node="report", llm=get_llm("report"))
+    except Exception as e:
+        print(f"⚠️ SUMMARY / APPENDIX 생성 실패: {e}")
+        summaries = [(state.get(name) or {}).get("summary") for name in ("trend_prediction", "risk_analysis")]
+        return {
+            "summary": " ".join(s for s in summaries if s),
+            "appendix": "\n".join(f"{k}: {v}" for k, v in (state.get("scores") or {}).items()),
+        }
+
+
+def write_report_sections(trend: str, sections: dict, reference_urls: list, state: SystemState) -> tuple:
+    """
+    소제목을 동시에 생성해 목차 순서로 합친다.
+    반환값: ([(제목, 본문)] — 1. SUMMARY ~ 5. APPENDIX 순서, 생성 정보)
+    """
+    started = time.perf_counter()
+    chain = SECTION_PROMPT | get_llm("report")
+    outline = "\n".join(REPORT_HEADINGS)
+    budget = budget_for("report", SECTION_PROMPT, reserve=count_tokens(outline) + 64)
+    jobs = [(title, guide, fields) for title, guide, fields in REPORT_OUTLINE if fields]
+
+    def write(job):
+        title, guide, fields = job
+        text = chain.invoke({
+            "trend": trend, "outline": outline, "title": title, "guide": guide,
+            "data": _section_data(sections, fields, budget),
+        }).content.strip()
+        print(f"  ▪ 섹션 작성 완료 ({time.perf_counter() - started:.1f}s): {title}")
+        return text
+
+    outputs = RunnableLambda(write).batch(jobs, config={"max_concurrency": REPORT_MAX_CONCURRENCY},
+                                          return_exceptions=True)
+    written, failed = {}, []
+    for (title, _, _), output in zip(jobs, outputs):
+        if isinstance(output, Exception):
+            print(f"⚠️ {title} 작성 실패: {output}")
+            # 오류 내용은 보고서 / PDF에 싣지 않고 info["failed"]에만 남긴다 (제목만 있는 빈 섹션)
+            failed.append(title)
+        else:
+            written[title] = output
+    body = [(title, written.get(title, "")) for title, _, _ in REPORT_OUTLINE]
+
+    wrap_up = _wrap_up(trend, body, state)
+    parts = [("1. SUMMARY", wrap_up["summary"])] + body + [
+        ("4. 참고 문헌", "\n".join(reference_urls)),
+        ("5. APPENDIX", wrap_up["appendix"]),
+    ]
+    info = {"sections": len(jobs), "failed": failed, "total_time": round(time.perf_counter() - started, 3)}
+    return parts, info
+
+
+def write_single_report(trend: str, sections: dict, reference_urls: list, pdf_path: str) -> tuple:
+    """보고서 전체를 한 번의 호출로 생성해 PDF로 저장 — (보고서 본문, 스트리밍 timings 또는 None)"""
     prompt = ChatPromptTemplate.from_template("""
     당신은 미래 기술 전략 보고서를 작성하는 전문 분석가입니다.
     아래의 분석 데이터를 기반으로 {trend} 트렌드에 대한 심층 보고서를 작성하세요.
@@ -147,46 +332,149 @@ def report_agent(state: SystemState) -> SystemState:
     """)
 
 
-    chain = prompt | llm
-    response = chain.invoke({
-        "trend": trend,
-        "analysis": json.dumps(analysis, ensure_ascii=False, indent=2),
-        "prediction": json.dumps(prediction, ensure_ascii=False, indent=2),
-        "risk": json.dumps(risk, ensure_ascii=False, indent=2),
-        "references": json.dumps(reference_urls, ensure_ascii=False)
-    })
+    chain = prompt | get_llm("report")
+    inputs = pack_report_inputs(trend, sections, reference_urls, budget_for("report", prompt))
+
+    if REPORT_STREAMING:
+        from utils.pdf_renderer import PDF  # fpdf는 보고서를 만들 때 처음 로드
+        pdf = PDF()
+        pdf.add_title_page()
+        renderer = SectionStreamRenderer(pdf)
+        for chunk in chain.stream(inputs):
+            renderer.feed(chunk.content)
+        report_text = renderer.close()
+        timings = renderer.timings()
+        print(f"  ▪ 첫 섹션까지 {timings['time_to_first_section']}s / 전체 {timings['total_time']}s "
+              f"({timings['sections']}개 섹션)")
+        pdf.add_notice_page()
+        pdf.output(pdf_path)
+    else:
+        from utils.pdf_renderer import render_report
+        response = chain.invoke(inputs)
+        report_text = response.content.strip()
+        timings = None
+        render_report({"path": pdf_path, "sections": [{"title": "", "text": report_text}]})
+    return report_text, timings
+
+
+def slugify(name: str, max_length: int = 80) -> str:
+    """파일 / 디렉터리 이름으로 안전한 문자(영문, 숫자, 한글, '.', '_', '-')만 남긴다"""
+    slug = re.sub(r"[^0-9A-Za-z가-힣._-]+", "_", name or "").strip("._-")
+    return slug[:max_length] or "untitled"
+
+
+def report_dir() -> str:
+    """
+    실행(thread_id)별 보고서 디렉터리 reports/<thread_id>
+    서비스에서 동시에 도는 실행이 같은 트렌드를 골라도 서로의 PDF를 덮어쓰지 않는다 (그래프 밖에서 부르면 reports)
+    """
+    try:
+        thread_id = (get_config().get("configurable") or {}).get("thread_id")
+    except RuntimeError:
+        thread_id = None
+    path = os.path.join("reports", slugify(str(thread_id))) if thread_id else "reports"
+    os.makedirs(path, exist_ok=True)
+    return path
 
-    report_text = response.content.strip()
 
-    os.makedirs("reports", exist_ok=True)
-    pdf_path = f"report/{trend.replace(' ', '_')}_report.pdf"
+def report_agent(state: SystemState) -> SystemState:
+    """TrendAnalysis, Predict, Risk 결과를 종합해 보고서 생성"""
+
+    trend = state.get("current_trend")
+    if not trend:
+        print("current_trend가 없습니다.")
+        return state
+    print(f"ReportAgent: '{trend}' 보고서 생성중...")
+
+    # 개별 섹션 내용 가져오기
+    analysis = state.get("trend_analysis", {})
+    prediction = state.get("trend_prediction", {})
+    risk = state.get("risk_analysis", {})
+    search_results = state.get("search_results", [])
+
+    # 참고 문헌 URL 정리
+    reference_urls = [r["url"] for r in dedupe_by_url(search_results) if r.get("url")] if search_results else []
+
+    sections = {"analysis": analysis, "prediction": prediction, "risk": risk}
+    pdf_path = os.path.join(report_dir(), f"{slugify(trend)}_report.pdf")
+
+    if REPORT_MODE == "single":
+        report_text, timings = write_single_report(trend, sections, reference_urls, pdf_path)
+        extra = {"streaming": timings} if timings else {}
+    else:
+        if REPORT_MODE != "sections":
+            print(f"⚠️ 알 수 없는 REPORT_MODE '{REPORT_MODE}' → sections 사용")
+        parts, generation = write_report_sections(trend, sections, reference_urls, state)
+        report_text = "\n\n".join(f"{title}\n{text}".strip() for title, text in parts)
+        print(f"  ▪ 섹션 {generation['sections']}개 동시 생성 + 요약 / 부록: {generation['total_time']}s")
+        from utils.pdf_renderer import render_report  # fpdf는 보고서를 만들 때 처음 로드
+        render_report({"path": pdf_path, "sections": [{"title": title, "text": text} for title, text in parts]})
+        extra = {"sections": generation}
 
     state["final_report"] = {
         "trend": trend,
         "report_text": report_text,
-        "path" : pdf_path
+        "path" : pdf_path,
+        **extra,
     }
 
+    print(f"\n ReportAgent: '{trend}' 보고서 생성 완료!")
+    print(f" PDF 저장 위치: {pdf_path}")
 
-    os.makedirs("reports", exist_ok=True)
-    pdf_path = f"reports/{trend.replace(' ', '_')}_report.pdf"
+    return state
 
-    pdf = PDF()
-    pdf.add_title_page()
-    pdf.add_section("",report_text)
-    
-    pdf.add_page()
-    pdf.set_font("NotoSans", "", 9)
-    text = "AI로 생성된 보고서입니다. — AI 트렌드 분석"
-    pdf.multi_cell(0, 10, text)
 
-    pdf.output(pdf_path)
+def portfolio_report_agent(state: SystemState) -> SystemState:
+    """병렬 branch에서 생성된 트렌드별 보고서를 하나의 포트폴리오 보고서로 통합"""
+    reports = sorted(
+        [r for r in state.get("trend_reports", []) if r.get("report_text")],
+        key=lambda r: r.get("total_score") or 0,
+        reverse=True,
+    )
+    if not reports:
+        print("⚠️ 통합할 트렌드 보고서가 없습니다.")
+        return {"portfolio_report": {"trends": [], "path": None}}
 
-    print(f"\n ReportAgent: '{trend}' 보고서 생성 완료!")
-    print(f" PDF 저장 위치: {pdf_path}")
+    trends = [r["trend"] for r in reports]
+    print(f"ReportAgent: 포트폴리오 보고서 생성중... ({', '.join(trends)})")
 
-    return state
+    prompt = ChatPromptTemplate.from_template("""
+    당신은 미래 기술 전략 보고서를 작성하는 전문 분석가입니다.
+    아래는 여러 AI 트렌드에 대한 개별 보고서의 SUMMARY와 평가 점수입니다.
+    이를 비교하여 기업 관점의 포트폴리오 요약을 작성하세요.
+
+    [작성 규칙]
+    - 트렌드 간 우선순위, 상호 연관성, 투자 시점을 비교할 것
+    - 출력 시 마크다운 기호(예: *, -, #)나 불릿포인트 사용 금지
+    - 한국어로 작성하되, 기술 용어는 영어 병기 가능
+    - 3~5문단 이내로 작성
+
+    [트렌드별 요약]
+    {summaries}
+    """)
+    # 점수가 높은 트렌드의 요약을 더 길게 남긴다
+    texts = {r["trend"]: normalize_ws(r["report_text"]) for r in reports}
+    packed = pack_fields(texts, budget_for("portfolio", prompt, reserve=32 * len(reports)),
+                         priorities={t: len(trends) - i for i, t in enumerate(trends)})
+    summaries = "\n\n".join(
+        f"[{r['trend']}] (총점 {r.get('total_score')})\n{packed[r['trend']]}"
+        for r in reports
+    )
+    overview = (prompt | get_llm("report")).invoke({"summaries": summaries}).content.strip()
+
+    os.makedirs("reports", exist_ok=True)
+    pdf_path = os.path.join(report_dir(), "portfolio_report.pdf")
+
+    from utils.pdf_renderer import render_report  # fpdf는 보고서를 만들 때 처음 로드
+    render_report({"path": pdf_path, "sections": [{"title": "포트폴리오 요약", "text": overview}] + [
+        {"title": f"{r['trend']} (총점 {r.get('total_score')})", "text": r["report_text"], "new_page": True}
+        for r in reports
+    ]})
+
+    print(f"\n ReportAgent: 포트폴리오 보고서 생성 완료! ({len(reports)}개 트렌드)")
+    print(f" PDF 저장 위치: {pdf_path}")
 
+    return {"portfolio_report": {"trends": trends, "overview": overview, "path": pdf_path}}
 
 
 if __name__ == "__main__":
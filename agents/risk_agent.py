@@ -9,13 +9,15 @@ RiskAgent
 import sys, os, json
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from dotenv import load_dotenv
-from agents.state_schema import SystemState
+from agents.state_schema import SystemState, RiskOutput
+from utils.clients import get_llm
+from utils.structured_output import StructuredOutputError, invoke_structured
+from utils.context_packer import budget_for, compact_json, count_tokens, normalize_ws, pack_fields, report_packing
 
-load_dotenv()
-llm = ChatOpenAI(model="gpt-4o-mini")
+# 예산 초과 시 우선순위가 낮은 필드부터 줄인다
+PREDICTION_PRIORITIES = {"summary": 5, "barriers": 4, "market_outlook": 3,
+                         "industry_applications": 2, "tech_path": 1}
 
 
 def risk_agent(state: SystemState) -> SystemState:
@@ -26,14 +28,13 @@ def risk_agent(state: SystemState) -> SystemState:
 
     if not trend:
       print("⚠️ 트렌드 정보가 없습니다.")
-      return state
+      return {}
 
     # trend_prediction 구조 확인
     prediction = state.get("trend_prediction")
     if not isinstance(prediction, dict) or not prediction.get("summary"):
         print("분석할 트렌드 또는 예측 정보가 없습니다.")
-        print(f"[DEBUG] 현재 trend_prediction 값: {prediction}")
-        return state
+        return {}
 
 
     
@@ -74,56 +75,40 @@ def risk_agent(state: SystemState) -> SystemState:
     }}
     """)
 
-    chain = prompt | llm
-    response = chain.invoke({
-        "trend": trend,
-        "prediction": json.dumps(prediction, ensure_ascii=False, indent=2)
-    })
-
-    raw = response.content.strip()
+    # 예측 필드를 예산 안에 맞춘 뒤 공백 없는 JSON으로 전달
+    fields = {k: normalize_ws(str(v)) for k, v in prediction.items() if v}
+    packed = pack_fields(fields, budget_for("risk", prompt, reserve=count_tokens(trend) + 16 * len(fields)),
+                         priorities=PREDICTION_PRIORITIES)
+    prediction_json = compact_json(packed)
+    report_packing("risk", count_tokens(json.dumps(prediction, ensure_ascii=False, indent=2)),
+                   count_tokens(prediction_json))
 
     try:
-        result = json.loads(raw)
-        risk_data = result.get("risk_analysis",{})
-    except Exception:
-        import re
-        cleaned = re.sub(r"^```[a-zA-Z]*\n?|```$", "", raw).strip()
-        try:
-            risk_data = json.loads(cleaned)["risk_analysis"]
-        except Exception:
-            print("⚠️ JSON 파싱 실패. LLM 응답 원문:\n", raw)
-            risk_data = {
-                "opportunities": "파싱 실패",
-                "risks": "파싱 실패",
-                "policy_factors": "파싱 실패",
-                "strategic_response": "파싱 실패",
-                "summary": "파싱 실패"
-            }
+        result = invoke_structured(prompt, {
+            "trend": trend,
+            "prediction": prediction_json
+        }, RiskOutput, node="risk", llm=get_llm("risk"))
+        risk_data = result["risk_analysis"]
+    except StructuredOutputError as e:
+        print("⚠️ JSON 파싱 실패. LLM 응답 원문:\n", e.raw)
+        risk_data = {
+            "opportunities": "파싱 실패",
+            "risks": "파싱 실패",
+            "policy_factors": "파싱 실패",
+            "strategic_response": "파싱 실패",
+            "summary": "파싱 실패"
+        }
 
     print("\n RiskAgent 분석 완료!\n")
     print(json.dumps(risk_data, indent=2, ensure_ascii=False))
 
-    print(f"🧩 예측 결과 저장 완료: trend_prediction 키 존재 여부 = {'trend_prediction' in state}")
-    print(f"🧩 예측 데이터 미리보기: {state.get('trend_prediction')}")
-
-    # ✅ 기존 state 유지하면서 병합 (덮어쓰기 방지)
-    from copy import deepcopy
-    merged_state = deepcopy(state)
-    merged_state["risk_analysis"] = risk_data
-
-    print(f"[DEBUG] RiskAgent 종료 시 state keys: {list(merged_state.keys())}")
-    print(f"[DEBUG] trend_prediction 유지 여부: {'trend_prediction' in merged_state}")
-    print(f"[DEBUG] trend_prediction 내용 요약: {merged_state.get('trend_prediction', '없음')}")
-
-    return merged_state
-
+    # 변경된 키만 반환 — 나머지 state는 LangGraph가 그대로 유지한다
+    return {"risk_analysis": risk_data}
 
 
     
 
 
-
-
 if __name__ == "__main__":
     # 테스트용 더미 입력
     dummy_state: SystemState = {
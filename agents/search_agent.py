@@ -5,12 +5,49 @@ SearchAgent
 """
 from agents.state_schema import SystemState
 
-import os
-from tavily import TavilyClient
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from utils.config import env_int
+from utils.clients import get_search_client
+from utils.data_cleaner import clean_text, dedupe_by_url
+from utils.near_dedup import drop_near_duplicates
+from utils.search_cache import cached_search, site_filtered
 
-load_dotenv()
-tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+
+# 동시에 실행할 Tavily 검색 수와 쿼리당 결과 수
+SEARCH_MAX_WORKERS = env_int("SEARCH_MAX_WORKERS", 5)
+SEARCH_MAX_RESULTS = env_int("SEARCH_MAX_RESULTS", 5)
+
+
+def _search_one(query: str, domains: list) -> list:
+    """단일 쿼리 검색 — 실패해도 다른 쿼리에 영향을 주지 않도록 빈 리스트 반환"""
+    print(f"🔍 Tavily 검색 중: {site_filtered(query, domains)}")
+    try:
+        res = cached_search(get_search_client(), query, domains, max_results=SEARCH_MAX_RESULTS)
+        return res.get("results", [])
+    except Exception as e:
+        print(f"⚠️ 검색 실패: {e}")
+        return []
+
+
+def search_concurrently(queries: list, domains: list = None) -> list:
+    """
+    여러 쿼리를 bounded thread pool로 동시에 검색하고,
+    쿼리 순서 → 쿼리 내 순위 순으로 병합한 뒤 URL 기준으로 중복 제거
+    """
+    if not queries:
+        return []
+    workers = max(1, min(SEARCH_MAX_WORKERS, len(queries)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        per_query = list(executor.map(lambda q: _search_one(q, domains), queries))
+
+    merged = [r for results in per_query for r in results]
+    unique = dedupe_by_url(merged)
+    print(f"🔗 검색 결과 병합: {len(merged)}개 → 중복 제거 후 {len(unique)}개")
+    # URL은 다르지만 내용이 거의 같은 미러 기사 제거
+    unique, dropped = drop_near_duplicates(unique, text=lambda r: clean_text(r.get("content", "")))
+    if dropped:
+        print(f"🧹 유사 문서 {dropped}개 제거 → {len(unique)}개")
+    return unique
 
 
 def search_agent(state: SystemState) -> SystemState:
@@ -32,26 +69,7 @@ def search_agent(state: SystemState) -> SystemState:
     "openai.com", "microsoft.com/en-us/research",
     "nvidia.com", "hbr.org"
     ]
-    site_filter = " OR ".join([f"site:{d}" for d in reliable_sources])
-
-    results = []
-    for q in queries:
-        filtered_query = f"{q} AND ({site_filter})"
-        print(f"🔍 Tavily 검색 중: {filtered_query}")
-        try:
-            res = tavily.search(filtered_query, max_results=5)
-            results.extend(res.get("results", []))
-        except Exception as e:
-            print(f"⚠️ 검색 실패: {e}")
-
-
-    try:
-        response = tavily.search(filtered_query, max_results=20)
-        results = response.get("results", [])
-    except Exception as e:
-        print(f"⚠️ Tavily 검색 실패: {e}")
-        state["search_results"] = []
-        return state
+    results = search_concurrently(queries, reliable_sources)
 
     if not results:
         print("⚠️ 검색 결과가 없습니다.")
@@ -74,7 +92,6 @@ def search_agent(state: SystemState) -> SystemState:
     return state
 
 
-
 if __name__ == "__main__":
     from agents.state_schema import SystemState
 
@@ -4,7 +4,8 @@
 모든 Agent가 공통으로 사용하는 데이터의 기본 형태를 정의한다.
 """
 
-from typing import TypedDict, List, Optional, Dict, Any
+import operator
+from typing import Annotated, TypedDict, List, Optional, Dict, Any
 
 class TrendAnalysis(TypedDict):
     definition: str
@@ -20,6 +21,57 @@ class Scores(TypedDict):
     impact: float
     innovation: float
 
+class TrendPrediction(TypedDict):
+    tech_path: str
+    market_outlook: str
+    industry_applications: str
+    barriers: str
+    summary: str
+
+class RiskAnalysis(TypedDict):
+    opportunities: str
+    risks: str
+    policy_factors: str
+    strategic_response: str
+    summary: str
+
+
+# ---- LLM 구조화 출력 형식 (utils.structured_output에서 검증) ----
+class TrendCandidatesOutput(TypedDict):
+    candidates: List[str]
+
+class TrendSynonymGroup(TypedDict):
+    name: str
+    aliases: List[str]
+
+class TrendGroupsOutput(TypedDict):
+    groups: List[TrendSynonymGroup]
+
+class RankedTrend(TypedDict):
+    name: str
+    scores: Dict[str, float]
+    total: float
+    reason: str
+
+class RankedTrendsOutput(TypedDict):
+    ranked_trends: List[RankedTrend]
+
+class JudgeOutput(TypedDict):
+    scores: Scores
+    total_score: float
+    is_qualified: bool
+    reason: str
+
+class PredictionOutput(TypedDict):
+    prediction: TrendPrediction
+
+class RiskOutput(TypedDict):
+    risk_analysis: RiskAnalysis
+
+class ReportWrapUpOutput(TypedDict):
+    summary: str
+    appendix: str
+
 class SystemState(TypedDict, total=False):
     # 1️⃣ SearchAgent 결과
     search_results: List[Dict[str, Any]]  # Tavily 검색 결과 리스트
@@ -33,6 +85,22 @@ class SystemState(TypedDict, total=False):
     total_score: Optional[float]          # 평균 점수
     is_qualified: Optional[bool]          # 적합 여부
     reason: Optional[str]                 # 요약 사유
+    judge_result: Optional[str]           # "기준 통과" / "기준 미달"
+    trend_scores: Optional[Dict[str, Dict[str, Any]]]  # batch 모드: 트렌드별 평가 결과
     
     # 4️⃣ TrendAnalysisAgent 결과
     trend_analysis: Optional[TrendAnalysis]  # 트렌드 분석 결과
+    vectorstore_info: Optional[Dict[str, Any]]  # 분석에 사용한 문서 정보
+
+    # 5️⃣ TrendPredictAgent 결과
+    trend_prediction: Optional[TrendPrediction]  # 미래 전망 예측
+
+    # 6️⃣ RiskAgent 결과
+    risk_analysis: Optional[RiskAnalysis]        # 기회/위험 요인 분석
+
+    # 7️⃣ ReportAgent 결과
+    final_report: Optional[Dict[str, Any]]      # 보고서 본문 및 PDF 경로
+
+    # 8️⃣ 포트폴리오 모드 (상위 N개 트렌드 병렬 분석)
+    trend_reports: Annotated[List[Dict[str, Any]], operator.add]  # 트렌드별 보고서 (병렬 branch 결과 병합)
+    portfolio_report: Optional[Dict[str, Any]]  # 통합 보고서
@@ -4,19 +4,97 @@ TrendAnalysisAgent
 """
 
 import os
-from typing import Dict
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_chroma import Chroma
+import threading
+from typing import TYPE_CHECKING, Dict
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
-from tavily import TavilyClient
-from dotenv import load_dotenv
+from langchain_core.runnables import RunnableLambda
 from agents.state_schema import SystemState, TrendAnalysis 
-from utils.data_cleaner import clean_text
-
-load_dotenv()
-tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-llm = ChatOpenAI(model="gpt-4o-mini")
+from utils.data_cleaner import clean_texts
+from utils.near_dedup import drop_near_duplicates
+from utils.search_cache import cached_search, site_filtered
+from utils.config import env_int, env_str
+from utils.clients import get_embeddings, get_llm, get_search_client
+from utils.context_packer import budget_for, pack_documents
+from utils.embedding_cache import CachedEmbeddings, content_hash
+from utils import node_memo
+from utils.sqlite_cache import CACHE_DIR
+from utils.vector_index import NumpyRetriever
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
+
+# 토픽별 RAG 동시 실행 수 (1이면 기존처럼 순차 실행)
+ANALYSIS_MAX_CONCURRENCY = env_int("ANALYSIS_MAX_CONCURRENCY", 5)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+# numpy: 실행마다 인메모리 행렬로 검색 (기본) / chroma: 실행 간 재사용되는 영속 Chroma 컬렉션
+VECTOR_BACKEND = env_str("VECTOR_BACKEND", "numpy").lower()
+VECTOR_STORE_DIR = env_str("VECTOR_STORE_DIR", os.path.join(CACHE_DIR, "chroma"))
+RETRIEVER_K = 5
+
+_vectorstore = None
+_vectorstore_lock = threading.Lock()
+
+
+def get_vectorstore() -> "Chroma":
+    """실행 간 재사용되는 영속 Chroma 컬렉션 (임베딩은 content hash 캐시 경유)"""
+    global _vectorstore
+    with _vectorstore_lock:
+        if _vectorstore is None:
+            # chromadb import 비용이 커서 analysis 노드가 처음 실행될 때 로드
+            from langchain_chroma import Chroma
+            _vectorstore = Chroma(
+                collection_name="trend_docs",
+                embedding_function=cached_embeddings(),
+                persist_directory=VECTOR_STORE_DIR,
+            )
+    return _vectorstore
+
+
+def cached_embeddings() -> CachedEmbeddings:
+    return CachedEmbeddings(get_embeddings(EMBEDDING_MODEL), EMBEDDING_MODEL)
+
+
+def index_documents(vectorstore: "Chroma", trend: str, docs) -> list:
+    """
+    트렌드별 문서를 컬렉션에 추가 — 이미 저장된 (trend, content) 조합은 건너뛴다.
+    반환값: 이번 실행에서 사용할 문서들의 content hash 목록 (retriever 필터용)
+    """
+    hashes, ids, new_docs = [], [], {}
+    for d in docs:
+        h = content_hash(d.page_content)
+        doc_id = content_hash(f"{trend}\n{h}")
+        hashes.append(h)
+        ids.append(doc_id)
+        d.metadata.update({"trend": trend, "content_hash": h})
+        new_docs[doc_id] = d
+
+    existing = set(vectorstore.get(ids=ids, include=[])["ids"]) if ids else set()
+    to_add = {doc_id: d for doc_id, d in new_docs.items() if doc_id not in existing}
+    if to_add:
+        vectorstore.add_documents(list(to_add.values()), ids=list(to_add))
+    print(f"🗂️ 벡터스토어: 신규 {len(to_add)}개 추가, 기존 {len(new_docs) - len(to_add)}개 재사용")
+    return sorted(set(hashes))
+
+
+def build_retriever(trend: str, docs, k: int = RETRIEVER_K):
+    """VECTOR_BACKEND에 따른 이번 트렌드 문서 retriever"""
+    if VECTOR_BACKEND == "chroma":
+        # 영속 벡터스토어에 신규 문서만 임베딩 후, 메타데이터로 이번 트렌드 문서만 검색
+        vectorstore = get_vectorstore()
+        doc_hashes = index_documents(vectorstore, trend, docs)
+        return vectorstore.as_retriever(search_kwargs={
+            "k": k,
+            "filter": {"$and": [{"trend": trend}, {"content_hash": {"$in": doc_hashes}}]},
+        })
+    if VECTOR_BACKEND != "numpy":
+        print(f"⚠️ 알 수 없는 VECTOR_BACKEND '{VECTOR_BACKEND}' → numpy 사용")
+    # 임베딩은 content hash 캐시를 거치므로 같은 문서는 실행 간에도 다시 임베딩하지 않는다
+    retriever = NumpyRetriever.from_documents(docs, cached_embeddings(), k=k)
+    print(f"🗂️ 인메모리 벡터 인덱스: 문서 {len(docs)}개")
+    return retriever
 
 
 def trend_analysis_agent(state: SystemState) -> SystemState:
@@ -43,32 +121,43 @@ def trend_analysis_agent(state: SystemState) -> SystemState:
         "mckinsey.com", "weforum.org", "unctad.org", "nvidia.com",
         "microsoft.com/en-us/research", "deepmind.google"
     ]
-    site_filter = " OR ".join([f"site:{d}" for d in reliable_domains])
-    query = f"({trend} technology trends 2026 OR industrial applications OR challenges OR market forecast) AND ({site_filter})"
-
-    print(f"🔍 검색 쿼리: {query}")
-    response = tavily.search(query, max_results=20)
+    query = f"({trend} technology trends 2026 OR industrial applications OR challenges OR market forecast)"
+
+    print(f"🔍 검색 쿼리: {site_filtered(query, reliable_domains)}")
+    try:
+        response = cached_search(get_search_client(), query, reliable_domains, max_results=20)
+    except Exception as e:
+        # limiter 재시도까지 실패하면 문서가 없는 경우와 같이 처리 (그래프를 멈추지 않는다)
+        print(f"⚠️ 검색 실패: {e}")
+        state["trend_analysis"] = {"error": "문서 수집 실패"}
+        return state
     results = response.get("results", [])
 
+    results = [r for r in results if r.get("content")]
+    contents = clean_texts(r["content"][:1000] for r in results)
     docs = [
-    Document(
-        page_content=clean_text(r.get("content", "")[:1000]),
-        metadata={"url": r.get("url")}
-    )
-    for r in results if r.get("content")
-]
+        Document(page_content=content, metadata={"url": r.get("url") or ""})
+        for r, content in zip(results, contents)
+    ]
 
-    print(f"📄 관련 문서 {len(docs)}개 수집 완료")
+    docs, dropped = drop_near_duplicates(docs, text=lambda d: d.page_content)
+    print(f"📄 관련 문서 {len(docs)}개 수집 완료" + (f" (유사 문서 {dropped}개 제거)" if dropped else ""))
     if not docs:
         print("⚠️ 분석 가능한 문서가 없습니다.")
         state["trend_analysis"] = {"error": "문서 수집 실패"}
         return state
-    
 
-    #임베딩 + Chroma 벡터스토어 구축
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-    vectorstore = Chroma.from_documents(docs, embeddings)
-    retriever = vectorstore.as_retriever(k=5)
+    # 증분 모드: 트렌드와 수집 문서가 이전 실행과 같으면 임베딩 / RAG 분석을 건너뛴다
+    memo_key = node_memo.memo_key("analysis", {
+        "current_trend": trend,
+        "documents": [(d.metadata.get("url"), d.page_content) for d in docs],
+    })
+    reused = node_memo.lookup("analysis", memo_key)
+    if reused is not None:
+        state.update(reused)
+        return state
+
+    retriever = build_retriever(trend, docs)
 
     queries = {
         "definition": f"What is {trend} and why is it emerging?",
@@ -78,31 +167,50 @@ def trend_analysis_agent(state: SystemState) -> SystemState:
         "future_outlook": f"What is the expected evolution or market forecast for {trend} by 2030?"
     }
 
-    analysis: Dict[str, str]={}
-
-
-    for topic, question in queries.items():
-        retrieved_docs = retriever.invoke(question)
-        combined_text = "\n\n".join([d.page_content for d in retrieved_docs])
-
-        prompt = ChatPromptTemplate.from_template("""
-        당신은 2030년을 내다보는 미래 기술 분석가입니다.
-        다음 문서를 참고하여 '{trend}' 트렌드의 '{topic}'에 대해 분석을 작성하세요.
-        "각 항목은 무조건 3문단 이상으로 작성하고, 기술적/산업적 근거를 포함하세요."
+    prompt = ChatPromptTemplate.from_template("""
+    당신은 2030년을 내다보는 미래 기술 분석가입니다.
+    다음 문서를 참고하여 '{trend}' 트렌드의 '{topic}'에 대해 분석을 작성하세요.
+    "각 항목은 무조건 3문단 이상으로 작성하고, 기술적/산업적 근거를 포함하세요."
 
 
-        ==== 문서 ====
-        {context}
-        """)
+    ==== 문서 ====
+    {context}
+    """)
+    chain = prompt | get_llm("analysis")
+    context_budget = budget_for("analysis", prompt)
 
-        chain = prompt | llm
+    def analyze_topic(item):
+        """토픽 하나에 대한 retrieval + 생성 (토픽 간 의존성 없음)"""
+        topic, question = item
+        retrieved_docs = retriever.invoke(question)
+        combined_text = pack_documents([d.page_content for d in retrieved_docs], context_budget)
         response = chain.invoke({"trend": trend, "topic": topic, "context": combined_text})
-        analysis[topic] = response.content.strip()
-
         print(f"{topic} 분석 완료")
+        return response.content.strip()
+
+    # 다섯 토픽을 동시에 실행 — 한 토픽이 실패해도 나머지 결과는 유지
+    items = list(queries.items())
+    outputs = RunnableLambda(analyze_topic).batch(
+        items,
+        config={"max_concurrency": ANALYSIS_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+
+    # 실패한 토픽은 빈 문자열로 두고 vectorstore_info["failed_topics"]에만 기록 (오류 내용이 프롬프트 / 보고서에 실리지 않도록)
+    analysis: Dict[str, str] = {}
+    failed_topics = []
+    for (topic, _), output in zip(items, outputs):
+        if isinstance(output, Exception):
+            print(f"⚠️ {topic} 분석 실패: {output}")
+            analysis[topic] = ""
+            failed_topics.append(topic)
+        else:
+            analysis[topic] = output
 
     state["trend_analysis"] = analysis  
-    state["vectorstore_info"] = {"trend": trend, "doc_count": len(docs)} 
+    state["vectorstore_info"] = {"trend": trend, "doc_count": len(docs), "failed_topics": failed_topics}
+    if not failed_topics:
+        node_memo.store("analysis", memo_key, {k: state[k] for k in ("trend_analysis", "vectorstore_info")})
 
     print(f"\n📊 '{trend}' 분석 완료! ({len(docs)}개 문서 기반)")
     return state
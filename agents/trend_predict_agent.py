@@ -5,18 +5,19 @@ TrendPredictAgent
 
 
 import sys, os, json
-import re
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from dotenv import load_dotenv
-from agents.state_schema import SystemState
-import copy
+from agents.state_schema import SystemState, PredictionOutput
+from utils.clients import get_llm
+from utils.context_packer import budget_for, count_tokens, normalize_ws, pack_fields, report_packing
+from utils.structured_output import StructuredOutputError, invoke_structured
 
-load_dotenv()
-llm = ChatOpenAI(model="gpt-4o-mini")
+# 예산 초과 시 우선순위가 낮은 필드부터 줄인다
+ANALYSIS_FIELDS = ("definition", "key_technologies", "industry_trends", "adoption_flow", "future_outlook")
+ANALYSIS_PRIORITIES = {"definition": 5, "future_outlook": 4, "key_technologies": 3,
+                       "industry_trends": 2, "adoption_flow": 1}
 
 
 def trend_predict_agent(state: SystemState) -> SystemState:
@@ -28,23 +29,13 @@ def trend_predict_agent(state: SystemState) -> SystemState:
     trend = state.get("current_trend")
     trend_analysis = state.get("trend_analysis")
 
-    if not trend or not trend_analysis:
+    # 모든 토픽 분석이 실패했으면(빈 문자열) 분석 결과가 없는 것과 같다
+    if not trend or not trend_analysis or not any(trend_analysis.get(k) for k in ANALYSIS_FIELDS):
         print("분석할 트렌드 정보가 부족합니다. (trend_analysis 없음).")
-        return state
+        return {}
     print(f"\n TrendPredictAgent: '{trend}' 트렌드의 미래 발전 방향 예측 중...")
 
-    context = f"""
-    [트랜드명]
-    {trend}
-
-    [트렌드 분석 요약]
-    정의: {trend_analysis.get('definition')}
-    핵심 기술: {trend_analysis.get('key_technologies')}
-    산업 동향: {trend_analysis.get('industry_trends')}
-    적용 흐름: {trend_analysis.get('adoption_flow')}
-    미래 전망: {trend_analysis.get('future_outlook')}
-    """
-
+    fields = {k: normalize_ws(str(trend_analysis.get(k) or "")) for k in ANALYSIS_FIELDS}
     prompt = ChatPromptTemplate.from_template("""
     당신은 2030년을 내다보는 기술 전략 분석가입니다.
     아래 정보를 바탕으로 {trend} 기술의 발전 방향, 시장 확장, 산업 적용 가능성을 예측하세요.
@@ -76,32 +67,31 @@ def trend_predict_agent(state: SystemState) -> SystemState:
     코드블록(```)이나 문장, 설명은 절대 포함하지 마세요.
     """)
 
-    chain = prompt | llm
-    response = chain.invoke({"trend": trend, "context": context})
-    raw = response.content.strip()
-
-    def safe_parse_json(raw_text):
-        """Markdown, 문장 등이 포함된 응답에서도 JSON만 추출"""
-        try:
-            return json.loads(raw_text)
-        except Exception:
-            # ```json ... ``` 제거
-            cleaned = re.sub(r"```(?:json)?|```", "", raw_text, flags=re.DOTALL).strip()
-            # JSON 괄호 내부만 추출
-            cleaned = re.sub(r"^[^{]*({.*})[^}]*$", r"\1", cleaned, flags=re.DOTALL)
-            try:
-                return json.loads(cleaned)
-            except Exception:
-                print("⚠️ JSON 파싱 실패. LLM 원문:", raw_text[:300], "...")
-                return None
-
-
-    result = safe_parse_json(raw)
-
-    # ✅ JSON 파싱 실패 시 기본 구조 생성
-    if not result or not isinstance(result, dict):
-        print("⚠️ JSON 파싱 실패. LLM 응답 원문:\n", raw)
-        result = {
+    packed = pack_fields(fields, budget_for("predict", prompt, reserve=count_tokens(trend) * 2 + 64),
+                         priorities=ANALYSIS_PRIORITIES)
+    # 분석에 실패한 토픽은 비어 있음을 명시해 LLM이 빈 칸을 추측으로 채우지 않게 한다
+    packed = {k: v or "(분석 없음)" for k, v in packed.items()}
+    context = f"""
+    [트랜드명]
+    {trend}
+
+    [트렌드 분석 요약]
+    정의: {packed['definition']}
+    핵심 기술: {packed['key_technologies']}
+    산업 동향: {packed['industry_trends']}
+    적용 흐름: {packed['adoption_flow']}
+    미래 전망: {packed['future_outlook']}
+    """
+    report_packing("predict", sum(count_tokens(v) for v in fields.values()),
+                   sum(count_tokens(v) for v in packed.values()))
+
+    try:
+        result = invoke_structured(prompt, {"trend": trend, "context": context},
+                                   PredictionOutput, node="predict", llm=get_llm("predict"))
+        prediction_data = result["prediction"]
+    except StructuredOutputError as e:
+        print("⚠️ JSON 파싱 실패. LLM 응답 원문:\n", e.raw[:300], "...")
+        prediction_data = {
             "tech_path": "",
             "market_outlook": "",
             "industry_applications": "",
@@ -109,39 +99,17 @@ def trend_predict_agent(state: SystemState) -> SystemState:
             "summary": "파싱 실패"
         }
 
-    if isinstance(result, dict):
-        # "prediction" 키가 있으면 내부, 없으면 전체 사용
-        prediction_data = result.get("prediction", result)
-    else:
-        prediction_data = {}
-
-    # ❌ 비어 있는지 단순히 검사하지 말고 summary 존재 여부로 검사
-    if not isinstance(prediction_data, dict) or not prediction_data.get("summary"):
+    # summary 존재 여부로 빈 응답 검사
+    if not prediction_data.get("summary"):
         print("⚠️ 예측 데이터 비어 있음. 기본 구조로 대체합니다.")
-        prediction_data = {
-            "tech_path": result.get("tech_path", ""),
-            "market_outlook": result.get("market_outlook", ""),
-            "industry_applications": result.get("industry_applications", ""),
-            "barriers": result.get("barriers", ""),
-            "summary": result.get("summary", "LLM 응답이 비어 있음")
-        }
-
+        prediction_data["summary"] = "LLM 응답이 비어 있음"
 
-    # ✅ state 안전하게 복사 후 저장
-    state = copy.deepcopy(state)
-    state["trend_prediction"] = prediction_data
 
     print("\n TrendPredictAgent 예측 완료!\n")
-    print(json.dumps(state["trend_prediction"], indent=2, ensure_ascii=False))
-    print(f"🧩 [DEBUG] TrendPredictAgent 종료 시 state keys: {list(state.keys())}")
-    print(f"🧩 [DEBUG] trend_prediction 내용 타입: {type(state['trend_prediction'])}, 값: {state['trend_prediction']}")
-    print(f"[DEBUG] TrendPredictAgent 최종 반환 직전 state keys: {list(state.keys())}")
-    print(f"[DEBUG] TrendPredictAgent 최종 반환 직전 trend_prediction: {state.get('trend_prediction')}")
-
-
-    return state
-
+    print(json.dumps(prediction_data, indent=2, ensure_ascii=False))
 
+    # 변경된 키만 반환 — LangGraph가 기존 state에 병합한다 (전체 state 복사 불필요)
+    return {"trend_prediction": prediction_data}
 
 
 if __name__ == "__main__":
@@ -158,3 +126,4 @@ if __name__ == "__main__":
     }
 
     result = trend_predict_agent(dummy_state)
+    print(result.get("trend_prediction"))
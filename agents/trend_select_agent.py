@@ -5,31 +5,21 @@ TrendSelectAgent
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from agents.state_schema import SystemState
+from agents.state_schema import SystemState, TrendCandidatesOutput, TrendGroupsOutput, RankedTrendsOutput
+from utils.structured_output import StructuredOutputError, invoke_structured
 
 
 import re
 from collections import Counter
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from dotenv import load_dotenv
-load_dotenv()
+from langchain_core.runnables import RunnableLambda
+from utils.clients import get_llm
+from utils.config import env_int, env_str
+from utils.context_packer import batch_documents, budget_for, count_tokens, pack_documents, report_packing
+from utils.data_cleaner import clean_texts
 
 
-
-llm = ChatOpenAI(model="gpt-4o-mini")
-
-def clean_text(text):
-    """불필요한 기호 제거"""
-    text = re.sub(r"[^A-Za-z0-9가-힣\s]", " ", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
-
-
-def extract_trend_candidates(docs):
-    """기사 요약들에서 트랜드 키워드 후보 추출"""
-    combined_text = "\n".join([clean_text(d["content"]) for d in docs])
-    prompt = ChatPromptTemplate.from_template("""
+CANDIDATE_PROMPT = ChatPromptTemplate.from_template("""
     다음은 여러 AI 기술 트렌드 기사 요약문이다.
     이 내용을 기반으로 향후 5년 급성장하거나 새롭게 등장할 가능성이 높은 AI 관련 기술 트렌드 후보를 추출하라.
     - 구체적인 기술명만 포함 (예: Neuromorphic AI, Synthetic Data, Federated Learning, Multimodal AI, Self-learning AI 등)
@@ -44,31 +34,167 @@ def extract_trend_candidates(docs):
     {content}
     """)
 
-    chain = prompt | llm
-    response = chain.invoke({"content": combined_text})
+SYNONYM_PROMPT = ChatPromptTemplate.from_template("""
+    다음은 여러 기사 묶음에서 따로 추출한 AI 기술 트렌드 후보 목록이다. (괄호 안은 언급된 묶음 수)
+    같은 기술을 가리키는 이름(유사어, 약어, 표기 차이)을 하나의 그룹으로 묶어라.
+    - name: 그룹을 대표하는 가장 일반적인 영문 기술명
+    - aliases: 그룹에 속하는 목록의 이름을 그대로 모두 포함
+    - 서로 다른 기술은 합치지 말 것
+    - 형식: JSON {{"groups": [{{"name": "", "aliases": ["", ...]}}, ...]}}
+
+    ==== 후보 목록 ====
+    {candidates}
+    """)
+
+# single: 검색 결과를 한 프롬프트에 담아 한 번에 추출 (예산을 넘는 문서는 잘린다)
+# map_reduce: 토큰 예산 단위 batch마다 동시에 추출한 뒤 유사어를 통합해 병합 (batch가 하나면 호출 한 번)
+SELECT_EXTRACT_MODE = env_str("SELECT_EXTRACT_MODE", "map_reduce").lower()
+SELECT_BATCH_TOKENS = env_int("SELECT_BATCH_TOKENS", 3000)       # batch당 문서 토큰 (문서가 많으면 노드 예산까지 늘린다)
+SELECT_MAX_BATCHES = env_int("SELECT_MAX_BATCHES", 16)           # 이보다 많이 필요하면 검색 순위가 낮은 문서를 버린다
+SELECT_MAX_CONCURRENCY = env_int("SELECT_MAX_CONCURRENCY", 8)
+SELECT_MAX_CANDIDATES = env_int("SELECT_MAX_CANDIDATES", 30)     # 병합 후 언급 빈도 순 상위 후보만 정렬 단계로 넘긴다
 
-    import json, re
-    raw_text = response.content.strip()
+_PARENS = re.compile(r"\(([^)]*)\)")
 
-    # ✅ JSON 코드블록 처리
-    if raw_text.startswith("```"):
-        raw_text = re.sub(r"^```[a-zA-Z]*\n?", "", raw_text)  # ```json 혹은 ``` 제거
-        raw_text = raw_text.replace("```", "").strip()
 
+def _extract_from_text(content: str) -> list:
+    """기사 묶음 하나에서 후보 추출 (구조화 출력 실패 시 텍스트 패턴으로 대체)"""
     try:
-        result = json.loads(raw_text)
-        candidates = result.get("candidates", [])
-    except Exception as e:
-        print("\n⚠️ JSON 파싱 실패:", e)
-        print("LLM 응답 원문:\n", raw_text)
+        result = invoke_structured(CANDIDATE_PROMPT, {"content": content}, TrendCandidatesOutput,
+                                   node="select", llm=get_llm("select"))
+        return result["candidates"]
+    except StructuredOutputError as e:
+        print("LLM 응답 원문:\n", e.raw)
         # fallback - 일반 텍스트 패턴에서 후보 추출
-        matches = re.findall(r'\b[A-Z][A-Za-z0-9\s\-]+AI\b', raw_text)
+        matches = re.findall(r'\b[A-Z][A-Za-z0-9\s\-]+AI\b', e.raw)
         candidates = list(set(matches))
         print(f"⚙️ 일반 텍스트 기반 후보 추출: {candidates}")
+        return candidates
 
 
-    return candidates
+def _synonym_keys(name: str) -> list:
+    """표기 차이를 무시한 비교 키 — 'Retrieval-Augmented Generation (RAG)'는 본래 이름과 약어 키 둘 다"""
+    def key(text):
+        k = re.sub(r"[^0-9a-z가-힣]+", "", text.lower())
+        return k[:-1] if len(k) > 3 and k.endswith("s") and not k.endswith("ss") else k
 
+    keys = [key(_PARENS.sub("", name))] + [key(alias) for alias in _PARENS.findall(name)]
+    return [k for k in dict.fromkeys(keys) if k]
+
+
+def merge_candidates(batch_candidates) -> list:
+    """
+    batch별 후보를 표기 차이 기준으로 묶어 [(대표 이름, 언급 batch 수, 이름들)] 반환.
+    언급 batch 수가 많은 순, 같으면 먼저 나온 순.
+    """
+    groups, by_key = [], {}
+    for candidates in batch_candidates:
+        seen = set()
+        for name in candidates:
+            name = (name or "").strip()
+            keys = _synonym_keys(name)
+            if not keys:
+                continue
+            group = next((by_key[k] for k in keys if k in by_key), None)
+            if group is None:
+                group = {"names": Counter(), "batches": 0}
+                groups.append(group)
+            for k in keys:
+                by_key.setdefault(k, group)
+            group["names"][name] += 1
+            if id(group) not in seen:
+                seen.add(id(group))
+                group["batches"] += 1
+    merged = [(g["names"].most_common(1)[0][0], g["batches"], list(g["names"])) for g in groups]
+    return sorted(merged, key=lambda m: -m[1])
+
+
+def consolidate_synonyms(merged) -> list:
+    """LLM으로 표기만으로는 알 수 없는 유사어(약어, 다른 이름)를 한 번 더 묶는다 — 실패하면 입력 그대로"""
+    listing = "\n".join(f"- {name} ({count})" for name, count, _ in merged)
+    try:
+        result = invoke_structured(SYNONYM_PROMPT, {"candidates": listing}, TrendGroupsOutput,
+                                   node="select", llm=get_llm("select"))
+    except StructuredOutputError as e:
+        print(f"⚠️ 유사어 통합 실패 → 표기 기준 병합 결과 사용: {e}")
+        return merged
+
+    # LLM 그룹의 alias를 비교 키로 병합 결과에 매핑 — 목록에 없는 이름은 무시, 그룹에 없는 후보는 그대로 유지
+    owner = {}
+    for index, (_, _, names) in enumerate(merged):
+        for name in names:
+            for k in _synonym_keys(name):
+                owner.setdefault(k, index)
+    canonical, assigned = {}, {}
+    for group in result.get("groups") or []:
+        members = {owner[k] for alias in [group.get("name", "")] + list(group.get("aliases") or [])
+                   for k in _synonym_keys(alias) if k in owner}
+        members -= set(assigned)
+        if not members:
+            continue
+        leader = min(members)
+        for index in members:
+            assigned[index] = leader
+        canonical[leader] = (group.get("name") or "").strip() or merged[leader][0]
+
+    combined = {}
+    for index, (name, count, names) in enumerate(merged):
+        leader = assigned.get(index, index)
+        entry = combined.setdefault(leader, [canonical.get(leader, merged[leader][0]), 0, []])
+        entry[1] += count
+        entry[2].extend(names)
+    consolidated = sorted((tuple(e) for e in combined.values()), key=lambda m: -m[1])
+    if len(consolidated) < len(merged):
+        print(f"  ▪ 유사어 통합: {len(merged)}개 → {len(consolidated)}개")
+    return consolidated
+
+
+def extract_trend_candidates(docs):
+    """기사 요약들에서 트랜드 키워드 후보 추출"""
+    texts = list(clean_texts(d["content"] for d in docs))
+    if SELECT_EXTRACT_MODE != "single":
+        if SELECT_EXTRACT_MODE != "map_reduce":
+            print(f"⚠️ 알 수 없는 SELECT_EXTRACT_MODE '{SELECT_EXTRACT_MODE}' → map_reduce 사용")
+        return extract_candidates_map_reduce(texts)
+
+    # 입력 토큰 상한 안에서 중복 기사를 빼고 검색 순위 순서대로 담는다
+    combined_text = pack_documents(texts, budget_for("select", CANDIDATE_PROMPT), separator="\n")
+    report_packing("select", count_tokens("\n".join(texts)), count_tokens(combined_text))
+    return _extract_from_text(combined_text)
+
+
+def extract_candidates_map_reduce(texts) -> list:
+    """
+    map: 문서를 토큰 예산 단위 batch로 나눠 batch마다 후보를 동시에 추출
+    reduce: 표기 차이 기준 병합 → (batch가 여럿이면) LLM 유사어 통합 → 언급 빈도 순 상위 SELECT_MAX_CANDIDATES개
+    """
+    ceiling = budget_for("select", CANDIDATE_PROMPT)
+    total_tokens = count_tokens("\n".join(texts))
+    # 문서가 많아 SELECT_MAX_BATCHES개로 부족하면 batch를 노드 예산까지 키운다
+    batch_tokens = min(ceiling, max(SELECT_BATCH_TOKENS, -(-total_tokens // max(1, SELECT_MAX_BATCHES))))
+    batches = batch_documents(texts, batch_tokens, SELECT_MAX_BATCHES, separator="\n")
+    report_packing("select", total_tokens, sum(count_tokens(b) for b in batches))
+    if len(batches) <= 1:
+        return _extract_from_text(batches[0] if batches else "")
+
+    print(f"  ▪ 문서 {len(texts)}개 → {len(batches)}개 batch에서 후보 동시 추출 (batch당 ≤{batch_tokens} tokens)")
+    outputs = RunnableLambda(_extract_from_text).batch(
+        batches,
+        config={"max_concurrency": SELECT_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+    errors = [o for o in outputs if isinstance(o, Exception)]
+    for error in errors:
+        print(f"⚠️ batch 후보 추출 실패: {error}")
+    if len(errors) == len(outputs):
+        raise errors[0]
+
+    merged = merge_candidates(o for o in outputs if not isinstance(o, Exception))
+    if len(merged) > 1:
+        merged = consolidate_synonyms(merged)
+    candidates = [name for name, _, _ in merged[:SELECT_MAX_CANDIDATES]]
+    print(f"  ▪ batch 후보 병합: {sum(len(o) for o in outputs if not isinstance(o, Exception))}개 → {len(candidates)}개")
+    return candidates
 
 
 def rank_by_future_relevance(candidates):
@@ -93,28 +219,17 @@ def rank_by_future_relevance(candidates):
     }}
     """)
 
-    chain = prompt | llm
-    response = chain.invoke({"trend_list": "\n".join(candidates)})
-
-    import json, re
-    raw = response.content.strip()
-
-
-    if raw.startswith("```"):
-        raw = re.sub(r"^```[a-zA-Z]*\n?", "", raw)
-        raw = raw.replace("```", "").strip()
-
     try:
-        result = json.loads(raw)
-        ranked_data = result.get("ranked_trends", [])
+        result = invoke_structured(prompt, {"trend_list": "\n".join(candidates)},
+                                   RankedTrendsOutput, node="select", llm=get_llm("select"))
+        ranked_data = result["ranked_trends"]
         if not ranked_data:  # ⚠️ 빈 리스트인 경우 대비
             print("⚠️ LLM이 빈 ranked_trends를 반환했습니다.")
             return candidates
         ranked = sorted(ranked_data, key=lambda x: x.get("total", 0), reverse=True)
-        final = [r["name"] for r in ranked]
-    except Exception as e:
-        print(f"⚠️ JSON 파싱 실패: {e}")
-        print("LLM 응답 원문:\n", raw)
+        final = [r["name"] for r in ranked if r["name"]]
+    except StructuredOutputError as e:
+        print("LLM 응답 원문:\n", e.raw)
         final = candidates
 
     # ⚠️ None 방지 — 비어 있으면 candidates 그대로 반환
@@ -125,6 +240,17 @@ def rank_by_future_relevance(candidates):
     return final
 
 
+def best_qualified_trend(trends, trend_scores):
+    """batch 평가 결과에서 적합 판정을 받은 트렌드 중 총점이 가장 높은 트렌드 (없으면 None)"""
+    qualified = [
+        t for t in trends
+        if t in trend_scores and trend_scores[t].get("is_qualified")
+    ]
+    if not qualified:
+        return None
+    # 동점이면 기존 정렬 순서 유지
+    return max(qualified, key=lambda t: (trend_scores[t].get("total_score") or 0, -trends.index(t)))
+
 
 def trend_select_agent(state: SystemState) -> SystemState:
     """
@@ -159,8 +285,21 @@ def trend_select_agent(state: SystemState) -> SystemState:
         state["current_trend"] = None
         return state
 
-    current = remaining.pop(0)
-    print(f"\n🎯 TrendSelectAgent → 다음 트렌드 선택: {current}")
+    trend_scores = state.get("trend_scores")
+    if trend_scores:
+        # batch 평가 결과가 있으면 적합 트렌드 중 최고점을 바로 선택
+        current = best_qualified_trend(remaining, trend_scores)
+        if current is None:
+            print("⚠️ 적합 판정을 받은 트렌드가 없습니다.")
+            state["current_trend"] = None
+            state["remaining_trends"] = []
+            return state
+        remaining.remove(current)
+        print(f"\n🎯 TrendSelectAgent → 최고점 적합 트렌드 선택: {current} "
+              f"({trend_scores[current].get('total_score')})")
+    else:
+        current = remaining.pop(0)
+        print(f"\n🎯 TrendSelectAgent → 다음 트렌드 선택: {current}")
 
     # state 업데이트
     state["current_trend"] = current
@@ -168,7 +307,6 @@ def trend_select_agent(state: SystemState) -> SystemState:
     return state
 
 
-
 if __name__ == "__main__":
     from agents.search_agent import search_agent
     from agents.state_schema import SystemState
@@ -0,0 +1,83 @@
+"""
+텍스트 정리 micro-benchmark
+한글/영문이 섞인 검색 결과 문서를 기존 방식(호출마다 re.sub 두 번)과 utils.data_cleaner의
+clean_text / clean_texts(배치, 선택적 프로세스 병렬)로 정리해 처리량을 비교한다. (API 키 불필요)
+
+실행: python -m benchmarks.bench_cleaning [--docs 2000] [--doc-chars 1200] [--workers 4]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from utils.data_cleaner import clean_text, clean_texts
+
+_WORDS = (
+    "AI 인공지능 모델의 성능이 향상되었다. (2025) data-driven 에이전트, 'agentic' workflow! "
+    "Neuromorphic 컴퓨팅은 전력 효율을 10배 높인다 — “quote” #trend https://example.com/a?b=1 "
+    "연합학습(Federated Learning)은 개인정보를 보호하며… 😀 multimodal/멀티모달 GPU·TPU"
+).split()
+
+
+def make_docs(n_docs: int, doc_chars: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(n_docs):
+        words, size = [], 0
+        while size < doc_chars:
+            word = rng.choice(_WORDS)
+            words.append(word)
+            size += len(word) + 1
+        docs.append(" ".join(words)[:doc_chars])
+    return docs
+
+
+def legacy_clean_text(text: str) -> str:
+    """기존 구현 (호출마다 패턴 조회 + 두 번 치환)"""
+    text = re.sub(r"[^A-Za-z0-9가-힣\s]", " ", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+def measure(fn, repeat: int):
+    """(최소 소요 시간 s, 결과)"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000, help="문서 수")
+    parser.add_argument("--doc-chars", type=int, default=1200, help="문서 길이(문자)")
+    parser.add_argument("--workers", type=int, default=4, help="clean_texts 프로세스 병렬 worker 수")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 횟수 (최솟값 사용)")
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs, args.doc_chars)
+    total_mb = sum(len(d.encode("utf-8")) for d in docs) / (1024 * 1024)
+    print(f"문서 {args.docs}개 × {args.doc_chars}자 ({total_mb:.1f} MiB), 반복 {args.repeat}회 중 최솟값\n")
+
+    cases = [
+        ("legacy re.sub x2", lambda: [legacy_clean_text(d) for d in docs]),
+        ("clean_text", lambda: [clean_text(d) for d in docs]),
+        ("clean_texts (stream)", lambda: list(clean_texts(iter(docs), workers=0))),
+        (f"clean_texts (workers={args.workers})", lambda: list(clean_texts(docs, workers=args.workers))),
+    ]
+    expected = None
+    print(f"{'방식':<28}{'시간(ms)':>10}{'docs/s':>12}{'MiB/s':>9}")
+    for label, fn in cases:
+        elapsed, result = measure(fn, args.repeat)
+        if expected is None:
+            expected = result
+        mark = "" if result == expected else "  ⚠️ 결과 불일치"
+        print(f"{label:<28}{elapsed * 1000:>10.1f}{args.docs / elapsed:>12,.0f}{total_mb / elapsed:>9.1f}{mark}")
+    print("\n* workers 병렬은 CLEAN_PARALLEL_MIN_DOCS 이상일 때만 프로세스 풀을 사용한다")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+PDF 렌더링 benchmark
+5~50페이지 한국어 보고서를 기존 경로(문서마다 폰트 파싱)와
+utils.pdf_renderer의 최적화 경로(프로세스당 한 번 파싱한 폰트 재사용)로 렌더링해 비교하고,
+여러 보고서를 render_reports()로 프로세스 풀에서 병렬 렌더링한 처리량을 측정한다. (API 키 불필요)
+
+실행: python -m benchmarks.bench_pdf [--pages 5 20 50] [--reports 8] [--workers 4] [--fonts-dir fonts]
+  - NotoSansKR 폰트가 없으면 --synthetic-fonts로 한글 음절 전체를 담은 대체 폰트를 만들어 사용한다
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from utils import pdf_renderer
+from utils.pdf_renderer import FONT_FILES, PDF, render_reports
+
+_SYLLABLES = [chr(c) for c in range(0xAC00, 0xAC00 + 2000)]
+_TERMS = ["", "", "", "AI", "(2030)", "LLM", "Edge AI", "30%"]
+
+
+def make_sections(pages: int, seed: int = 0) -> list:
+    """대략 pages쪽 분량의 보고서 섹션 — 한 쪽에 소제목 + 본문 5문단 + 세부 항목"""
+    rng = random.Random(seed)
+
+    def paragraph(words: int) -> str:
+        return " ".join(
+            "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 5))) + rng.choice(_TERMS)
+            for _ in range(words)
+        )
+
+    sections = []
+    for i in range(pages):
+        lines = [f"## {i + 1}.1 소제목"] + [paragraph(60) for _ in range(5)] + ["### 세부 항목", "- " + paragraph(12)]
+        sections.append({"title": f"{i + 1}. 섹션", "text": "\n".join(lines)})
+    return sections
+
+
+def build_synthetic_fonts(font_dir: str):
+    """한글 음절(U+AC00~U+D7A3)과 ASCII를 담은 NotoSansKR 대체 폰트 (글리프 수가 실제 폰트와 비슷한 규모)"""
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    chars = list(range(0x20, 0x7F)) + list(range(0xAC00, 0xD7A4)) + [0x2014, 0x2026, 0xB7]
+    for style, filename in FONT_FILES.items():
+        order = [".notdef"] + [f"uni{c:04X}" for c in chars]
+        glyphs, advances = {}, {}
+        for i, name in enumerate(order):
+            width = 500 if i <= 95 else 1000
+            pen = TTGlyphPen(None)
+            pen.moveTo((50, 0))
+            pen.lineTo((50, 700))
+            pen.lineTo((width - 50, 700))
+            pen.lineTo((width - 50, 0))
+            pen.closePath()
+            glyphs[name], advances[name] = pen.glyph(), (width, 50)
+        fb = FontBuilder(1000, isTTF=True)
+        fb.setupGlyphOrder(order)
+        fb.setupCharacterMap({c: f"uni{c:04X}" for c in chars})
+        fb.setupGlyf(glyphs)
+        fb.setupHorizontalMetrics(advances)
+        fb.setupHorizontalHeader(ascent=880, descent=-120)
+        fb.setupNameTable({"familyName": "BenchSansKR", "styleName": "Bold" if style else "Regular"})
+        fb.setupOS2(usWeightClass=700 if style else 400, sCapHeight=700)
+        fb.setupPost()
+        fb.save(os.path.join(font_dir, filename))
+
+
+def render(sections: list, font_dir: str, optimized: bool) -> tuple:
+    """(레이아웃 s, 저장 s, 쪽수, bytes)"""
+    if not optimized:
+        pdf_renderer._font_cache.clear()  # 기존 경로: 문서마다 폰트 파싱
+    start = time.perf_counter()
+    pdf = PDF(font_dir)
+    pdf.add_title_page()
+    for section in sections:
+        pdf.add_section(section["title"], section["text"])
+    pdf.add_notice_page()
+    laid_out = time.perf_counter()
+    data = pdf.output()
+    return laid_out - start, time.perf_counter() - laid_out, pdf.page_no(), len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 50], help="보고서 분량(쪽)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    parser.add_argument("--reports", type=int, default=8, help="병렬 렌더링할 보고서 수 (0이면 생략)")
+    parser.add_argument("--report-pages", type=int, default=20, help="병렬 렌더링 보고서 분량(쪽)")
+    parser.add_argument("--workers", type=int, default=4, help="render_reports 프로세스 수")
+    parser.add_argument("--fonts-dir", default="fonts", help="NotoSansKR 폰트 디렉터리")
+    parser.add_argument("--synthetic-fonts", action="store_true", help="대체 한글 폰트를 만들어 사용")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        font_dir = args.fonts_dir
+        if args.synthetic_fonts:
+            font_dir = os.path.join(workdir, "fonts")
+            os.makedirs(font_dir)
+            build_synthetic_fonts(font_dir)
+        font_dir = os.path.abspath(font_dir)
+
+        print(f"폰트: {font_dir}, 반복 {args.repeat}회 중 최솟값\n")
+        print(f"{'쪽수':>5} {'방식':<8}{'레이아웃(ms)':>13}{'저장(ms)':>10}{'합계(ms)':>10}{'쪽/s':>8}{'KiB':>8}")
+        for pages in args.pages:
+            sections = make_sections(pages)
+            baseline = None
+            for label, optimized in (("기존", False), ("최적화", True)):
+                runs = [render(sections, font_dir, optimized) for _ in range(args.repeat)]
+                layout, save, page_count, size = min(runs, key=lambda r: r[0] + r[1])
+                total = layout + save
+                speedup = f"  x{baseline / total:.1f}" if baseline else ""
+                baseline = baseline or total
+                print(f"{page_count:>5} {label:<8}{layout * 1000:>13.0f}{save * 1000:>10.0f}{total * 1000:>10.0f}"
+                      f"{page_count / total:>8.1f}{size / 1024:>8.0f}{speedup}")
+
+        if args.reports:
+            jobs = [
+                {"path": os.path.join(workdir, f"report_{i}.pdf"), "font_dir": font_dir,
+                 "sections": make_sections(args.report_pages, seed=i)}
+                for i in range(args.reports)
+            ]
+            print(f"\n보고서 {args.reports}개 × 약 {args.report_pages}쪽 (CPU {os.cpu_count()}개)")
+            for workers in (1, args.workers):
+                pdf_renderer._font_cache.clear()
+                start = time.perf_counter()
+                render_reports(jobs, workers=workers)
+                elapsed = time.perf_counter() - start
+                print(f"  workers={workers:<3} {elapsed:6.2f}s  ({args.reports / elapsed:.2f} 보고서/s)")
+            print("  * workers는 CPU 수로 제한된다")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+오프라인 end-to-end 파이프라인 벤치마크
+ChatOpenAI / 임베딩 / Tavily를 benchmarks.fakes의 가짜 백엔드로 바꿔 build_graph() 워크플로우 전체와
+각 노드를 단독으로 실행하고, 처리량 / 노드별 지연 시간 백분위 / 최대 메모리를 출력한다. (API 키, 네트워크 불필요)
+가짜 백엔드 지연을 0으로 두면 state 복사, 직렬화, 벡터스토어 준비, PDF 렌더링 같은 오케스트레이션 비용만 남는다.
+
+실행: python -m benchmarks.bench_pipeline [--runs 5] [--llm-latency 0] [--response-chars 1500] [--json out.json]
+  - PDF 렌더링에 fonts/NotoSansKR-*.ttf 가 필요하다 (--fonts-dir)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fakes import prepare_env
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1]}
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool = True):
+    """agent의 진행 로그 출력 억제"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def measure_peak(fn):
+    """(반환값, tracemalloc 최대 할당 MiB)"""
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / (1024 * 1024)
+
+
+def node_inputs(final_state: dict) -> dict:
+    """노드 단독 실행용 입력 — 전체 실행의 결과 state에서 각 노드가 읽는 키만 추린다"""
+    trend = final_state.get("current_trend")
+    return {
+        "search": {},
+        "select": {"search_results": final_state.get("search_results", [])},
+        "judge": {"current_trend": trend, "remaining_trends": final_state.get("remaining_trends") or [trend]},
+        "analysis": {"current_trend": trend, "search_results": final_state.get("search_results", [])},
+        "predict": {"current_trend": trend, "trend_analysis": final_state.get("trend_analysis")},
+        "risk": {"current_trend": trend, "trend_prediction": final_state.get("trend_prediction")},
+        "report": {k: final_state.get(k) for k in (
+            "current_trend", "search_results", "trend_analysis", "trend_prediction", "risk_analysis",
+            "scores", "total_score", "reason",
+        )},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="워크플로우 반복 실행 횟수")
+    parser.add_argument("--node-repeat", type=int, default=5, help="노드 단독 실행 반복 횟수 (0이면 생략)")
+    parser.add_argument("--top-n", type=int, default=0, help="0: 단일 트렌드 모드, N>0: 포트폴리오 모드")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="가짜 LLM 호출 지연(초)")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="가짜 검색 호출 지연(초)")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="가짜 임베딩 배치 호출 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연 변동 비율 (0.2 = ±20%%)")
+    parser.add_argument("--llm-chars-per-s", type=float, default=0.0,
+                        help="가짜 LLM 생성 속도(문자/초) — 0이면 응답 길이와 무관한 고정 지연만 사용")
+    parser.add_argument("--llm-prompt-chars-per-s", type=float, default=0.0,
+                        help="가짜 LLM 입력 처리 속도(문자/초) — 0이면 프롬프트 길이와 무관")
+    parser.add_argument("--response-chars", type=int, default=1500, help="LLM 응답 필드 길이(문자)")
+    parser.add_argument("--doc-chars", type=int, default=1200, help="검색 결과 문서 길이(문자)")
+    parser.add_argument("--embedding-size", type=int, default=1536, help="임베딩 차원")
+    parser.add_argument("--caches", action="store_true", help="LLM / 검색 캐시 사용 (기본: 끔)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="증분 실행: 입력이 이전 실행과 같은 노드는 저장된 결과 재사용 (utils.node_memo)")
+    parser.add_argument("--fonts-dir", default="fonts", help="NotoSansKR 폰트 디렉터리")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--verbose", action="store_true", help="agent 로그 출력")
+    args = parser.parse_args()
+
+    fonts_dir = os.path.abspath(args.fonts_dir)
+    json_path = os.path.abspath(args.json) if args.json else None
+    if not os.path.isfile(os.path.join(fonts_dir, "NotoSansKR-Regular.ttf")):
+        sys.exit(f"폰트가 없습니다: {fonts_dir}/NotoSansKR-Regular.ttf (--fonts-dir 지정)")
+
+    # 캐시 / PDF 출력은 임시 작업 디렉터리에 격리
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.chdir(workdir)
+    os.symlink(fonts_dir, "fonts")
+    prepare_env(os.path.join(workdir, ".cache"), caches=args.caches)
+
+    import main as pipeline_main
+    from agents.judge_agent import judge_agent
+    from agents.report_agent import report_agent
+    from agents.risk_agent import risk_agent
+    from agents.search_agent import search_agent
+    from agents.trend_analysis_agent import trend_analysis_agent
+    from agents.trend_predict_agent import trend_predict_agent
+    from agents.trend_select_agent import trend_select_agent
+    from benchmarks.fakes import install_fakes
+    from utils.metrics import metrics
+    from utils.node_memo import memo_stats, set_incremental
+
+    install_fakes(
+        llm_latency=args.llm_latency, search_latency=args.search_latency, embed_latency=args.embed_latency,
+        jitter=args.jitter, response_chars=args.response_chars, doc_chars=args.doc_chars,
+        embedding_size=args.embedding_size, llm_chars_per_second=args.llm_chars_per_s,
+        llm_prompt_chars_per_second=args.llm_prompt_chars_per_s,
+    )
+    set_incremental(args.incremental)
+
+    print(f"작업 디렉터리: {workdir}")
+    print(f"모드: {'포트폴리오 top-' + str(args.top_n) if args.top_n else '단일 트렌드'}, "
+          f"LLM 지연 {args.llm_latency}s, 검색 지연 {args.search_latency}s, 임베딩 지연 {args.embed_latency}s, "
+          f"캐시 {'on' if args.caches else 'off'}, 증분 실행 {'on' if args.incremental else 'off'}\n")
+
+    # 1) 그래프 빌드
+    start = time.perf_counter()
+    workflow = pipeline_main.build_graph(top_n=args.top_n)
+    build_s = time.perf_counter() - start
+
+    # 2) 워크플로우 반복 실행 (첫 실행은 벡터스토어 생성 등 cold start)
+    metrics.reset()
+    run_times, final_state = [], {}
+    for i in range(args.runs):
+        start = time.perf_counter()
+        with quiet(not args.verbose):
+            final_state = workflow.invoke({}, {"recursion_limit": 50})
+        run_times.append(time.perf_counter() - start)
+    node_summary = metrics.summary()["node"]
+
+    with quiet(not args.verbose):
+        _, workflow_peak = measure_peak(lambda: workflow.invoke({}, {"recursion_limit": 50}))
+
+    total = sum(run_times)
+    result = {
+        "config": vars(args),
+        "graph_build_s": round(build_s, 4),
+        "workflow": {
+            "runs": args.runs,
+            "cold_s": round(run_times[0], 4),
+            "mean_s": round(statistics.mean(run_times), 4),
+            **{k: round(v, 4) for k, v in percentiles(run_times).items()},
+            "throughput_per_min": round(60 * args.runs / total, 2) if total else 0.0,
+            "peak_traced_mib": round(workflow_peak, 2),
+        },
+        "graph_nodes": node_summary,
+        "nodes": {},
+    }
+
+    print(f"{'그래프 빌드':<20}{build_s * 1000:>10.1f} ms")
+    wf = result["workflow"]
+    print(f"{'워크플로우':<20}cold {wf['cold_s']:.3f}s / p50 {wf['p50']:.3f}s / p95 {wf['p95']:.3f}s / "
+          f"{wf['throughput_per_min']} runs/min / peak {wf['peak_traced_mib']:.1f} MiB\n")
+
+    if args.incremental:
+        result["incremental"] = memo_stats()
+        print(f"증분 실행: 재사용 {result['incremental']['reused']} / 재실행 {result['incremental']['recomputed']}\n")
+
+    print("그래프 내 노드 (워크플로우 실행 중 계측)")
+    print(f"{'node':<18}{'calls':>6}{'p50(s)':>10}{'p95(s)':>10}{'max(s)':>10}")
+    for name, s in node_summary.items():
+        print(f"{name:<18}{s['calls']:>6}{s['p50_s']:>10.4f}{s['p95_s']:>10.4f}{s['max_s']:>10.4f}")
+
+    # 3) 노드 단독 실행 (증분 모드를 끄고 agent 자체 비용을 측정)
+    set_incremental(False)
+    if args.node_repeat > 0 and final_state.get("current_trend"):
+        nodes = {
+            "search": search_agent, "select": trend_select_agent, "judge": judge_agent,
+            "analysis": trend_analysis_agent, "predict": trend_predict_agent,
+            "risk": risk_agent, "report": report_agent,
+        }
+        if args.top_n:
+            # 포트폴리오 모드 결과 state에는 branch별 분석 결과가 없으므로 단일 트렌드 실행 결과를 입력으로 사용
+            with quiet(not args.verbose):
+                final_state = pipeline_main.build_graph(top_n=0).invoke({}, {"recursion_limit": 50})
+        inputs = node_inputs(final_state)
+        print("\n노드 단독 실행")
+        print(f"{'node':<18}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}{'peak MiB':>10}")
+        for name, fn in nodes.items():
+            times = []
+            for _ in range(args.node_repeat):
+                start = time.perf_counter()
+                with quiet(not args.verbose):
+                    fn(dict(inputs[name]))
+                times.append(time.perf_counter() - start)
+            with quiet(not args.verbose):
+                _, peak = measure_peak(lambda: fn(dict(inputs[name])))
+            p = percentiles(times)
+            result["nodes"][name] = {**{k: round(v, 5) for k, v in p.items()}, "peak_traced_mib": round(peak, 2)}
+            print(f"{name:<18}{p['p50'] * 1000:>10.2f}{p['p95'] * 1000:>10.2f}{p['max'] * 1000:>10.2f}{peak:>10.2f}")
+
+    maxrss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    result["max_rss_mib"] = round(maxrss_mib, 1)
+    print(f"\n프로세스 최대 RSS: {maxrss_mib:.1f} MiB")
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+요청 병합(single-flight) benchmark
+utils.single_flight.SingleFlightTransport 앞에서 같은 요청을 동시에 보내 실제로 전달된 호출 수와 소요 시간을
+병합 없이 보낸 경우와 비교하고, 병합된 응답이 원래 응답과 같은지 확인한다. (API 키, 네트워크 불필요)
+- 응답은 gzip으로 압축해 돌려준다 — 병합된 응답도 호출자마다 한 번만 풀려야 한다
+- 인증 헤더가 다른 요청은 본문이 같아도 병합되지 않아야 한다
+
+실행: python -m benchmarks.bench_single_flight [--callers 16] [--distinct 4] [--latency 0.2]
+"""
+
+import argparse
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from utils.single_flight import SingleFlightTransport, single_flight
+
+
+class SlowGzipBackend:
+    """요청마다 latency초 뒤 gzip JSON 응답 (본문 + Authorization 헤더를 그대로 돌려준다)"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        payload = {"echo": json.loads(request.content), "auth": request.headers.get("authorization")}
+        return httpx.Response(200, headers={"content-encoding": "gzip", "content-type": "application/json"},
+                              content=gzip.compress(json.dumps(payload).encode("utf-8")))
+
+
+def run(callers: int, distinct: int, latency: float, coalesce: bool, auth_keys: int = 1) -> dict:
+    backend = SlowGzipBackend(latency)
+    transport = httpx.MockTransport(backend)
+    if coalesce:
+        transport = SingleFlightTransport(single_flight("http", f"bench-{time.perf_counter_ns()}"), transport)
+
+    def key(i: int) -> str:
+        # 본문과 독립적으로 키를 나눠, 같은 본문이 여러 키로 나가게 한다
+        return f"Bearer key-{(i // distinct) % auth_keys}"
+
+    def call(i: int):
+        headers = {"authorization": key(i)}
+        response = client.post("http://bench/v1/chat", json={"prompt": i % distinct}, headers=headers)
+        return i, response.json()
+
+    with httpx.Client(transport=transport) as client, ThreadPoolExecutor(max_workers=callers) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(call, range(callers)))
+        elapsed = time.perf_counter() - start
+
+    mismatched = [
+        i for i, body in results
+        if body != {"echo": {"prompt": i % distinct}, "auth": key(i)}
+    ]
+    return {"calls": backend.calls, "elapsed": elapsed, "mismatched": len(mismatched)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, default=16, help="동시에 보내는 요청 수")
+    parser.add_argument("--distinct", type=int, default=4, help="서로 다른 요청 본문 수")
+    parser.add_argument("--latency", type=float, default=0.2, help="가짜 백엔드 응답 지연(초)")
+    args = parser.parse_args()
+
+    print(f"요청 {args.callers}개 (본문 {args.distinct}종류), 백엔드 지연 {args.latency}s, gzip 응답\n")
+    print(f"{'방식':<24}{'백엔드 호출':>10}{'시간(s)':>10}{'응답 불일치':>12}")
+    cases = [
+        ("병합 없음", False, 1),
+        ("single-flight", True, 1),
+        ("single-flight, 키 2개", True, 2),
+    ]
+    for label, coalesce, auth_keys in cases:
+        r = run(args.callers, args.distinct, args.latency, coalesce, auth_keys)
+        mark = "" if r["mismatched"] == 0 else "  ⚠️"
+        print(f"{label:<24}{r['calls']:>10}{r['elapsed']:>10.2f}{r['mismatched']:>12}{mark}")
+    print("\n* 인증 키가 다르면 본문이 같아도 따로 보낸다 (키 2개 → 호출 수 2배)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+State 업데이트 방식 micro-benchmark
+노드가 전체 state를 deepcopy 해서 반환하는 기존 방식과, 변경된 키만 반환하는 방식의
+지연 시간 / 메모리 할당량을 비교한다. (API 키 불필요)
+
+실행: python -m benchmarks.bench_state_update [--docs 50] [--repeat 200]
+"""
+
+import argparse
+import copy
+import time
+import tracemalloc
+
+from langgraph.graph import StateGraph, START, END
+
+from agents.state_schema import SystemState
+
+
+def make_state(n_docs: int) -> SystemState:
+    """실제 실행과 비슷한 크기의 state (검색 결과 + 분석/예측 문자열)"""
+    return {
+        "search_results": [
+            {"title": f"문서 {i}", "url": f"https://example.com/{i}", "content": "AI 트렌드 기사 요약 " * 40}
+            for i in range(n_docs)
+        ],
+        "remaining_trends": [f"Trend {i}" for i in range(10)],
+        "current_trend": "Federated Learning",
+        "trend_analysis": {k: "분석 문단 " * 600 for k in
+                           ("definition", "key_technologies", "industry_trends", "adoption_flow", "future_outlook")},
+        "trend_prediction": {k: "예측 문단 " * 500 for k in
+                             ("tech_path", "market_outlook", "industry_applications", "barriers", "summary")},
+    }
+
+
+RISK = {"opportunities": "기회", "risks": "위험", "policy_factors": "정책", "strategic_response": "전략", "summary": "요약"}
+
+
+def deepcopy_node(state):
+    merged = copy.deepcopy(state)
+    merged["risk_analysis"] = RISK
+    return merged
+
+
+def partial_node(state):
+    return {"risk_analysis": RISK}
+
+
+def measure(fn, repeat: int):
+    """(호출당 평균 ms, 호출당 최대 메모리 KiB)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / 1024
+
+
+def build_two_node_graph(node):
+    """predict → risk 구간을 흉내 낸 2-노드 그래프"""
+    graph = StateGraph(SystemState)
+    graph.add_node("predict", node)
+    graph.add_node("risk", node)
+    graph.add_edge(START, "predict")
+    graph.add_edge("predict", "risk")
+    graph.add_edge("risk", END)
+    return graph.compile()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50, help="search_results 문서 수")
+    parser.add_argument("--repeat", type=int, default=200, help="반복 횟수")
+    args = parser.parse_args()
+
+    state = make_state(args.docs)
+    print(f"state: search_results {args.docs}개, 반복 {args.repeat}회\n")
+    print(f"{'구간':<28}{'방식':<12}{'ms/call':>10}{'peak KiB':>12}")
+
+    for label, node in (("deepcopy", deepcopy_node), ("partial", partial_node)):
+        ms, kib = measure(lambda: node(state), args.repeat)
+        print(f"{'node 단독':<28}{label:<12}{ms:>10.3f}{kib:>12.1f}")
+
+    graph_repeat = max(1, args.repeat // 10)
+    for label, node in (("deepcopy", deepcopy_node), ("partial", partial_node)):
+        workflow = build_two_node_graph(node)
+        ms, kib = measure(lambda: workflow.invoke(state), graph_repeat)
+        print(f"{'LangGraph invoke (2 nodes)':<28}{label:<12}{ms:>10.3f}{kib:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+오프라인 벤치마크용 가짜 백엔드
+ChatOpenAI / OpenAIEmbeddings / TavilyClient 자리에 들어가는 결정적(deterministic) 대체 구현.
+지연 시간과 응답 크기를 조절할 수 있어, 네트워크 없이 오케스트레이션 오버헤드만 측정한다.
+
+사용: agent 모듈을 import 하기 전에 prepare_env()를 호출하고, import 후 install_fakes()로 교체한다.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+FAKE_TRENDS = [
+    "Neuromorphic AI", "Synthetic Data", "Agentic AI", "Federated Learning",
+    "Multimodal AI", "Self-learning AI", "Quantum Machine Learning", "Edge AI",
+]
+
+_TREND_NAME = re.compile(r"트렌드명:\s*(.+)")
+
+
+def stable_score(name: str) -> float:
+    """트렌드 이름으로 정해지는 0.3~0.95 점수 (실행 간 동일)"""
+    return round(0.3 + (zlib.crc32(name.encode("utf-8")) % 66) / 100, 2)
+
+
+def prepare_env(cache_dir: str, caches: bool = False):
+    """agent import 전에 호출 — 더미 API 키, 격리된 캐시 디렉터리, 캐시 사용 여부 설정"""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+    os.environ.setdefault("TAVILY_API_KEY", "tvly-offline-benchmark")
+    os.environ["CACHE_DIR"] = cache_dir
+    os.environ["LLM_CACHE_ENABLED"] = "1" if caches else "0"
+    os.environ["SEARCH_CACHE_ENABLED"] = "1" if caches else "0"
+
+
+class _Latency:
+    """고정 지연 + 지터 (seed 고정)"""
+
+    def __init__(self, seconds: float, jitter: float = 0.0, seed: int = 0):
+        self.seconds = seconds
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self):
+        if self.seconds <= 0:
+            return
+        with self._lock:
+            delay = self.seconds * (1 + self._rng.uniform(-self.jitter, self.jitter))
+        time.sleep(max(0.0, delay))
+
+
+class FakeChatModel(BaseChatModel):
+    """프롬프트 내용으로 어느 Agent의 호출인지 판단해 형식에 맞는 응답을 돌려주는 채팅 모델"""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    chars_per_second: float = 0.0  # 0보다 크면 응답 길이에 비례한 생성 시간을 추가 (긴 응답일수록 느림)
+    prompt_chars_per_second: float = 0.0  # 0보다 크면 입력 길이에 비례한 처리 시간을 추가 (긴 프롬프트일수록 느림)
+    response_chars: int = 1500
+    seed: int = 0
+    _delay: Any = None
+
+    def model_post_init(self, __context: Any) -> None:
+        self._delay = _Latency(self.latency, self.jitter, self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _text(self, label: str) -> str:
+        sentence = f"{label}에 대한 기술적/산업적 근거 문장입니다. "
+        return (sentence * (self.response_chars // len(sentence) + 1))[: self.response_chars]
+
+    def _report(self) -> str:
+        from agents.report_agent import REPORT_HEADINGS
+        body = self._text("보고서 본문")
+        return "\n".join(f"{s}\n{body}" for s in REPORT_HEADINGS)
+
+    def respond(self, text: str) -> str:
+        if '"candidates"' in text:
+            return json.dumps({"candidates": FAKE_TRENDS})
+        if '"groups"' in text:
+            return json.dumps({"groups": [{"name": n, "aliases": [n]} for n in FAKE_TRENDS]})
+        if "ranked_trends" in text:
+            ranked = sorted(FAKE_TRENDS, key=stable_score, reverse=True)
+            return json.dumps({"ranked_trends": [
+                {"name": n, "scores": {"emergence": stable_score(n), "growth": stable_score(n), "applicability": stable_score(n)},
+                 "total": stable_score(n), "reason": "offline"}
+                for n in ranked
+            ]})
+        if "[소제목]" in text:
+            return self._text("소제목 본문")
+        if '"appendix"' in text:
+            return json.dumps({"summary": self._text("요약")[:300], "appendix": self._text("평가 지표")[:600]},
+                              ensure_ascii=False)
+        match = _TREND_NAME.search(text)
+        if match:
+            name = match.group(1).strip()
+            s = stable_score(name)
+            return json.dumps({
+                "trend": name,
+                "scores": {"maturity": s, "growth": s, "applicability": s, "innovation": s},
+                "total_score": s,
+                "is_qualified": s >= 0.65,
+                "reason": self._text("평가 근거")[:200],
+            }, ensure_ascii=False)
+        if '"risk_analysis"' in text:
+            keys = ("opportunities", "risks", "policy_factors", "strategic_response", "summary")
+            return json.dumps({"risk_analysis": {k: self._text(k) for k in keys}}, ensure_ascii=False)
+        if '"prediction"' in text:
+            keys = ("tech_path", "market_outlook", "industry_applications", "barriers", "summary")
+            return json.dumps({"trend": "offline", "prediction": {k: self._text(k) for k in keys}}, ensure_ascii=False)
+        if "보고서" in text:
+            return self._report()
+        return self._text("분석")
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self._delay.sleep()
+        prompt = "\n".join(str(m.content) for m in messages)
+        content = self.respond(prompt)
+        if self.prompt_chars_per_second > 0:
+            time.sleep(len(prompt) / self.prompt_chars_per_second)
+        if self.chars_per_second > 0:
+            time.sleep(len(content) / self.chars_per_second)
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FakeSearchClient:
+    """TavilyClient.search 대체 — 쿼리별로 항상 같은 결과"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, doc_chars: int = 1200, seed: int = 0):
+        self._delay = _Latency(latency, jitter, seed)
+        self.doc_chars = doc_chars
+        self.calls = 0
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> dict:
+        self._delay.sleep()
+        self.calls += 1
+        qid = zlib.crc32(query.encode("utf-8"))
+        trend = FAKE_TRENDS[qid % len(FAKE_TRENDS)]
+        results = []
+        for i in range(max_results):
+            sentence = f"{trend} 관련 기사 {qid % 997}-{i}: 연구 동향과 산업 적용 사례를 다룬다. "
+            results.append({
+                "title": f"{trend} article {i}",
+                "url": f"https://example.com/{qid % 997}/{i}",
+                "content": (sentence * (self.doc_chars // len(sentence) + 1))[: self.doc_chars],
+            })
+        return {"query": query, "results": results}
+
+
+class FakeEmbeddings(Embeddings):
+    """DeterministicFakeEmbedding + 배치 호출 지연"""
+
+    def __init__(self, size: int = 1536, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self._inner = DeterministicFakeEmbedding(size=size)
+        self._delay = _Latency(latency, jitter, seed)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._delay.sleep()
+        return self._inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self._delay.sleep()
+        return self._inner.embed_query(text)
+
+
+def install_fakes(llm_latency: float = 0.0, search_latency: float = 0.0, embed_latency: float = 0.0,
+                  jitter: float = 0.0, response_chars: int = 1500, doc_chars: int = 1200,
+                  embedding_size: int = 1536, seed: int = 0, llm_chars_per_second: float = 0.0,
+                  llm_prompt_chars_per_second: float = 0.0) -> dict:
+    """
+    공유 클라이언트 레지스트리(utils.clients)의 LLM / 임베딩 / 검색 생성 함수를 가짜 백엔드로 교체.
+    노드별 캐시 설정과 계측 callback은 레지스트리가 그대로 붙여 준다.
+    """
+    from agents import trend_analysis_agent
+    from utils import clients
+
+    search = FakeSearchClient(search_latency, jitter, doc_chars, seed)
+    clients.set_factory("llm", lambda node, **kwargs: FakeChatModel(
+        latency=llm_latency, jitter=jitter, chars_per_second=llm_chars_per_second,
+        prompt_chars_per_second=llm_prompt_chars_per_second, response_chars=response_chars, seed=seed, **kwargs,
+    ))
+    clients.set_factory("embeddings", lambda model: FakeEmbeddings(embedding_size, embed_latency, jitter, seed))
+    clients.set_factory("search", lambda: search)
+    trend_analysis_agent._vectorstore = None
+    return {"search": search}
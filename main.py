@@ -2,28 +2,149 @@
 main_graph.py
 LangGraph 기반 AI 트렌드 자동 분석 루프
 """
+import threading
+import time
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
 from agents.state_schema import SystemState
 from agents.search_agent import search_agent
 from agents.trend_select_agent import trend_select_agent
-from agents.judge_agent import judge_agent
+from agents.judge_agent import judge_agent, batch_judge_agent
 from agents.trend_analysis_agent import trend_analysis_agent
 from agents.trend_predict_agent import trend_predict_agent
 from agents.risk_agent import risk_agent
-from agents.report_agent import report_agent
+from agents.report_agent import report_agent, portfolio_report_agent
+from agents.trend_select_agent import best_qualified_trend
+from utils.config import env_int
+from utils.metrics import instrument_node, metrics, write_run_summary
+from utils.node_memo import memoize_node
 
+# 0이면 단일 트렌드 모드, N>0이면 상위 N개 적합 트렌드를 병렬 분석하는 포트폴리오 모드
+PORTFOLIO_TOP_N = env_int("PORTFOLIO_TOP_N", 0)
+# 동시에 실행할 트렌드 파이프라인(branch) 수
+PORTFOLIO_MAX_CONCURRENCY = env_int("PORTFOLIO_MAX_CONCURRENCY", 3)
+
+
+def _report_ok(output: dict) -> bool:
+    """섹션 생성이 하나라도 실패한 보고서는 재사용하지 않는다"""
+    return not ((output.get("final_report") or {}).get("sections") or {}).get("failed")
+
+
+# 증분 실행(--incremental / INCREMENTAL=1)에서 memoize할 노드: (읽는 state 필드, 쓰는 필드, 추가 옵션)
+# search는 변경의 출발점이라 항상 실행하고, analysis는 노드 안에서 수집 문서 hash까지 포함해 memoize한다
+MEMO_NODES = {
+    "select": (("search_results", "remaining_trends", "trend_scores"), ("current_trend", "remaining_trends"), {}),
+    "judge": (("current_trend", "remaining_trends", "trend_scores"),
+              ("scores", "total_score", "is_qualified", "judge_result", "reason", "trend_scores"), {}),
+    "predict": (("current_trend", "trend_analysis"), ("trend_prediction",), {}),
+    "risk": (("current_trend", "trend_prediction"), ("risk_analysis",), {}),
+    "report": (("current_trend", "trend_analysis", "trend_prediction", "risk_analysis",
+                "search_results", "scores", "total_score", "reason"), ("final_report",),
+               {"validate": _report_ok, "files": lambda out: [(out.get("final_report") or {}).get("path")]}),
+    "portfolio_report": (("trend_reports",), ("portfolio_report",),
+                         {"files": lambda out: [(out.get("portfolio_report") or {}).get("path")]}),
+}
+
+
+def graph_node(name: str, fn):
+    """계측 + (증분 모드일 때) 입력 hash 기반 memoization을 붙인 그래프 노드"""
+    if name in MEMO_NODES:
+        reads, writes, options = MEMO_NODES[name]
+        fn = memoize_node(name, fn, reads, writes, **options)
+    return instrument_node(name, fn)
+
+
+def build_trend_pipeline():
+    """트렌드 하나에 대한 analysis → predict → risk → report 서브그래프"""
+    graph = StateGraph(SystemState)
+    graph.add_node("analysis", graph_node("analysis", trend_analysis_agent))
+    graph.add_node("predict", graph_node("predict", trend_predict_agent))
+    graph.add_node("risk", graph_node("risk", risk_agent))
+    graph.add_node("report", graph_node("report", report_agent))
+
+    graph.add_edge(START, "analysis")
+    graph.add_edge("analysis", "predict")
+    graph.add_edge("predict", "risk")
+    graph.add_edge("risk", "report")
+    graph.add_edge("report", END)
+    return graph.compile()
+
+
+def build_portfolio_graph(top_n: int, checkpointer=None):
+    """
+    map-reduce 모드
+    search → select → judge(batch) → [상위 N개 트렌드별 파이프라인 병렬 실행] → 통합 보고서
+    """
+    graph = StateGraph(SystemState)
+    pipeline = build_trend_pipeline()
+    slots = threading.BoundedSemaphore(max(1, PORTFOLIO_MAX_CONCURRENCY))
+
+    def trend_pipeline_node(state: SystemState):
+        """branch 하나 — 결과는 trend_reports 리듀서로만 반환해 branch 간 충돌을 막는다"""
+        waited = time.perf_counter()
+        with slots:
+            metrics.record_wait("node", "trend_pipeline", time.perf_counter() - waited)
+            result = pipeline.invoke(state)
+        final = result.get("final_report") or {}
+        return {"trend_reports": [{
+            "trend": state.get("current_trend"),
+            "total_score": state.get("total_score"),
+            "report_text": final.get("report_text", ""),
+            "path": final.get("path"),
+        }]}
+
+    graph.add_node("search", graph_node("search", search_agent))
+    graph.add_node("select", graph_node("select", trend_select_agent))
+    graph.add_node("judge", graph_node("judge", batch_judge_agent))
+    graph.add_node("trend_pipeline", graph_node("trend_pipeline", trend_pipeline_node))
+    graph.add_node("portfolio_report", graph_node("portfolio_report", portfolio_report_agent))
+
+    graph.add_edge(START, "search")
+    graph.add_edge("search", "select")
+    graph.add_edge("select", "judge")
+
+    def fan_out_trends(state: SystemState):
+        scores = state.get("trend_scores") or {}
+        qualified = [t for t, r in scores.items() if r.get("is_qualified")]
+        top = sorted(qualified, key=lambda t: scores[t].get("total_score") or 0, reverse=True)[:top_n]
+        if not top:
+            print("🚫 적합 판정을 받은 트렌드가 없습니다. 워크플로우 종료.")
+            return END
+        print(f"🔀 상위 {len(top)}개 트렌드 병렬 분석: {top}")
+        return [
+            Send("trend_pipeline", {
+                "current_trend": t,
+                "search_results": state.get("search_results", []),
+                "scores": scores[t].get("scores"),
+                "total_score": scores[t].get("total_score"),
+                "is_qualified": True,
+                "reason": scores[t].get("reason", ""),
+            })
+            for t in top
+        ]
+
+    graph.add_conditional_edges("judge", fan_out_trends, ["trend_pipeline", END])
+    graph.add_edge("trend_pipeline", "portfolio_report")
+    graph.add_edge("portfolio_report", END)
+
+    return graph.compile(checkpointer=checkpointer)
+
+
+def build_graph(top_n: int = None, checkpointer=None):
+    top_n = PORTFOLIO_TOP_N if top_n is None else top_n
+    if top_n > 0:
+        return build_portfolio_graph(top_n, checkpointer=checkpointer)
 
-def build_graph():
     graph = StateGraph(SystemState)
 
     # ✅ 노드 정의
-    graph.add_node("search", search_agent)
-    graph.add_node("select", trend_select_agent)
-    graph.add_node("judge", judge_agent)
-    graph.add_node("analysis", trend_analysis_agent)
-    graph.add_node("predict", trend_predict_agent)
-    graph.add_node("risk", risk_agent)
-    graph.add_node("report", report_agent)
+    graph.add_node("search", graph_node("search", search_agent))
+    graph.add_node("select", graph_node("select", trend_select_agent))
+    graph.add_node("judge", graph_node("judge", judge_agent))
+    graph.add_node("analysis", graph_node("analysis", trend_analysis_agent))
+    graph.add_node("predict", graph_node("predict", trend_predict_agent))
+    graph.add_node("risk", graph_node("risk", risk_agent))
+    graph.add_node("report", graph_node("report", report_agent))
 
     # ✅ 흐름 연결
     graph.add_edge(START, "search")
@@ -32,7 +153,17 @@ def build_graph():
 
     # 조건 분기: 적합성 판단 결과에 따라 흐름 분리
     def route_after_judge(state: SystemState):
+        if not state.get("current_trend"):
+            print("🚫 선택 가능한 트렌드가 없습니다. 워크플로우 종료.")
+            return "end"
         if state.get("is_qualified"):
+            # batch 모드: 더 높은 점수의 적합 트렌드가 남아 있으면 select에서 바로 그 트렌드를 고른다
+            scores = state.get("trend_scores") or {}
+            best = best_qualified_trend(state.get("remaining_trends") or [], scores)
+            current_total = scores.get(state["current_trend"], {}).get("total_score") or 0
+            if best and (scores[best].get("total_score") or 0) > current_total:
+                print(f"🔁 더 높은 점수의 적합 트렌드 '{best}' 존재 → 재선택")
+                return "select"
             return "analysis"
         else:
             print(f"🚫 '{state.get('current_trend')}' 기준 미달 → 다음 트렌드로 재선택")
@@ -41,6 +172,7 @@ def build_graph():
     graph.add_conditional_edges("judge", route_after_judge, {
         "analysis": "analysis",
         "select": "select",
+        "end": END,
     })
 
     # 나머지 직선 연결
@@ -49,22 +181,121 @@ def build_graph():
     graph.add_edge("risk", "report")
     graph.add_edge("report", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
+
+
+def cache_summaries() -> dict:
+    """실행 요약에 함께 기록할 캐시 / 구조화 출력 통계"""
+    from utils.llm_cache import llm_cache_stats
+    from utils.node_memo import memo_stats
+    from utils.rate_limiter import rate_limit_stats
+    from utils.search_cache import search_cache_stats
+    from utils.single_flight import single_flight_stats
+    from utils.structured_output import structured_output_stats
+    return {
+        "llm_cache": llm_cache_stats(),
+        "search_cache": search_cache_stats(),
+        "structured_output": structured_output_stats(),
+        "rate_limits": rate_limit_stats(),
+        "single_flight": single_flight_stats(),
+        "incremental": memo_stats(),
+    }
+
+
+def print_metrics_table():
+    """노드별 지연 시간 / 토큰 / 비용 요약 출력"""
+    summary = metrics.summary()
+    llm = summary["llm"]
+    print("\n📊 노드별 실행 계측")
+    print(f"{'node':<16}{'calls':>6}{'p50(s)':>9}{'p95(s)':>9}{'total(s)':>10}{'wait(s)':>9}"
+          f"{'tokens':>9}{'hits':>6}{'cost($)':>11}")
+    for name, s in summary["node"].items():
+        l = llm.get(name, {})
+        tokens = l.get("input_tokens", 0) + l.get("output_tokens", 0)
+        print(f"{name:<16}{s['calls']:>6}{s['p50_s']:>9.2f}{s['p95_s']:>9.2f}{s['wall_time_s']:>10.2f}"
+              f"{s['wait_time_s']:>9.2f}{tokens:>9}{l.get('cache_hits', 0):>6}{l.get('cost_usd', 0):>11.5f}")
+    totals = summary["totals"]
+    print(f"💰 총 예상 비용: ${totals['cost_usd']:.5f} "
+          f"(입력 {totals['input_tokens']} / 출력 {totals['output_tokens']} tokens)")
+
+
+def parse_args():
+    import argparse
+    parser = argparse.ArgumentParser(description="AI 트렌드 분석 파이프라인")
+    parser.add_argument("--thread-id", help="실행 ID (체크포인트 키). 생략 시 새로 생성")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="노드 단위 체크포인트 저장 (실패한 실행을 --resume으로 재개, 성공하면 삭제)")
+    parser.add_argument("--resume", action="store_true",
+                        help="--thread-id 실행을 마지막으로 완료된 노드 다음부터 재개 (--checkpoint 포함)")
+    parser.add_argument("--checkpoint-db", default=None, help="체크포인트 SQLite 경로")
+    parser.add_argument("--incremental", action="store_true",
+                        help="입력이 이전 실행과 같은 노드는 저장된 결과를 재사용 (INCREMENTAL=1과 같음)")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
+    import os
+    import sys
+    from datetime import datetime
     from dotenv import load_dotenv
     load_dotenv()
 
-    # 초기 state
-    state = SystemState()
+    args = parse_args()
+    if args.resume and not args.thread_id:
+        sys.exit("--resume에는 --thread-id가 필요합니다.")
+
+    checkpointer = None
+    if args.checkpoint or args.resume:
+        from utils.checkpoint import CHECKPOINT_DB, get_checkpointer
+        checkpointer = get_checkpointer(args.checkpoint_db or CHECKPOINT_DB)
+
+    if args.incremental:
+        from utils.node_memo import set_incremental
+        set_incremental(True)
+
+    thread_id = args.thread_id or datetime.now().strftime("run-%Y%m%d-%H%M%S")
+    config = {"configurable": {"thread_id": thread_id}}
 
     # 그래프 실행
-    workflow = build_graph()
-    result = workflow.invoke(state)
+    workflow = build_graph(checkpointer=checkpointer)
+    if args.resume:
+        snapshot = workflow.get_state(config)
+        if not snapshot.created_at:
+            sys.exit(f"체크포인트가 없습니다: {thread_id}")
+        if not snapshot.next:
+            print(f"✅ '{thread_id}' 실행은 이미 완료되었습니다.")
+            result = snapshot.values
+        else:
+            print(f"♻️ '{thread_id}' 재개 → 다음 노드: {list(snapshot.next)}")
+            result = workflow.invoke(None, config)
+    else:
+        if checkpointer is not None:
+            print(f"🧷 실행 ID: {thread_id} (실패 시 --thread-id {thread_id} --resume 으로 재개)")
+        # 초기 state
+        result = workflow.invoke(SystemState(), config)
+
+    if checkpointer is not None:
+        # 완료된 실행은 재개할 일이 없으므로 체크포인트를 지워 DB가 계속 커지지 않게 한다
+        checkpointer.delete_thread(thread_id)
 
     # 그래프 시각화
     print(workflow.get_graph().draw_ascii())
 
     print("\n🎯 파이프라인 완료!")
-    print(f"📄 최종 보고서: {result.get('final_report', {}).get('path', 'N/A')}")
+    if result.get("portfolio_report"):
+        print(f"📚 포트폴리오 보고서: {result['portfolio_report'].get('path', 'N/A')}")
+    print(f"📄 최종 보고서: {(result.get('final_report') or {}).get('path', 'N/A')}")
+
+    print_metrics_table()
+    summaries = cache_summaries()
+    memo = summaries["incremental"]
+    if memo["enabled"]:
+        print(f"♻️ 증분 실행: 재사용 {', '.join(memo['reused']) or '없음'} / "
+              f"재실행 {', '.join(memo['recomputed']) or '없음'}")
+    paths = write_run_summary(os.path.join("reports", f"{thread_id}_metrics"), extra=summaries)
+    print(f"📈 실행 계측: {paths['json']}, {paths['prometheus']}")
+
+    from utils.clients import close_all
+    from utils.pdf_renderer import shutdown_render_pool
+    close_all()
+    shutdown_render_pool()
@@ -0,0 +1,294 @@
+"""
+service.py
+상시 실행 서비스 모드 — 사내 도구에서 HTTP로 분석 실행을 요청한다.
+- 컴파일된 그래프(build_graph)와 공유 클라이언트를 프로세스 안에서 재사용 (모드별 한 번만 컴파일)
+- 실행 요청은 크기가 정해진 대기열(SERVICE_QUEUE_SIZE)에 넣고, 가득 차면 429로 거절
+- 최대 SERVICE_MAX_CONCURRENT_RUNS개 실행을 동시에 처리하며 실행 상태 / 결과를 조회할 수 있다
+
+API
+  POST /runs                  {"top_n": 0, "thread_id": null, "resume": false} → 202 {"run_id", "status", "queue_position"}
+  GET  /runs                  최근 실행 목록
+  GET  /runs/{run_id}         상태 (queued / running / succeeded / failed), 완료된 노드
+  GET  /runs/{run_id}/result  최종 보고서 (완료 전에는 409)
+  GET  /healthz               대기열 / 실행 중 개수
+  GET  /metrics               노드 / LLM / 검색 계측 (Prometheus text format)
+  GET  /metrics/summary       계측 + 캐시 통계 (JSON)
+
+실행: python service.py [--host 127.0.0.1] [--port 8000]
+"""
+
+import asyncio
+import json
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from agents.state_schema import SystemState
+from main import build_graph, cache_summaries
+from utils.config import env_bool, env_int, env_str
+from utils.metrics import metrics
+
+SERVICE_MAX_CONCURRENT_RUNS = env_int("SERVICE_MAX_CONCURRENT_RUNS", 2)
+SERVICE_QUEUE_SIZE = env_int("SERVICE_QUEUE_SIZE", 16)
+SERVICE_MAX_RUNS_KEPT = env_int("SERVICE_MAX_RUNS_KEPT", 200)  # 상태를 보관할 최근 실행 수
+SERVICE_CHECKPOINT = env_bool("SERVICE_CHECKPOINT", True)
+SERVICE_HOST = env_str("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = env_int("SERVICE_PORT", 8000)
+
+# 결과 조회 시 돌려줄 state 키 (검색 결과 원문 등 큰 값은 제외)
+RESULT_KEYS = ("current_trend", "total_score", "is_qualified", "scores", "reason", "final_report", "portfolio_report")
+
+
+class GraphPool:
+    """모드(top_n)별 컴파일된 그래프 — 처음 요청될 때 한 번만 컴파일하고 모든 실행이 공유한다"""
+
+    def __init__(self, checkpointer=None):
+        self.checkpointer = checkpointer
+        self._graphs: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, top_n: int):
+        with self._lock:
+            graph = self._graphs.get(top_n)
+            if graph is None:
+                started = time.perf_counter()
+                graph = build_graph(top_n=top_n, checkpointer=self.checkpointer)
+                self._graphs[top_n] = graph
+                print(f"🧩 그래프 컴파일 (top_n={top_n}): {time.perf_counter() - started:.2f}s")
+        return graph
+
+
+class RunManager:
+    """대기열 + 동시 실행 worker + 실행 기록"""
+
+    def __init__(self, max_concurrent: int = SERVICE_MAX_CONCURRENT_RUNS, queue_size: int = SERVICE_QUEUE_SIZE,
+                 checkpoint: bool = SERVICE_CHECKPOINT):
+        self.checkpoint = checkpoint
+        self.graphs: Optional[GraphPool] = None
+        self.max_concurrent = max(1, max_concurrent)
+        self.queue_size = queue_size
+        self.runs: "OrderedDict[str, dict]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        # 그래프 실행(동기)은 전용 스레드 풀에서 — 이벤트 루프는 요청 처리만 한다
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="run")
+
+    async def start(self):
+        checkpointer = None
+        if self.checkpoint:
+            # 체크포인트를 남기면 실패한 실행을 {"thread_id": ..., "resume": true}로 재개할 수 있다
+            from utils.checkpoint import get_checkpointer
+            checkpointer = get_checkpointer()
+        self.graphs = GraphPool(checkpointer)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        # 기본 모드 그래프를 미리 컴파일해 첫 요청에서 컴파일 비용을 내지 않는다
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.graphs.get, 0)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrent)]
+        print(f"🚀 서비스 시작: 동시 실행 {self.max_concurrent}개, 대기열 {self.queue_size}개")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        from utils.clients import close_all
+        from utils.pdf_renderer import shutdown_render_pool
+        close_all()
+        shutdown_render_pool()
+
+    def submit(self, top_n: int = 0, thread_id: Optional[str] = None, resume: bool = False) -> Optional[dict]:
+        """대기열에 실행 추가 — 대기열이 가득 차면 None"""
+        run_id = thread_id if resume and thread_id else (thread_id or f"run-{uuid.uuid4().hex[:12]}")
+        run = {
+            "run_id": run_id,
+            "status": "queued",
+            "top_n": top_n,
+            "resume": resume,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "completed_nodes": [],
+            "error": None,
+            "result": None,
+        }
+        try:
+            self._queue.put_nowait(run)
+        except asyncio.QueueFull:
+            return None
+        self.runs[run_id] = run
+        self.runs.move_to_end(run_id)
+        self._evict()
+        return run
+
+    def queue_position(self, run: dict) -> int:
+        queued = [r for r in self.runs.values() if r["status"] == "queued"]
+        return queued.index(run) + 1 if run in queued else 0
+
+    def health(self) -> dict:
+        statuses = [r["status"] for r in self.runs.values()]
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": statuses.count("running"),
+            "max_concurrent_runs": self.max_concurrent,
+            "queue_size": self.queue_size,
+        }
+
+    def _evict(self):
+        """보관 개수를 넘으면 오래된 완료 실행부터 삭제"""
+        finished = [k for k, r in self.runs.items() if r["status"] in ("succeeded", "failed")]
+        for run_id in finished[: max(0, len(self.runs) - SERVICE_MAX_RUNS_KEPT)]:
+            del self.runs[run_id]
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            run = await self._queue.get()
+            try:
+                run["status"] = "running"
+                run["started_at"] = _now()
+                values = await loop.run_in_executor(self._executor, self._execute, run)
+                run["result"] = {k: values.get(k) for k in RESULT_KEYS if values.get(k) is not None}
+                run["status"] = "succeeded"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                traceback.print_exc()
+                run["status"] = "failed"
+                run["error"] = f"{type(e).__name__}: {e}"
+            finally:
+                run["finished_at"] = _now()
+                self._queue.task_done()
+
+    def _execute(self, run: dict) -> dict:
+        """worker 스레드 — 노드가 끝날 때마다 completed_nodes를 갱신하며 그래프를 끝까지 실행"""
+        graph = self.graphs.get(run["top_n"])
+        config = {"configurable": {"thread_id": run["run_id"]}}
+        inputs = None if run["resume"] else SystemState()
+        values: dict = {}
+        for mode, chunk in graph.stream(inputs, config, stream_mode=["updates", "values"]):
+            if mode == "updates":
+                run["completed_nodes"].extend(chunk.keys())
+            else:
+                values = chunk
+        if not values and graph.checkpointer:
+            # 이미 끝난 실행을 resume하면 새로 실행되는 노드가 없다 → 저장된 최종 state
+            values = graph.get_state(config).values
+        print(f"✅ 실행 완료: {run['run_id']}")
+        return values
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _public(run: dict) -> dict:
+    return {k: v for k, v in run.items() if k != "result"}
+
+
+# ---- ASGI ----
+
+manager = RunManager()
+
+
+async def _read_json(receive) -> dict:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    return json.loads(body) if body.strip() else {}
+
+
+async def _send(send, status: int, payload: Any, content_type: str = "application/json", headers=()):
+    if content_type == "application/json":
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    else:
+        body = payload.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", f"{content_type}; charset=utf-8".encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await manager.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await manager.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    method, parts = scope["method"], [p for p in scope["path"].split("/") if p]
+
+    if parts == ["runs"] and method == "POST":
+        try:
+            body = await _read_json(receive)
+            top_n = int(body.get("top_n", 0))
+        except (ValueError, TypeError, AttributeError):
+            return await _send(send, 400, {"error": "요청 본문은 JSON 객체여야 합니다 (top_n: int)"})
+        thread_id, resume = body.get("thread_id"), bool(body.get("resume"))
+        if resume and not thread_id:
+            return await _send(send, 400, {"error": "resume에는 thread_id가 필요합니다"})
+        existing = manager.runs.get(thread_id) if thread_id else None
+        if existing and existing["status"] in ("queued", "running"):
+            return await _send(send, 409, {"error": "이미 실행 중인 thread_id입니다", "run": _public(existing)})
+        run = manager.submit(top_n=top_n, thread_id=thread_id, resume=resume)
+        if run is None:
+            return await _send(send, 429, {"error": "대기열이 가득 찼습니다", **manager.health()},
+                               headers=[(b"retry-after", b"30")])
+        return await _send(send, 202, {**_public(run), "queue_position": manager.queue_position(run)})
+
+    if parts == ["runs"] and method == "GET":
+        return await _send(send, 200, [_public(r) for r in reversed(manager.runs.values())])
+
+    if len(parts) in (2, 3) and parts[0] == "runs" and method == "GET":
+        run = manager.runs.get(parts[1])
+        if run is None:
+            return await _send(send, 404, {"error": "실행을 찾을 수 없습니다"})
+        if len(parts) == 2:
+            return await _send(send, 200, {**_public(run), "queue_position": manager.queue_position(run)})
+        if parts[2] == "result":
+            if run["status"] != "succeeded":
+                return await _send(send, 409, {"error": "완료된 실행이 아닙니다", "status": run["status"]})
+            return await _send(send, 200, {"run_id": run["run_id"], **run["result"]})
+
+    if parts == ["healthz"] and method == "GET":
+        return await _send(send, 200, {"status": "ok", **manager.health()})
+
+    if parts == ["metrics"] and method == "GET":
+        return await _send(send, 200, metrics.to_prometheus(), content_type="text/plain")
+
+    if parts == ["metrics", "summary"] and method == "GET":
+        return await _send(send, 200, {**metrics.summary(), **cache_summaries()})
+
+    return await _send(send, 404, {"error": "not found"})
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="AI 트렌드 분석 서비스")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, lifespan="on")
@@ -0,0 +1,52 @@
+"""
+LangGraph 체크포인트 저장소
+실행(thread_id)별로 노드 단위 state를 로컬 SQLite에 저장해, 실패한 실행을 마지막 완료 노드부터 재개한다.
+검색 결과 등 큰 state는 zstd로 압축해 저장한다.
+"""
+
+import os
+import sqlite3
+from typing import Any
+
+import zstandard
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from utils.config import env_int, env_str
+from utils.sqlite_cache import CACHE_DIR
+
+CHECKPOINT_DB = env_str("CHECKPOINT_DB", os.path.join(CACHE_DIR, "checkpoints.sqlite"))
+# 이 크기(bytes) 이상인 값만 압축 — 작은 값은 압축 오버헤드가 더 크다
+CHECKPOINT_COMPRESS_MIN_BYTES = env_int("CHECKPOINT_COMPRESS_MIN_BYTES", 1024)
+
+_ZSTD_SUFFIX = "+zstd"
+
+
+class CompressedSerializer(SerializerProtocol):
+    """JsonPlusSerializer(msgpack) 결과를 일정 크기 이상이면 zstd로 압축"""
+
+    def __init__(self, min_bytes: int = CHECKPOINT_COMPRESS_MIN_BYTES, level: int = 3):
+        self.inner = JsonPlusSerializer()
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) >= self.min_bytes:
+            return type_ + _ZSTD_SUFFIX, zstandard.compress(data, self.level)
+        return type_, data
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_ZSTD_SUFFIX):
+            type_ = type_[: -len(_ZSTD_SUFFIX)]
+            payload = zstandard.decompress(payload)
+        return self.inner.loads_typed((type_, payload))
+
+
+def get_checkpointer(path: str = CHECKPOINT_DB) -> SqliteSaver:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return SqliteSaver(conn, serde=CompressedSerializer())
@@ -0,0 +1,128 @@
+"""
+공유 클라이언트 레지스트리
+LLM / 임베딩 / Tavily 클라이언트를 처음 필요할 때 한 번만 만들어 프로세스 안에서 공유한다.
+- 백엔드(openai, tavily)마다 keep-alive 연결 풀을 가진 httpx.Client 하나만 사용
+- 모든 요청은 백엔드별 공유 rate limiter(utils.rate_limiter)를 거친다 — 재시도도 limiter가 맡는다
+- 본문까지 같은 요청이 동시에 진행 중이면 하나만 보내고 응답을 공유한다 (utils.single_flight)
+- agent 모듈 import 시점에는 클라이언트를 만들지 않으므로 API 키 없이도 그래프를 빌드할 수 있다
+- set_factory()로 생성 함수를 교체할 수 있다 (벤치마크 / 오프라인 실행용)
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from utils.config import env_float, env_int, env_str
+from utils.llm_cache import llm_cache_for
+from utils.metrics import llm_callbacks
+from utils.rate_limiter import RATE_LIMIT_ENABLED, limited_transport
+from utils.single_flight import coalescing_transport
+
+LLM_MODEL = env_str("LLM_MODEL", "gpt-4o-mini")
+
+# 백엔드별 연결 풀 설정
+HTTP_MAX_CONNECTIONS = env_int("HTTP_MAX_CONNECTIONS", 20)
+HTTP_MAX_KEEPALIVE = env_int("HTTP_MAX_KEEPALIVE", 10)
+HTTP_KEEPALIVE_EXPIRY = env_float("HTTP_KEEPALIVE_EXPIRY", 30.0)
+HTTP_TIMEOUT = env_float("HTTP_TIMEOUT", 120.0)
+HTTP_CONNECT_TIMEOUT = env_float("HTTP_CONNECT_TIMEOUT", 10.0)
+
+_lock = threading.RLock()
+_http_clients: Dict[str, httpx.Client] = {}
+_instances: Dict[tuple, Any] = {}  # (종류, 키) → 인스턴스
+_factories: Dict[str, Callable[..., Any]] = {}
+
+
+def get_http_client(backend: str) -> httpx.Client:
+    """백엔드별 공유 httpx.Client (keep-alive 연결 풀)"""
+    with _lock:
+        client = _http_clients.get(backend)
+        if client is None:
+            transport = httpx.HTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+            client = httpx.Client(
+                transport=coalescing_transport(backend, limited_transport(backend, transport)),
+                timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            )
+            _http_clients[backend] = client
+    return client
+
+
+# limiter가 429 / 5xx를 재시도하므로 SDK 자체 재시도는 끈다 (중복 재시도로 부하가 곱해지지 않도록)
+_SDK_RETRY = {"max_retries": 0} if RATE_LIMIT_ENABLED else {}
+
+
+def _default_llm(node: str, **kwargs):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=LLM_MODEL, http_client=get_http_client("openai"), **_SDK_RETRY, **kwargs)
+
+
+def _default_embeddings(model: str):
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model=model, http_client=get_http_client("openai"), **_SDK_RETRY)
+
+
+def _default_search():
+    from utils.tavily_client import PooledTavilyClient
+    return PooledTavilyClient(http_client=get_http_client("tavily"))
+
+
+_DEFAULTS = {"llm": _default_llm, "embeddings": _default_embeddings, "search": _default_search}
+
+
+def _get(kind: str, key: str, *args, **kwargs):
+    with _lock:
+        instance = _instances.get((kind, key))
+        if instance is None:
+            factory = _factories.get(kind, _DEFAULTS[kind])
+            instance = factory(*args, **kwargs)
+            _instances[(kind, key)] = instance
+    return instance
+
+
+def get_llm(node: str):
+    """노드별 채팅 모델 — 노드의 LLM 캐시 설정과 계측 callback을 붙여 한 번만 생성"""
+    with _lock:
+        instance = _instances.get(("llm", node))
+    if instance is not None:
+        return instance
+    return _get("llm", node, node, cache=llm_cache_for(node), callbacks=llm_callbacks(node, LLM_MODEL))
+
+
+def get_embeddings(model: str):
+    return _get("embeddings", model, model)
+
+
+def get_search_client():
+    return _get("search", "tavily")
+
+
+def set_factory(kind: str, factory: Optional[Callable[..., Any]]):
+    """
+    클라이언트 생성 함수 교체 (None이면 기본값 복원) — 이미 만들어진 해당 종류의 인스턴스는 버린다.
+    llm: factory(node, cache=..., callbacks=...) / embeddings: factory(model) / search: factory()
+    """
+    if kind not in _DEFAULTS:
+        raise ValueError(f"알 수 없는 클라이언트 종류: {kind}")
+    with _lock:
+        if factory is None:
+            _factories.pop(kind, None)
+        else:
+            _factories[kind] = factory
+        for key in [k for k in _instances if k[0] == kind]:
+            del _instances[key]
+
+
+def close_all():
+    """공유 httpx 연결 풀 종료 (worker 종료 시)"""
+    with _lock:
+        for client in _http_clients.values():
+            client.close()
+        _http_clients.clear()
+        _instances.clear()
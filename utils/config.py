@@ -0,0 +1,44 @@
+"""
+환경 변수 기반 설정 헬퍼
+.env 혹은 실행 환경에서 튜닝 값을 읽어오고, 값이 없거나 잘못된 경우 기본값을 사용한다.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# 모듈 import 시점에 설정값을 읽으므로 .env를 먼저 로드
+load_dotenv()
+
+
+def env_str(name: str, default: str = "") -> str:
+    value = os.getenv(name)
+    return value.strip() if value and value.strip() else default
+
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_list(name: str, default=None) -> list:
+    """콤마로 구분된 값을 리스트로 변환"""
+    value = os.getenv(name)
+    if not value:
+        return list(default or [])
+    return [v.strip() for v in value.split(",") if v.strip()]
@@ -0,0 +1,230 @@
+"""
+프롬프트 컨텍스트 패킹
+LLM 입력 토큰 상한(CONTEXT_MAX_INPUT_TOKENS, 노드별 CONTEXT_BUDGET_<NODE>) 안에 들어가도록
+컨텍스트를 정리한다.
+- tiktoken으로 토큰 수 계산 (인코딩 파일을 받을 수 없는 환경에서는 문자 수 기반 추정)
+- 공백 정규화, 중복 문서/문단 제거, JSON compact 직렬화
+- 필드별 우선순위에 따라 낮은 우선순위부터 잘라낸다
+- 한 프롬프트에 담기 어려운 문서 목록은 예산 단위 batch로 나눈다 (map-reduce 호출용)
+"""
+
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.config import env_int, env_str
+
+CONTEXT_MAX_INPUT_TOKENS = env_int("CONTEXT_MAX_INPUT_TOKENS", 12000)
+TOKENIZER_ENCODING = env_str("TOKENIZER_ENCODING", "o200k_base")  # gpt-4o / gpt-4o-mini
+
+_TRUNCATED = " …"
+_WS = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """tiktoken 인코딩 (로드 실패 시 False — 추정 모드)"""
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            except Exception as e:
+                print(f"⚠️ tiktoken 인코딩 로드 실패 → 문자 수 기반 토큰 추정 사용: {type(e).__name__}")
+                _encoding = False
+    return _encoding
+
+
+def _estimate_tokens(text: str) -> int:
+    # o200k_base 기준 대략 영문 4자 / 한글 1.5자당 1토큰
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5) + 1
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _get_encoding()
+    if enc:
+        return len(enc.encode(text, disallowed_special=()))
+    return _estimate_tokens(text)
+
+
+def normalize_ws(text: str) -> str:
+    """줄 안의 연속 공백을 하나로, 빈 줄 여러 개는 하나로"""
+    text = _WS.sub(" ", text or "")
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def compact_json(value: Any) -> str:
+    """indent 없는 JSON — 문자열 값의 공백도 정규화"""
+    def clean(v):
+        if isinstance(v, str):
+            return normalize_ws(v)
+        if isinstance(v, dict):
+            return {k: clean(x) for k, x in v.items() if x not in (None, "", [], {})}
+        if isinstance(v, (list, tuple)):
+            return [clean(x) for x in v]
+        return v
+    return json.dumps(clean(value), ensure_ascii=False, separators=(",", ":"))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """max_tokens 이하로 자르기 — 가능하면 문장/공백 경계에서 자른다"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max(1, max_tokens - count_tokens(_TRUNCATED))
+    enc = _get_encoding()
+    if enc:
+        cut = enc.decode(enc.encode(text, disallowed_special=())[:budget]).rstrip("�")
+    else:
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if _estimate_tokens(text[:mid]) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        cut = text[:lo]
+    # 마지막 20% 안에 문장 끝이나 공백이 있으면 그 위치에서 자른다
+    floor = int(len(cut) * 0.8)
+    for boundary in (". ", "\n", " "):
+        pos = cut.rfind(boundary)
+        if pos >= floor:
+            cut = cut[:pos + len(boundary)]
+            break
+    return cut.rstrip() + _TRUNCATED
+
+
+def _fingerprint(text: str) -> str:
+    key = re.sub(r"\W+", "", text.lower())
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def dedupe_texts(texts: Iterable[str]) -> List[str]:
+    """공백/기호 차이만 있는 중복 문서와, 문서 간에 반복되는 문단 제거 (순서 유지)"""
+    seen_docs, seen_paragraphs, result = set(), set(), []
+    for text in texts:
+        text = normalize_ws(text)
+        if not text:
+            continue
+        fp = _fingerprint(text)
+        if fp in seen_docs:
+            continue
+        seen_docs.add(fp)
+        paragraphs = []
+        for para in text.split("\n\n"):
+            pfp = _fingerprint(para)
+            if len(para) > 80 and pfp in seen_paragraphs:
+                continue
+            seen_paragraphs.add(pfp)
+            paragraphs.append(para)
+        if paragraphs:
+            result.append("\n\n".join(paragraphs))
+    return result
+
+
+def prompt_tokens(prompt) -> int:
+    """ChatPromptTemplate 고정 부분(변수 치환 전 템플릿)의 토큰 수"""
+    total = 0
+    for message in getattr(prompt, "messages", []):
+        template = getattr(getattr(message, "prompt", None), "template", None)
+        if template:
+            total += count_tokens(template)
+    return total
+
+
+def budget_for(node: str, prompt=None, reserve: int = 0) -> int:
+    """
+    노드의 컨텍스트 토큰 예산
+    = 입력 상한(CONTEXT_BUDGET_<NODE>, 없으면 CONTEXT_MAX_INPUT_TOKENS) - 프롬프트 템플릿 - reserve
+    """
+    ceiling = env_int(f"CONTEXT_BUDGET_{node.upper()}", CONTEXT_MAX_INPUT_TOKENS)
+    overhead = prompt_tokens(prompt) if prompt is not None else 0
+    return max(0, ceiling - overhead - reserve)
+
+
+def pack_documents(texts: Iterable[str], budget: int, separator: str = "\n\n",
+                   max_tokens_per_doc: Optional[int] = None) -> str:
+    """
+    문서 목록을 예산 안에 담는다 — 중복 제거 후 순서대로 추가하고, 마지막 문서는 남은 예산만큼 자른다.
+    (texts는 중요도/검색 순위 순서라고 가정)
+    """
+    docs = dedupe_texts(texts)
+    if max_tokens_per_doc:
+        docs = [truncate_to_tokens(d, max_tokens_per_doc) for d in docs]
+    sep_tokens = count_tokens(separator)
+    packed, used = [], 0
+    for doc in docs:
+        cost = count_tokens(doc) + (sep_tokens if packed else 0)
+        if used + cost <= budget:
+            packed.append(doc)
+            used += cost
+            continue
+        remaining = budget - used - (sep_tokens if packed else 0)
+        if remaining >= 32:
+            packed.append(truncate_to_tokens(doc, remaining))
+        break
+    return separator.join(packed)
+
+
+def batch_documents(texts: Iterable[str], budget: int, max_batches: Optional[int] = None,
+                    separator: str = "\n\n") -> List[str]:
+    """
+    문서 목록을 각각 budget 토큰 이하인 batch로 나눈다 — 중복 제거 후 순서대로 채우고, budget보다 긴 문서는 자른다.
+    max_batches개를 채우고 남은 문서는 버린다. (texts는 중요도/검색 순위 순서라고 가정)
+    """
+    docs = [truncate_to_tokens(d, budget) for d in dedupe_texts(texts)]
+    sep_tokens = count_tokens(separator)
+    batches, current, used = [], [], 0
+    for doc in docs:
+        cost = count_tokens(doc)
+        if current and used + sep_tokens + cost > budget:
+            batches.append(separator.join(current))
+            current, used = [], 0
+            if max_batches and len(batches) >= max_batches:
+                break
+        used += cost + (sep_tokens if current else 0)
+        current.append(doc)
+    if current:
+        batches.append(separator.join(current))
+    return batches
+
+
+def pack_fields(fields: Dict[str, str], budget: int, priorities: Optional[Dict[str, int]] = None,
+                min_tokens: int = 64) -> Dict[str, str]:
+    """
+    여러 필드를 합계 예산 안에 맞춘다.
+    초과하면 우선순위가 낮은 필드부터 (최소 min_tokens까지) 줄이고, 그래도 넘치면 높은 우선순위 필드도 줄인다.
+    """
+    priorities = priorities or {}
+    texts = {k: v or "" for k, v in fields.items()}
+    sizes = {k: count_tokens(v) for k, v in texts.items()}
+    overflow = sum(sizes.values()) - budget
+    if overflow <= 0:
+        return texts
+
+    order = sorted(texts, key=lambda k: priorities.get(k, 0))
+    targets = dict(sizes)
+    for floor in (min_tokens, 0):
+        for key in order:
+            if overflow <= 0:
+                break
+            cut = min(overflow, max(0, targets[key] - floor))
+            targets[key] -= cut
+            overflow -= cut
+    return {k: texts[k] if targets[k] >= sizes[k] else truncate_to_tokens(texts[k], targets[k]) for k in texts}
+
+
+def report_packing(node: str, before: int, after: int):
+    if after < before:
+        print(f"📦 [{node}] 컨텍스트 {before:,} → {after:,} tokens ({(before - after) / before:.0%} 절감)")
@@ -1,7 +1,100 @@
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from utils.config import env_int
+
+CLEAN_WORKERS = env_int("CLEAN_WORKERS", 0)  # 0/1: 현재 프로세스에서 처리
+CLEAN_CHUNK_SIZE = env_int("CLEAN_CHUNK_SIZE", 256)
+CLEAN_PARALLEL_MIN_DOCS = env_int("CLEAN_PARALLEL_MIN_DOCS", 2000)
+
+# 남길 문자(영문/숫자/한글)가 연속된 구간 — 나머지 기호와 공백은 모두 구분자
+_KEEP = re.compile(r"[A-Za-z0-9가-힣]+")
+
 
 def clean_text(text: str) -> str:
     """텍스트에서 불필요한 기호, 공백 제거"""
-    text = re.sub(r"[^A-Za-z0-9가-힣\s]", " ", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    return " ".join(_KEEP.findall(text or ""))
+
+
+def _clean_chunk(texts: List[str]) -> List[str]:
+    return [clean_text(t) for t in texts]
+
+
+def _chunks(texts: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(texts)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def clean_texts(texts: Iterable[str], workers: int = CLEAN_WORKERS,
+                chunk_size: int = CLEAN_CHUNK_SIZE) -> Iterator[str]:
+    """
+    여러 문서를 순서대로 정리해 하나씩 돌려준다 (list / generator 모두 가능).
+    workers > 1(CPU 수로 제한)이고 문서가 CLEAN_PARALLEL_MIN_DOCS개 이상이면 chunk 단위로 프로세스 풀에 나눠 처리하며,
+    메모리 사용량을 묶어 두기 위해 동시에 처리 중인 chunk는 workers * 2개까지만 둔다.
+    """
+    it = iter(texts)
+    workers = min(workers, os.cpu_count() or 1)
+    if workers <= 1:
+        for text in it:
+            yield clean_text(text)
+        return
+
+    # 문서 수가 적으면 프로세스 기동 비용이 더 크다
+    head = list(islice(it, CLEAN_PARALLEL_MIN_DOCS))
+    if len(head) < CLEAN_PARALLEL_MIN_DOCS:
+        yield from _clean_chunk(head)
+        return
+
+    def all_texts():
+        yield from head
+        yield from it
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in _chunks(all_texts(), chunk_size):
+            pending.append(pool.submit(_clean_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
+
+
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "ref", "ref_src")
+
+
+def normalize_url(url: str) -> str:
+    """중복 판별용 URL 정규화 (scheme/host 소문자, www·fragment·추적 파라미터·끝 슬래시 제거)"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme,
+                       host, path, urlencode(query), ""))
+
+
+def dedupe_by_url(results):
+    """정규화된 URL 기준으로 중복 제거 (처음 등장한 순서 유지)"""
+    seen = set()
+    unique = []
+    for r in results:
+        key = normalize_url(r.get("url", "")) or r.get("content", "")
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(r)
+    return unique
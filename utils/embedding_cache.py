@@ -0,0 +1,134 @@
+"""
+임베딩 캐시
+(모델명, 텍스트 content hash)를 키로 임베딩 벡터를 디스크에 저장한다.
+캐시에 없는 텍스트만 한 번의 배치 호출로 임베딩한다.
+다른 스레드가 같은 텍스트를 임베딩하는 중이면 다시 보내지 않고 그 결과를 기다린다 (utils.single_flight).
+"""
+
+import hashlib
+import os
+import threading
+import time
+from array import array
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+from langchain_core.embeddings import Embeddings
+
+from utils.config import env_float, env_int
+from utils.context_packer import count_tokens
+from utils.metrics import estimate_cost, metrics
+from utils.single_flight import SINGLE_FLIGHT_ENABLED, single_flight
+from utils.sqlite_cache import CACHE_DIR, SQLiteTTLCache
+
+EMBEDDING_CACHE_TTL = env_float("EMBEDDING_CACHE_TTL", 30 * 24 * 3600)
+EMBEDDING_CACHE_MAX_ENTRIES = env_int("EMBEDDING_CACHE_MAX_ENTRIES", 100000)
+
+_store: Optional[SQLiteTTLCache] = None
+_store_lock = threading.Lock()
+
+
+def get_embedding_store() -> SQLiteTTLCache:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteTTLCache(
+                os.path.join(CACHE_DIR, "embedding_cache.sqlite"),
+                ttl=EMBEDDING_CACHE_TTL,
+                max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+                table="embeddings",
+            )
+    return _store
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """임의의 Embeddings 구현을 감싸 결과를 캐시하는 래퍼"""
+
+    def __init__(self, underlying: Embeddings, model_name: str, store: Optional[SQLiteTTLCache] = None):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.store = store or get_embedding_store()
+        self.flights = single_flight("embedding", model_name)
+        self.embedded = 0  # 실제로 임베딩 API에 보낸 텍스트 수
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}:{content_hash(text)}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, lambda raw: array("f", raw).tolist(), list)
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """embed_documents와 같지만 (n, dim) float32 행렬로 반환 — 캐시 값을 list로 풀지 않는다"""
+        rows = self._embed(texts, lambda raw: np.frombuffer(raw, dtype=np.float32),
+                           lambda v: np.asarray(v, dtype=np.float32))
+        return np.vstack(rows) if rows else np.empty((0, 0), dtype=np.float32)
+
+    def _embed(self, texts: List[str], from_cache: Callable[[bytes], Any], from_api: Callable[[List[float]], Any]) -> list:
+        vectors: list = []
+        missing = {}
+        for i, text in enumerate(texts):
+            raw = self.store.get(self._key(text))
+            if raw is None:
+                vectors.append(None)
+                missing.setdefault(text, []).append(i)
+            else:
+                vectors.append(from_cache(raw))
+
+        hits = len(texts) - sum(len(idx) for idx in missing.values())
+        if hits:
+            metrics.record_cache_hits("embedding", self.model_name, hits)
+        if missing:
+            # 텍스트별로 진행 중인 임베딩에 합류하거나(follower) 직접 임베딩한다(leader)
+            owned, joined = {}, {}
+            for text in missing:
+                if SINGLE_FLIGHT_ENABLED:
+                    flight, leader = self.flights.begin(self._key(text))
+                    (owned if leader else joined)[text] = flight
+                else:
+                    owned[text] = None
+            if owned:
+                self._embed_missing(owned, missing, vectors, from_api)
+            # leader 몫을 먼저 끝낸 뒤 기다리므로 서로를 기다리는 교착은 생기지 않는다
+            for text, flight in joined.items():
+                vector = self.flights.join(flight)
+                for i in missing[text]:
+                    vectors[i] = from_api(vector)
+        return vectors
+
+    def _embed_missing(self, owned: dict, missing: dict, vectors: list, from_api: Callable[[List[float]], Any]):
+        """owned(텍스트 → flight)를 한 번의 배치 호출로 임베딩하고 결과를 저장 / 기다리던 호출에 전달"""
+        new_texts = list(owned)
+        start = time.perf_counter()
+        try:
+            new_vectors = self.underlying.embed_documents(new_texts)
+        except BaseException as e:
+            metrics.record("embedding", self.model_name, time.perf_counter() - start, error=True)
+            for text, flight in owned.items():
+                if flight is not None:
+                    self.flights.finish(self._key(text), flight, error=e)
+            raise
+        # 임베딩 응답에는 usage가 없으므로 rate limiter의 TPM 차감과 같은 방식으로 토큰 수를 센다
+        tokens = sum(count_tokens(t) for t in new_texts)
+        metrics.record(
+            "embedding", self.model_name, time.perf_counter() - start,
+            input_tokens=tokens, cost=estimate_cost(self.model_name, tokens),
+        )
+        self.embedded += len(new_texts)
+        for text, vector in zip(new_texts, new_vectors):
+            if owned[text] is not None:
+                self.flights.finish(self._key(text), owned[text], vector)
+        for text, vector in zip(new_texts, new_vectors):
+            self.store.set(self._key(text), array("f", vector).tobytes())
+            for i in missing[text]:
+                vectors[i] = from_api(vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def stats(self) -> dict:
+        return {**self.store.stats(), "embedded": self.embedded}
@@ -0,0 +1,147 @@
+"""
+LLM 응답 캐시
+모든 Agent의 ChatOpenAI 호출이 공유하는 content-addressed 캐시.
+LangChain BaseCache 인터페이스를 구현하므로 모델의 `cache=` 인자로 연결한다.
+- 키: (모델명 + 파라미터 직렬화 문자열, 렌더링된 프롬프트)
+- 백엔드: sqlite (기본, 실행 간 공유) / memory
+- 노드 단위 opt-out: LLM_CACHE_DISABLED_NODES=report,judge
+"""
+
+import os
+import threading
+import warnings
+from typing import Any, Optional, Sequence, Union
+
+from langchain_core.caches import BaseCache, InMemoryCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from utils.config import env_bool, env_float, env_int, env_list, env_str
+from utils.metrics import mark_llm_cache_hit
+from utils.sqlite_cache import CACHE_DIR, SQLiteTTLCache, make_key
+
+LLM_CACHE_ENABLED = env_bool("LLM_CACHE_ENABLED", True)
+LLM_CACHE_BACKEND = env_str("LLM_CACHE_BACKEND", "sqlite")
+LLM_CACHE_TTL = env_float("LLM_CACHE_TTL", 7 * 24 * 3600)
+LLM_CACHE_MAX_ENTRIES = env_int("LLM_CACHE_MAX_ENTRIES", 5000)
+LLM_CACHE_DISABLED_NODES = set(env_list("LLM_CACHE_DISABLED_NODES"))
+
+warnings.filterwarnings("ignore", message="The function `loads` is in beta")
+
+
+def _generation_tokens(generations: Sequence[Generation]) -> int:
+    """캐시된 응답에 기록된 토큰 사용량 (prompt + completion)"""
+    total = 0
+    for gen in generations:
+        usage = getattr(getattr(gen, "message", None), "usage_metadata", None) or {}
+        total += usage.get("total_tokens", 0)
+    return total
+
+
+class SQLiteLLMCache(BaseCache):
+    """SQLiteTTLCache 위에 구현한 LangChain 캐시 (TTL + LRU)"""
+
+    def __init__(self, path: str, ttl: float = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self._store = SQLiteTTLCache(path, ttl=ttl, max_entries=max_entries, table="llm")
+        self.tokens_saved = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        raw = self._store.get(make_key("llm", llm_string, prompt))
+        if raw is None:
+            return None
+        try:
+            generations = loads(raw)
+        except Exception:
+            return None
+        self.tokens_saved += _generation_tokens(generations)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self._store.set(make_key("llm", llm_string, prompt), dumps(list(return_val)))
+
+    def clear(self, **kwargs: Any) -> None:
+        self._store.clear()
+
+    def stats(self) -> dict:
+        return {**self._store.stats(), "tokens_saved": self.tokens_saved}
+
+
+class StatsInMemoryCache(InMemoryCache):
+    """hit/miss 카운터가 있는 메모리 캐시 (프로세스 내 재사용용)"""
+
+    def __init__(self, maxsize: Optional[int] = None):
+        super().__init__(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        generations = super().lookup(prompt, llm_string)
+        if generations is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.tokens_saved += _generation_tokens(generations)
+        return generations
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+_cache: Optional[BaseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> BaseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            if LLM_CACHE_BACKEND == "memory":
+                _cache = StatsInMemoryCache(maxsize=LLM_CACHE_MAX_ENTRIES)
+            else:
+                _cache = SQLiteLLMCache(os.path.join(CACHE_DIR, "llm_cache.sqlite"))
+    return _cache
+
+
+def set_llm_cache_backend(cache: BaseCache) -> None:
+    """다른 BaseCache 구현으로 교체 (테스트/벤치마크 등)"""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+class _CacheProxy(BaseCache):
+    """모델 생성 이후에도 백엔드 교체가 반영되도록 현재 캐시에 위임 (DB는 첫 조회 시 생성)"""
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        generations = get_llm_cache().lookup(prompt, llm_string)
+        if generations is not None:
+            mark_llm_cache_hit()
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        get_llm_cache().update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        get_llm_cache().clear(**kwargs)
+
+
+_proxy = _CacheProxy()
+
+
+def llm_cache_for(node: str) -> Union[BaseCache, bool]:
+    """노드별 캐시 설정 — opt-out 노드는 False(캐시 미사용)"""
+    if not LLM_CACHE_ENABLED or node in LLM_CACHE_DISABLED_NODES:
+        return False
+    return _proxy
+
+
+def llm_cache_stats() -> dict:
+    cache = get_llm_cache()
+    return cache.stats() if hasattr(cache, "stats") else {}
@@ -0,0 +1,278 @@
+"""
+실행 계측 (instrumentation)
+그래프 노드, LLM, 임베딩, Tavily 호출마다 지연 시간 / 대기 시간 / 토큰 / 예상 비용 / 재시도 / 캐시 hit를 기록하고
+JSON 실행 요약과 Prometheus text format으로 내보낸다.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from utils.config import env_float
+
+# USD / 1M tokens (입력, 출력)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+TAVILY_COST_PER_SEARCH = env_float("TAVILY_COST_PER_SEARCH", 0.008)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int = 0) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class _Series:
+    """한 종류(노드/백엔드)의 호출 기록"""
+
+    def __init__(self):
+        self.durations: List[float] = []
+        self.waits: List[float] = []
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+
+    def summary(self) -> dict:
+        d = self.durations
+        return {
+            "calls": len(d),
+            "errors": self.errors,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "wall_time_s": round(sum(d), 4),
+            "p50_s": round(percentile(d, 0.50), 4),
+            "p95_s": round(percentile(d, 0.95), 4),
+            "max_s": round(max(d), 4) if d else 0.0,
+            "wait_time_s": round(sum(self.waits), 4),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+class MetricsRegistry:
+    """프로세스 단위 계측 저장소 (thread-safe)"""
+
+    KINDS = ("node", "llm", "embedding", "search", "http")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._series: Dict[str, Dict[str, _Series]] = {k: defaultdict(_Series) for k in self.KINDS}
+            self.started = time.time()
+
+    def _get(self, kind: str, name: str) -> _Series:
+        return self._series[kind][name]
+
+    def record(self, kind: str, name: str, duration: Optional[float] = None, *, error: bool = False,
+               cache_hit: bool = False, input_tokens: int = 0, output_tokens: int = 0,
+               cost: float = 0.0, wait: float = 0.0):
+        with self._lock:
+            s = self._get(kind, name)
+            if duration is not None:
+                s.durations.append(duration)
+            if wait:
+                s.waits.append(wait)
+            s.errors += int(error)
+            s.cache_hits += int(cache_hit)
+            s.input_tokens += input_tokens
+            s.output_tokens += output_tokens
+            s.cost += cost
+
+    def record_retry(self, kind: str, name: str, count: int = 1):
+        with self._lock:
+            self._get(kind, name).retries += count
+
+    def record_cache_hits(self, kind: str, name: str, count: int = 1):
+        """배치 호출 중 캐시에서 바로 반환한 항목 수 (항목마다 record()를 부르지 않도록)"""
+        with self._lock:
+            self._get(kind, name).cache_hits += count
+
+    def record_coalesced(self, kind: str, name: str, count: int = 1):
+        """진행 중인 동일 호출의 결과를 받아 실제 호출을 생략한 횟수"""
+        with self._lock:
+            self._get(kind, name).coalesced += count
+
+    def record_wait(self, kind: str, name: str, seconds: float):
+        self.record(kind, name, wait=seconds)
+
+    def summary(self) -> dict:
+        with self._lock:
+            result: Dict[str, Any] = {
+                kind: {name: s.summary() for name, s in sorted(series.items())}
+                for kind, series in self._series.items()
+            }
+            totals = defaultdict(float)
+            for kind in ("llm", "embedding", "search"):
+                for s in self._series[kind].values():
+                    totals["cost_usd"] += s.cost
+                    totals["input_tokens"] += s.input_tokens
+                    totals["output_tokens"] += s.output_tokens
+            result["totals"] = {
+                "elapsed_s": round(time.time() - self.started, 3),
+                "cost_usd": round(totals["cost_usd"], 6),
+                "input_tokens": int(totals["input_tokens"]),
+                "output_tokens": int(totals["output_tokens"]),
+            }
+        return result
+
+    def to_json(self, extra: Optional[dict] = None) -> str:
+        data = self.summary()
+        if extra:
+            data.update(extra)
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = "trend") -> str:
+        """Prometheus text exposition format (summary + counter)"""
+        lines = []
+        with self._lock:
+            for kind, series in self._series.items():
+                metric = f"{prefix}_{kind}_duration_seconds"
+                lines.append(f"# TYPE {metric} summary")
+                for name, s in sorted(series.items()):
+                    label = f'{kind}="{name}"'
+                    for q in (0.5, 0.95, 0.99):
+                        lines.append(f'{metric}{{{label},quantile="{q}"}} {percentile(s.durations, q):.6f}')
+                    lines.append(f"{metric}_sum{{{label}}} {sum(s.durations):.6f}")
+                    lines.append(f"{metric}_count{{{label}}} {len(s.durations)}")
+                for counter, attr in (("errors", "errors"), ("retries", "retries"), ("cache_hits", "cache_hits"),
+                                      ("coalesced", "coalesced")):
+                    metric_c = f"{prefix}_{kind}_{counter}_total"
+                    lines.append(f"# TYPE {metric_c} counter")
+                    for name, s in sorted(series.items()):
+                        lines.append(f'{metric_c}{{{kind}="{name}"}} {getattr(s, attr)}')
+                wait_metric = f"{prefix}_{kind}_wait_seconds_total"
+                lines.append(f"# TYPE {wait_metric} counter")
+                for name, s in sorted(series.items()):
+                    lines.append(f'{wait_metric}{{{kind}="{name}"}} {sum(s.waits):.6f}')
+                if kind in ("llm", "embedding", "search"):
+                    tok = f"{prefix}_{kind}_tokens_total"
+                    cost = f"{prefix}_{kind}_cost_usd_total"
+                    lines.append(f"# TYPE {tok} counter")
+                    for name, s in sorted(series.items()):
+                        lines.append(f'{tok}{{{kind}="{name}",type="input"}} {s.input_tokens}')
+                        lines.append(f'{tok}{{{kind}="{name}",type="output"}} {s.output_tokens}')
+                    lines.append(f"# TYPE {cost} counter")
+                    for name, s in sorted(series.items()):
+                        lines.append(f'{cost}{{{kind}="{name}"}} {s.cost:.6f}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# LLM 캐시 hit 여부를 같은 스레드의 on_llm_end로 전달 (utils.llm_cache에서 설정)
+_cache_hit = threading.local()
+
+
+def mark_llm_cache_hit():
+    _cache_hit.value = True
+
+
+def _pop_llm_cache_hit() -> bool:
+    hit = getattr(_cache_hit, "value", False)
+    _cache_hit.value = False
+    return hit
+
+
+def instrument_node(name: str, fn: Callable) -> Callable:
+    """그래프 노드 실행 시간 / 오류 기록"""
+
+    @functools.wraps(fn)
+    def wrapper(state, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(state, *args, **kwargs)
+        except Exception:
+            metrics.record("node", name, time.perf_counter() - start, error=True)
+            raise
+        metrics.record("node", name, time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """ChatOpenAI callbacks= 에 연결 — 호출별 지연 시간, 토큰, 비용, 캐시 hit 기록"""
+
+    def __init__(self, node: str, model: str):
+        self.node = node
+        self.model = model
+        self._starts: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._starts[run_id] = time.perf_counter()
+
+    def _elapsed(self, run_id: UUID) -> Optional[float]:
+        with self._lock:
+            start = self._starts.pop(run_id, None)
+        return None if start is None else time.perf_counter() - start
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        cache_hit = _pop_llm_cache_hit()
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            # 캐시 hit 응답에도 원래 호출의 usage_metadata가 그대로 남아 있다
+            for gen in generations:
+                usage = getattr(getattr(gen, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        if cache_hit:
+            # 캐시 hit는 실제 과금이 없으므로 토큰/비용에서 제외
+            input_tokens = output_tokens = 0
+        metrics.record(
+            "llm", self.node, self._elapsed(run_id),
+            cache_hit=cache_hit,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost=estimate_cost(self.model, input_tokens, output_tokens),
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        metrics.record("llm", self.node, self._elapsed(run_id), error=True)
+
+
+def llm_callbacks(node: str, model: str) -> list:
+    return [LLMMetricsCallback(node, model)]
+
+
+def write_run_summary(path_prefix: str, extra: Optional[dict] = None) -> dict:
+    """<prefix>.json (실행 요약), <prefix>.prom (Prometheus) 파일 저장"""
+    os.makedirs(os.path.dirname(path_prefix) or ".", exist_ok=True)
+    with open(f"{path_prefix}.json", "w", encoding="utf-8") as f:
+        f.write(metrics.to_json(extra))
+    with open(f"{path_prefix}.prom", "w", encoding="utf-8") as f:
+        f.write(metrics.to_prometheus())
+    return {"json": f"{path_prefix}.json", "prometheus": f"{path_prefix}.prom"}
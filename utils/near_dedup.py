@@ -0,0 +1,97 @@
+"""
+유사(near-duplicate) 문서 제거
+미러링되었거나 거의 같은 기사를 단어 shingle 기반 MinHash + LSH banding으로 찾아 첫 문서만 남긴다.
+- 문서당 서명 계산 O(문서 길이), 후보 쌍은 같은 band bucket에 들어간 문서끼리만 비교 → 거의 선형 시간
+- 유사도 기준(Jaccard 추정치)은 NEAR_DUP_THRESHOLD로 조절
+"""
+
+import zlib
+from typing import Callable, Iterable, List, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from utils.config import env_bool, env_float, env_int
+
+NEAR_DUP_ENABLED = env_bool("NEAR_DUP_ENABLED", True)
+NEAR_DUP_THRESHOLD = env_float("NEAR_DUP_THRESHOLD", 0.8)
+NEAR_DUP_NUM_PERM = env_int("NEAR_DUP_NUM_PERM", 64)
+NEAR_DUP_SHINGLE = env_int("NEAR_DUP_SHINGLE", 3)  # 단어 n-gram 크기
+
+_PRIME = np.uint64((1 << 31) - 1)
+T = TypeVar("T")
+
+
+def shingles(text: str, k: int = NEAR_DUP_SHINGLE) -> set:
+    """단어 k-gram shingle의 32bit 해시 집합 (clean_text를 거친 문자열 기준)"""
+    words = text.lower().split()
+    if len(words) < k:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + k]).encode("utf-8")) for i in range(len(words) - k + 1)}
+
+
+def _lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """b * r = num_perm 중 S-curve 임계점 (1/b)^(1/r)이 threshold에 가장 가까운 (bands, rows)"""
+    best = (num_perm, 1)
+    best_gap = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        gap = abs((1 / bands) ** (1 / rows) - threshold)
+        if gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NEAR_DUP_NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: set) -> np.ndarray:
+        if not hashes:
+            return np.full(self.num_perm, int(_PRIME), dtype=np.uint64)
+        x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes)) % _PRIME
+        # (a * x + b) mod p — a, x < 2^31 이므로 uint64에서 overflow 없음
+        return ((np.outer(x, self.a) + self.b) % _PRIME).min(axis=0)
+
+
+def near_duplicate_indices(texts: Sequence[str], threshold: float = NEAR_DUP_THRESHOLD,
+                           num_perm: int = NEAR_DUP_NUM_PERM) -> List[int]:
+    """앞서 나온 문서와 추정 Jaccard 유사도가 threshold 이상인 문서의 인덱스"""
+    hasher = MinHasher(num_perm)
+    bands, rows = _lsh_params(num_perm, threshold)
+    buckets = [dict() for _ in range(bands)]
+    kept_signatures = {}
+    shingle_free = set()  # 단어가 없어 shingle을 만들 수 없는 문서는 MinHash / LSH 대신 원문 일치로만 비교
+    duplicates = []
+
+    for i, text in enumerate(texts):
+        hashes = shingles(text)
+        if not hashes:
+            if text in shingle_free:
+                duplicates.append(i)
+            shingle_free.add(text)
+            continue
+        sig = hasher.signature(hashes)
+        keys = [sig[b * rows:(b + 1) * rows].tobytes() for b in range(bands)]
+        candidates = {j for b, key in enumerate(keys) for j in buckets[b].get(key, ())}
+        if any(np.mean(kept_signatures[j] == sig) >= threshold for j in candidates):
+            duplicates.append(i)
+            continue
+        kept_signatures[i] = sig
+        for b, key in enumerate(keys):
+            buckets[b].setdefault(key, []).append(i)
+    return duplicates
+
+
+def drop_near_duplicates(items: Iterable[T], text: Callable[[T], str] = str,
+                         threshold: float = NEAR_DUP_THRESHOLD) -> Tuple[List[T], int]:
+    """(남은 항목, 제거된 개수) — 순서를 유지하며 먼저 나온 문서를 남긴다"""
+    items = list(items)
+    if not NEAR_DUP_ENABLED or len(items) < 2:
+        return items, 0
+    dropped = set(near_duplicate_indices([text(item) for item in items], threshold))
+    return [item for i, item in enumerate(items) if i not in dropped], len(dropped)
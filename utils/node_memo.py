@@ -0,0 +1,144 @@
+"""
+증분 실행용 노드 memoization
+노드가 실제로 읽는 state 필드의 content hash를 키로 노드 출력을 디스크에 저장해 두고,
+다음 실행에서 입력 hash가 같으면 노드를 다시 실행하지 않고 저장된 출력을 돌려준다.
+- 예: predict = hash(current_trend, trend_analysis) → 분석 결과가 같으면 예측도 재사용
+- 키에는 NODE_MEMO_VERSION과 LLM 모델명이 포함된다 (프롬프트 / 로직을 바꾸면 버전을 올려 무효화)
+- 출력이 가리키는 파일(보고서 PDF)은 내용 hash를 함께 저장해, 지워졌거나 다른 실행이 덮어썼으면 다시 실행한다
+- 증분 모드(INCREMENTAL=1 또는 main.py --incremental)에서만 동작하며, 재사용 / 재실행 노드는 실행 요약에 기록된다
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from utils.clients import LLM_MODEL
+from utils.config import env_bool, env_float, env_int, env_str
+from utils.metrics import metrics
+from utils.sqlite_cache import CACHE_DIR, SQLiteTTLCache, make_key
+
+INCREMENTAL = env_bool("INCREMENTAL", False)
+NODE_MEMO_TTL = env_float("NODE_MEMO_TTL", 30 * 24 * 3600)
+NODE_MEMO_MAX_ENTRIES = env_int("NODE_MEMO_MAX_ENTRIES", 5000)
+NODE_MEMO_VERSION = env_str("NODE_MEMO_VERSION", "1")
+
+_enabled = INCREMENTAL
+_store: Optional[SQLiteTTLCache] = None
+_lock = threading.Lock()
+_reused: Counter = Counter()
+_recomputed: Counter = Counter()
+
+
+def set_incremental(enabled: bool):
+    """증분 모드 켜기 / 끄기 (그래프를 다시 빌드할 필요 없음)"""
+    global _enabled
+    _enabled = enabled
+
+
+def incremental_enabled() -> bool:
+    return _enabled
+
+
+def get_memo_store() -> SQLiteTTLCache:
+    global _store
+    with _lock:
+        if _store is None:
+            _store = SQLiteTTLCache(
+                os.path.join(CACHE_DIR, "node_memo.sqlite"),
+                ttl=NODE_MEMO_TTL,
+                max_entries=NODE_MEMO_MAX_ENTRIES,
+                table="node_memo",
+            )
+    return _store
+
+
+def fingerprint(value: Any) -> str:
+    """JSON 정규화(키 정렬) 후 sha256 — dict 순서와 무관하게 내용이 같으면 같은 값"""
+    raw = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def memo_key(node: str, inputs: Dict[str, Any]) -> str:
+    return make_key("node", node, NODE_MEMO_VERSION, LLM_MODEL, {k: fingerprint(v) for k, v in inputs.items()})
+
+
+def _file_hashes(paths: Iterable[Optional[str]]) -> Optional[Dict[str, str]]:
+    """출력이 가리키는 파일들의 내용 hash — 하나라도 없으면 None"""
+    hashes = {}
+    for path in paths:
+        if not path or not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            hashes[path] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def lookup(node: str, key: str, validate: Optional[Callable[[dict], bool]] = None,
+           files: Optional[Callable[[dict], Iterable[str]]] = None) -> Optional[dict]:
+    """memo_key()가 같은 이전 출력 — 없거나(또는 검증 실패) 증분 모드가 꺼져 있으면 None"""
+    if not _enabled:
+        return None
+    raw = get_memo_store().get(key)
+    record = json.loads(raw) if raw is not None else None
+    output = record["output"] if record else None
+    if output is not None and validate and not validate(output):
+        output = None
+    if output is not None and files and _file_hashes(files(output)) != record.get("files"):
+        output = None
+    if output is None:
+        with _lock:
+            _recomputed[node] += 1
+        return None
+    with _lock:
+        _reused[node] += 1
+    metrics.record("node", node, cache_hit=True)
+    print(f"♻️ [{node}] 입력이 이전 실행과 같아 저장된 결과를 재사용")
+    return output
+
+
+def store(node: str, key: str, output: dict, validate: Optional[Callable[[dict], bool]] = None,
+          files: Optional[Callable[[dict], Iterable[str]]] = None):
+    if not _enabled or (validate and not validate(output)):
+        return
+    record = {"output": output}
+    if files:
+        record["files"] = _file_hashes(files(output))
+        if record["files"] is None:
+            return
+    get_memo_store().set(key, json.dumps(record, ensure_ascii=False, default=str))
+
+
+def memoize_node(node: str, fn: Callable, reads: Iterable[str], writes: Iterable[str],
+                 validate: Optional[Callable[[dict], bool]] = None,
+                 files: Optional[Callable[[dict], Iterable[str]]] = None) -> Callable:
+    """
+    그래프 노드 래퍼 — reads 필드의 hash가 같으면 저장된 writes 필드를 반환하고 fn은 실행하지 않는다.
+    validate(output)가 False인 출력(일부 실패한 결과 등)은 저장 / 재사용하지 않는다.
+    files(output): 출력이 가리키는 파일 경로들 — 내용이 저장 당시와 달라졌으면 다시 실행한다.
+    """
+    reads, writes = tuple(reads), tuple(writes)
+
+    def wrapper(state, *args, **kwargs):
+        if not _enabled:
+            return fn(state, *args, **kwargs)
+        # 노드가 state를 제자리에서 바꿀 수 있으므로 key는 실행 전에 계산한다
+        key = memo_key(node, {k: state.get(k) for k in reads})
+        output = lookup(node, key, validate, files)
+        if output is not None:
+            return output
+        result = fn(state, *args, **kwargs)
+        store(node, key, {k: result[k] for k in writes if k in result}, validate, files)
+        return result
+
+    wrapper.__name__ = getattr(fn, "__name__", node)
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+def memo_stats() -> dict:
+    """재사용 / 재실행된 노드 (증분 모드가 꺼져 있으면 enabled=False)"""
+    with _lock:
+        return {"enabled": _enabled, "reused": dict(_reused), "recomputed": dict(_recomputed)}
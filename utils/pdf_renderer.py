@@ -0,0 +1,211 @@
+"""
+보고서 PDF 렌더러
+fpdf2 기반 PDF 클래스 (표지, 섹션 렌더링). report_agent가 보고서를 만들 때 처음 import한다.
+- NotoSansKR TTF는 프로세스당 한 번만 파싱해 두고, 문서마다 파싱 결과의 사본을 붙인다
+  (글자 폭 / cmap 같은 가변 테이블은 문서별로 복사하므로 문서 / 스레드 간에 상태를 공유하지 않는다)
+- 폰트 사본은 fpdf2 내부 필드를 채워 만들므로 검증한 버전(FPDF_VERIFIED_VERSIONS)에서만 사용하고,
+  다른 버전에서는 add_font로 처리한다
+- 줄바꿈은 공개 API multi_cell로 하고, 같은 스타일이 이어지는 줄은 글꼴 설정 없이 연속 출력
+- render_reports() / PDF_RENDER_WORKERS로 여러 보고서를 프로세스 풀에서 병렬 렌더링
+"""
+
+import copy
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import fpdf
+from fontTools import ttLib
+from fpdf import FPDF
+from fpdf.fonts import SubsetMap, TTFFont
+
+from utils.config import env_int, env_str
+
+FONT_DIR = env_str("FONT_DIR", "fonts")
+PDF_RENDER_WORKERS = env_int("PDF_RENDER_WORKERS", 0)  # 0/1: 현재 프로세스에서 렌더링
+
+# 폰트 사본(TTFFont 내부 필드 복사)이 add_font와 같은 PDF를 만드는 것을 확인한 fpdf2 버전
+FPDF_VERIFIED_VERSIONS = ("2.8.9",)
+FPDF_INTERNALS_OK = fpdf.__version__ in FPDF_VERIFIED_VERSIONS
+if not FPDF_INTERNALS_OK:
+    print(f"⚠️ fpdf2 {fpdf.__version__}은 검증되지 않은 버전 → 폰트 캐시 대신 add_font 사용")
+
+FONT_FAMILY = "NotoSans"
+FONT_FILES = {"": "NotoSansKR-Regular.ttf", "B": "NotoSansKR-Bold.ttf"}
+NOTICE = "AI로 생성된 보고서입니다. — AI 트렌드 분석"
+
+# (글꼴 스타일, 크기 pt, 줄 높이, 앞 여백, 뒤 여백) — 본문/제목 스타일
+_BODY = ("", 11, 6, 0, 5)
+_LINE_STYLES = (
+    ("### ", ("B", 13, 7, 2, 2)),
+    ("## ", ("B", 14, 8, 4, 2)),
+    ("# ", ("B", 16, 9, 0, 4)),
+)
+
+_font_cache: Dict[tuple, Optional[Tuple[TTFFont, bytes]]] = {}
+_font_lock = threading.Lock()
+
+
+def _parsed_font(path: str, family: str, style: str) -> Optional[Tuple[TTFFont, bytes]]:
+    """(파싱된 TTFFont 원본, 폰트 파일 bytes) — 문서 간 공유가 안전하지 않은 폰트면 None"""
+    key = (os.path.abspath(path), family, style)
+    with _font_lock:
+        if key not in _font_cache:
+            scratch = FPDF()
+            scratch.add_font(family, style, path)
+            template = scratch.fonts[f"{family.lower()}{style}"]
+            with open(path, "rb") as f:
+                data = f.read()
+            original = ttLib.TTFont(BytesIO(data), lazy=True)
+            # .notdef 대체 글리프를 추가했거나 컬러/CID 폰트면 매번 add_font로 처리
+            shareable = (".notdef" in original.getGlyphOrder() and template.color_font is None
+                         and not (template.is_cff and template.is_cid_keyed))
+            _font_cache[key] = (template, data) if shareable else None
+        return _font_cache[key]
+
+
+# 문서마다 새로 만드는 필드 (템플릿에서 복사하지 않는다)
+_PER_DOCUMENT_SLOTS = frozenset({"i", "ttfont", "_hbfont", "missing_glyphs", "biggest_size_pt", "subset"})
+
+
+def add_cached_font(pdf: FPDF, family: str, style: str, path: str):
+    """pdf.add_font와 같지만 폰트 파싱 결과를 프로세스 안에서 재사용한다"""
+    fontkey = f"{family.lower()}{style}"
+    if fontkey in pdf.fonts:
+        return
+    cached = _parsed_font(path, family, style) if FPDF_INTERNALS_OK else None
+    if cached is None:
+        pdf.add_font(family, style, path)
+        return
+    template, data = cached
+    font = TTFFont.__new__(TTFFont)
+    for name in TTFFont.__slots__:
+        if name in _PER_DOCUMENT_SLOTS or not hasattr(template, name):
+            continue
+        # cw는 없는 글자를 조회하면 항목이 추가되는 defaultdict — 가변 값은 모두 문서별 사본을 쓴다 (얕은 복사라 싸다)
+        setattr(font, name, copy.copy(getattr(template, name)))
+    # PDF 출력 시 subset이 ttfont를 직접 수정하므로 ttfont는 문서마다 새로 연다 (lazy라 테이블은 필요할 때 파싱)
+    font.i = len(pdf.fonts) + 1
+    font.ttfont = ttLib.TTFont(BytesIO(data), recalcTimestamp=False, lazy=True)
+    font._hbfont = None
+    font.missing_glyphs = []
+    font.biggest_size_pt = 0
+    font.subset = SubsetMap(font)
+    pdf.fonts[fontkey] = font
+
+
+def warm_fonts(font_dir: str = FONT_DIR):
+    """보고서 폰트를 미리 파싱 (프로세스 풀 initializer)"""
+    for style, filename in FONT_FILES.items():
+        _parsed_font(os.path.join(font_dir, filename), FONT_FAMILY, style)
+
+
+class PDF(FPDF):
+    def __init__(self, font_dir: str = FONT_DIR):
+        super().__init__()
+        for style, filename in FONT_FILES.items():
+            add_cached_font(self, FONT_FAMILY, style, os.path.join(font_dir, filename))
+        self.set_auto_page_break(auto=True, margin=15)
+
+    def add_title_page(self):
+        """표지 — AI 트렌드 분석 보고서만 출력"""
+        self.add_page()
+        self.set_font(FONT_FAMILY, 'B', 26)
+        self.cell(0, 15, "AI 트렌드 분석 보고서", align="C", new_x="LMARGIN", new_y="NEXT")
+        self.ln(7)
+
+    def add_notice_page(self, text: str = NOTICE):
+        """마지막 안내 페이지"""
+        self.add_page()
+        self.set_font(FONT_FAMILY, "", 9)
+        self.multi_cell(0, 10, text)
+
+    def add_section(self, title, text):
+        """본문 섹션"""
+        self.set_font(FONT_FAMILY, 'B', 16)
+        self.multi_cell(0, 8, title)
+        self.ln(3)
+
+        style = None
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            line_style, line = _classify(line)
+            font_style, size, height, before, after = line_style
+            if before:
+                self.ln(before)
+            # 같은 스타일이 이어지면 글꼴을 다시 설정하지 않는다
+            if line_style is not style:
+                self.set_font(FONT_FAMILY, font_style, size)
+                style = line_style
+            self.multi_cell(0, height, line)
+            self.ln(after)
+
+
+def _classify(line: str):
+    """마크다운 제목 접두어에 따른 (스타일, 접두어를 뗀 문장)"""
+    for prefix, style in _LINE_STYLES:
+        if line.startswith(prefix):
+            return style, line.replace(prefix, "")
+    return _BODY, line
+
+
+def _render_job(job: dict) -> str:
+    """
+    job: {"path", "sections": [{"title", "text", "new_page"(선택)}], "notice"(선택), "font_dir"(선택)}
+    표지 + 섹션 + 안내 페이지로 된 보고서를 저장하고 경로를 돌려준다.
+    """
+    pdf = PDF(job.get("font_dir", FONT_DIR))
+    pdf.add_title_page()
+    for section in job["sections"]:
+        if section.get("new_page"):
+            pdf.add_page()
+        pdf.add_section(section.get("title", ""), section.get("text", ""))
+    pdf.add_notice_page(job.get("notice", NOTICE))
+    os.makedirs(os.path.dirname(job["path"]) or ".", exist_ok=True)
+    pdf.output(job["path"])
+    return job["path"]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_RENDER_WORKERS, initializer=warm_fonts)
+    return _pool
+
+
+def render_report(job: dict) -> str:
+    """
+    보고서 하나를 렌더링해 저장 — PDF_RENDER_WORKERS > 1이면 공유 프로세스 풀에서 렌더링한다.
+    (포트폴리오 모드처럼 여러 branch가 동시에 보고서를 만들 때 GIL 경합 없이 병렬로 처리)
+    """
+    if PDF_RENDER_WORKERS > 1:
+        return _get_pool().submit(_render_job, job).result()
+    return _render_job(job)
+
+
+def render_reports(jobs: Sequence[dict], workers: int = PDF_RENDER_WORKERS) -> List[str]:
+    """여러 보고서를 병렬 렌더링 — 저장 경로 목록 (jobs 순서). 각 worker는 시작할 때 폰트를 한 번 파싱한다"""
+    workers = min(workers, len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_fonts,
+                             initargs=(jobs[0].get("font_dir", FONT_DIR),)) as pool:
+        return list(pool.map(_render_job, jobs))
+
+
+def shutdown_render_pool():
+    """공유 렌더링 프로세스 풀 종료"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,292 @@
+"""
+공유 rate limiter + 적응형 동시성 제어
+OpenAI(LLM / 임베딩)와 Tavily 호출이 모두 거치는 프로세스 단위 limiter.
+- 백엔드마다 분당 요청 수(RPM)와 분당 토큰 수(TPM) token bucket을 따로 두고, 예산이 모자라면 보내기 전에 기다린다
+- 429 / 5xx / 연결 오류는 jitter를 섞은 지수 backoff로 재시도 (Retry-After 헤더가 있으면 그 시간을 따른다)
+- 동시 호출 수 상한은 AIMD로 조정 — 성공하면 조금씩 늘리고, 429 / 5xx를 받으면 절반으로 줄인다
+- utils.clients의 백엔드별 httpx.Client transport로 붙으므로 agent 코드는 limiter를 알 필요가 없다
+  (TAVILY_HTTP(S)_PROXY로 requests 경로를 쓰는 Tavily 호출은 제외)
+"""
+
+import json
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from utils.config import env_bool, env_float, env_int
+from utils.metrics import metrics
+
+RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", True)
+OPENAI_RPM = env_float("OPENAI_RPM", 500)  # 0이면 제한 없음
+OPENAI_TPM = env_float("OPENAI_TPM", 200000)
+OPENAI_MAX_CONCURRENCY = env_int("OPENAI_MAX_CONCURRENCY", 16)
+TAVILY_RPM = env_float("TAVILY_RPM", 100)
+TAVILY_MAX_CONCURRENCY = env_int("TAVILY_MAX_CONCURRENCY", 8)
+RATE_LIMIT_BURST_SECONDS = env_float("RATE_LIMIT_BURST_SECONDS", 10.0)  # bucket 용량 = 이 시간 동안 채워지는 양
+RATE_LIMIT_MAX_RETRIES = env_int("RATE_LIMIT_MAX_RETRIES", 5)
+RATE_LIMIT_BACKOFF_BASE = env_float("RATE_LIMIT_BACKOFF_BASE", 0.5)
+RATE_LIMIT_BACKOFF_MAX = env_float("RATE_LIMIT_BACKOFF_MAX", 30.0)
+RATE_LIMIT_DECREASE_INTERVAL = env_float("RATE_LIMIT_DECREASE_INTERVAL", 2.0)  # 동시성 감소 최소 간격(s)
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+_RETRYABLE_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+
+class TokenBucket:
+    """분당 per_minute씩 채워지는 bucket — 예산을 먼저 차감(예약)하고 부족분이 채워질 때까지의 대기 시간을 돌려준다"""
+
+    def __init__(self, per_minute: float, burst_seconds: float = RATE_LIMIT_BURST_SECONDS):
+        self.rate = max(0.0, per_minute) / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """amount를 예약하고 기다려야 할 시간(s) — 용량보다 큰 요청은 빚으로 남아 뒤 호출이 기다린다"""
+        if self.rate <= 0 or amount <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            self.level -= amount
+            return max(0.0, -self.level / self.rate)
+
+
+class AdaptiveConcurrency:
+    """AIMD 동시성 상한 — 성공 시 limit += 1/limit, throttle 시 limit /= 2 (min_limit ~ max_limit)"""
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                # 같은 순간에 보낸 호출들이 한꺼번에 실패해도 한 번만 줄인다
+                if now - self._last_decrease >= RATE_LIMIT_DECREASE_INTERVAL:
+                    self.limit = max(float(self.min_limit), self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class BackendLimiter:
+    """한 백엔드의 RPM / TPM bucket + 동시성 상한 + 429 시 전체 일시 정지"""
+
+    def __init__(self, name: str, rpm: float = 0, tpm: float = 0, max_concurrency: int = 16):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "throttled": 0, "retries": 0, "wait_s": 0.0}
+
+    def acquire(self, tokens: int = 0):
+        """동시성 슬롯과 RPM / TPM 예산을 확보할 때까지 대기 — 반드시 release()로 돌려준다"""
+        start = time.monotonic()
+        self.concurrency.acquire()
+        delay = max(self.requests.reserve(1), self.tokens.reserve(tokens), self._paused_until - time.monotonic())
+        if delay > 0:
+            time.sleep(delay)
+        waited = time.monotonic() - start
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["wait_s"] += waited
+        if waited >= 0.001:
+            metrics.record_wait("http", self.name, waited)
+
+    def release(self, throttled: bool = False):
+        self.concurrency.release(throttled)
+        if throttled:
+            with self._lock:
+                self.stats["throttled"] += 1
+            metrics.record("http", self.name, error=True)
+
+    def pause(self, seconds: float):
+        """429를 받으면 이 백엔드로 가는 모든 호출을 seconds 동안 멈춘다"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def record_retry(self):
+        with self._lock:
+            self.stats["retries"] += 1
+        metrics.record_retry("http", self.name)
+
+    def summary(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["wait_s"] = round(stats["wait_s"], 4)
+        stats["concurrency_limit"] = round(self.concurrency.limit, 2)
+        stats["in_flight"] = self.concurrency.in_flight
+        return stats
+
+
+def backoff_delay(attempt: int) -> float:
+    """attempt(0부터)번째 재시도 대기 시간 — 지수 증가 상한의 절반 + 나머지 절반은 무작위 (equal jitter)"""
+    ceiling = min(RATE_LIMIT_BACKOFF_MAX, RATE_LIMIT_BACKOFF_BASE * (2 ** attempt))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def retry_after(headers: httpx.Headers) -> Optional[float]:
+    """retry-after-ms / retry-after(초) 헤더 → 대기 시간(s)"""
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return min(RATE_LIMIT_BACKOFF_MAX, max(0.0, float(value) * scale))
+        except ValueError:
+            continue  # HTTP-date 형식은 backoff로 대신한다
+    return None
+
+
+def estimate_openai_tokens(request: httpx.Request) -> int:
+    """OpenAI 요청 본문의 입력 토큰 + max_tokens (TPM은 요청 시점에 max_tokens까지 차감된다)"""
+    from utils.context_packer import count_tokens
+
+    try:
+        body = json.loads(request.content or b"{}")
+    except (httpx.RequestNotRead, ValueError):
+        return 0
+    if not isinstance(body, dict):
+        return 0
+    texts, tokens = [], 0
+    for message in body.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            texts.append(content)
+        elif isinstance(content, list):
+            texts.extend(p.get("text", "") for p in content if isinstance(p, dict))
+    inputs = body.get("input")
+    for item in inputs if isinstance(inputs, list) else [inputs]:
+        if isinstance(item, str):
+            texts.append(item)
+        elif isinstance(item, list):
+            tokens += len(item)  # OpenAIEmbeddings는 tiktoken으로 나눈 토큰 id를 보낸다
+        elif isinstance(item, int):
+            tokens += 1
+    tokens += sum(count_tokens(t) for t in texts)
+    return tokens + int(body.get("max_completion_tokens") or body.get("max_tokens") or 0)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """응답 본문을 다 읽고 닫을 때 동시성 슬롯을 돌려준다 (스트리밍 응답은 본문을 받는 동안이 호출 시간)"""
+
+    def __init__(self, stream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            release, self._release = self._release, None
+            if release:
+                release()
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """limiter를 거쳐 요청을 보내고, 재시도 가능한 실패는 backoff 후 다시 보내는 httpx transport"""
+
+    def __init__(self, limiter: BackendLimiter, transport: httpx.BaseTransport,
+                 estimate_tokens: Optional[Callable[[httpx.Request], int]] = None,
+                 max_retries: int = RATE_LIMIT_MAX_RETRIES):
+        self.limiter = limiter
+        self.transport = transport
+        self.estimate_tokens = estimate_tokens
+        self.max_retries = max_retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = self.estimate_tokens(request) if self.estimate_tokens else 0
+        attempt = 0
+        while True:
+            self.limiter.acquire(tokens)
+            try:
+                response = self.transport.handle_request(request)
+            except _RETRYABLE_ERRORS:
+                self.limiter.release(throttled=True)
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+            except BaseException:
+                self.limiter.release()
+                raise
+            else:
+                retryable = response.status_code in RETRYABLE_STATUS
+                if not retryable or attempt >= self.max_retries:
+                    return httpx.Response(
+                        status_code=response.status_code,
+                        headers=response.headers,
+                        stream=_ReleasingStream(response.stream, lambda: self.limiter.release(throttled=retryable)),
+                        extensions=response.extensions,
+                    )
+                response.close()
+                self.limiter.release(throttled=True)
+                delay = retry_after(response.headers)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                if response.status_code == 429:
+                    self.limiter.pause(delay)
+            self.limiter.record_retry()
+            attempt += 1
+            time.sleep(delay)
+
+    def close(self):
+        self.transport.close()
+
+
+_BACKEND_LIMITS = {
+    # backend: (RPM, TPM, 최대 동시 호출)
+    "openai": (OPENAI_RPM, OPENAI_TPM, OPENAI_MAX_CONCURRENCY),
+    "tavily": (TAVILY_RPM, 0, TAVILY_MAX_CONCURRENCY),
+}
+_TOKEN_ESTIMATORS = {"openai": estimate_openai_tokens}
+
+_limiters: Dict[str, BackendLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(backend: str) -> BackendLimiter:
+    """백엔드별 프로세스 공유 limiter"""
+    with _limiters_lock:
+        limiter = _limiters.get(backend)
+        if limiter is None:
+            rpm, tpm, max_concurrency = _BACKEND_LIMITS.get(backend, (0, 0, 16))
+            limiter = BackendLimiter(backend, rpm, tpm, max_concurrency)
+            _limiters[backend] = limiter
+    return limiter
+
+
+def limited_transport(backend: str, transport: httpx.BaseTransport) -> httpx.BaseTransport:
+    """RATE_LIMIT_ENABLED이면 transport를 백엔드 limiter로 감싼다"""
+    if not RATE_LIMIT_ENABLED:
+        return transport
+    return RateLimitedTransport(get_limiter(backend), transport, _TOKEN_ESTIMATORS.get(backend))
+
+
+def rate_limit_stats() -> dict:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.summary() for limiter in limiters}
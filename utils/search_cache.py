@@ -0,0 +1,90 @@
+"""
+Tavily 검색 응답 캐시
+search_agent와 trend_analysis_agent가 공유하는 디스크 캐시.
+(정규화된 쿼리, 도메인 필터, max_results)를 키로 사용한다.
+같은 키의 검색이 동시에 진행 중이면 새로 보내지 않고 그 결과를 기다린다 (캐시가 꺼져 있어도 동작).
+"""
+
+import copy
+import json
+import os
+import re
+import threading
+import time
+from typing import List, Optional
+
+from utils.config import env_bool, env_float, env_int
+from utils.metrics import TAVILY_COST_PER_SEARCH, metrics
+from utils.single_flight import single_flight
+from utils.sqlite_cache import CACHE_DIR, SQLiteTTLCache, make_key
+
+SEARCH_CACHE_ENABLED = env_bool("SEARCH_CACHE_ENABLED", True)
+SEARCH_CACHE_TTL = env_float("SEARCH_CACHE_TTL", 24 * 3600)
+SEARCH_CACHE_MAX_ENTRIES = env_int("SEARCH_CACHE_MAX_ENTRIES", 2000)
+
+_cache: Optional[SQLiteTTLCache] = None
+_cache_lock = threading.Lock()
+_flights = single_flight("search", "tavily", share=copy.deepcopy)  # 응답 dict는 호출마다 복사본을 넘긴다
+
+
+def get_search_cache() -> SQLiteTTLCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteTTLCache(
+                os.path.join(CACHE_DIR, "search_cache.sqlite"),
+                ttl=SEARCH_CACHE_TTL,
+                max_entries=SEARCH_CACHE_MAX_ENTRIES,
+                table="tavily",
+            )
+    return _cache
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query or "").strip().lower()
+
+
+def site_filtered(query: str, domains: Optional[List[str]] = None) -> str:
+    """쿼리에 site: 도메인 필터를 붙인다"""
+    if not domains:
+        return query
+    site_filter = " OR ".join([f"site:{d}" for d in domains])
+    return f"{query} AND ({site_filter})"
+
+
+def _timed_search(client, full_query: str, max_results: int) -> dict:
+    start = time.perf_counter()
+    try:
+        response = client.search(full_query, max_results=max_results)
+    except Exception:
+        metrics.record("search", "tavily", time.perf_counter() - start, error=True)
+        raise
+    metrics.record("search", "tavily", time.perf_counter() - start, cost=TAVILY_COST_PER_SEARCH)
+    return response
+
+
+def cached_search(client, query: str, domains: Optional[List[str]] = None, max_results: int = 5) -> dict:
+    """캐시를 먼저 확인하고, 없으면 Tavily 검색 후 응답을 저장"""
+    full_query = site_filtered(query, domains)
+    key = make_key("tavily", normalize_query(query), sorted(domains or []), max_results)
+    if not SEARCH_CACHE_ENABLED:
+        return _flights.do(key, lambda: _timed_search(client, full_query, max_results))
+
+    cache = get_search_cache()
+    start = time.perf_counter()
+    cached = cache.get(key)
+    if cached is not None:
+        response = json.loads(cached)
+        metrics.record("search", "tavily", time.perf_counter() - start, cache_hit=True)
+        return response
+
+    def fetch() -> dict:
+        response = _timed_search(client, full_query, max_results)
+        cache.set(key, json.dumps(response, ensure_ascii=False))
+        return response
+
+    return _flights.do(key, fetch)
+
+
+def search_cache_stats() -> dict:
+    return get_search_cache().stats()
@@ -0,0 +1,173 @@
+"""
+Single-flight 호출 병합
+여러 실행 / 트렌드 분기가 같은 순간에 같은 호출(같은 judge 프롬프트, 같은 Tavily 쿼리, 같은 텍스트 임베딩)을
+보내면 먼저 온 호출(leader) 하나만 실제로 보내고, 나머지는 그 결과를 기다려 공유한다.
+- 결과를 저장하지 않는다 — 진행 중인 호출에만 합류하므로 영속 캐시가 꺼져 있어도 동작한다
+- leader가 실패하면 기다리던 호출도 같은 예외를 받는다
+- 합류한 호출 수는 metrics의 coalesced 카운터와 single_flight_stats()로 집계
+- SingleFlightTransport: OpenAI / Tavily httpx 요청 중 본문까지 같은 요청을 병합 (스트리밍 요청 제외)
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import httpx
+
+from utils.config import env_bool
+from utils.metrics import metrics
+
+SINGLE_FLIGHT_ENABLED = env_bool("SINGLE_FLIGHT_ENABLED", True)
+
+
+class Flight:
+    """진행 중인 호출 하나 — leader가 finish()하면 wait()하던 호출이 결과(또는 예외)를 받는다"""
+
+    __slots__ = ("_event", "result", "error")
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        self._event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """key별 진행 중인 호출 레지스트리 (thread-safe)"""
+
+    def __init__(self, kind: str, name: str, share: Optional[Callable[[Any], Any]] = None):
+        self.kind = kind
+        self.name = name
+        self.share = share  # follower에게 넘길 때 적용 (가변 결과는 복사본을 넘긴다)
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def begin(self, key: Hashable) -> Tuple[Flight, bool]:
+        """(flight, leader 여부) — leader는 호출 후 반드시 finish()를 부른다"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+            else:
+                flight = self._flights[key] = Flight()
+                self.leaders += 1
+                return flight, True
+        metrics.record_coalesced(self.kind, self.name)
+        return flight, False
+
+    def finish(self, key: Hashable, flight: Flight, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result, flight.error = result, error
+        flight._event.set()
+
+    def join(self, flight: Flight) -> Any:
+        """follower — leader의 결과를 기다려 받는다"""
+        result = flight.wait()
+        return self.share(result) if self.share else result
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """같은 key로 진행 중인 호출이 있으면 그 결과를, 없으면 fn()을 실행해 결과를 돌려준다"""
+        if not SINGLE_FLIGHT_ENABLED:
+            return fn()
+        flight, leader = self.begin(key)
+        if not leader:
+            return self.join(flight)
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._flights)}
+
+
+_groups: Dict[Tuple[str, str], SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def single_flight(kind: str, name: str, share: Optional[Callable[[Any], Any]] = None) -> SingleFlight:
+    """(kind, name)별 프로세스 공유 SingleFlight — metrics 계열(kind)과 이름이 그대로 집계 키가 된다"""
+    with _groups_lock:
+        group = _groups.get((kind, name))
+        if group is None:
+            group = _groups[(kind, name)] = SingleFlight(kind, name, share)
+    return group
+
+
+def single_flight_stats() -> dict:
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {f"{g.kind}:{g.name}": g.stats() for g in groups}
+
+
+# 응답이 호출자(계정 / 조직 / 프로젝트)에 따라 달라질 수 있는 헤더 — 값이 다르면 병합하지 않는다
+_KEY_HEADERS = ("authorization", "api-key", "x-api-key", "openai-organization", "openai-project")
+
+
+def _request_key(request: httpx.Request) -> Optional[str]:
+    """병합 가능한 요청의 key (URL + 인증 / 조직 헤더 + 본문) — 본문이 있는 POST 중 스트리밍이 아닌 요청만"""
+    if request.method != "POST":
+        return None
+    try:
+        content = request.content
+        if json.loads(content or b"{}").get("stream"):
+            return None
+    except (httpx.RequestNotRead, ValueError, AttributeError):
+        return None
+    digest = hashlib.sha256(str(request.url).encode("utf-8"))
+    for name in _KEY_HEADERS:
+        digest.update(f"\n{name}:{request.headers.get(name, '')}".encode("utf-8"))
+    digest.update(b"\n\n" + content)
+    return digest.hexdigest()
+
+
+class SingleFlightTransport(httpx.BaseTransport):
+    """본문까지 같은 요청이 진행 중이면 보내지 않고 그 응답(본문을 읽어 둔 복사본)을 받는다"""
+
+    def __init__(self, flights: SingleFlight, transport: httpx.BaseTransport):
+        self.flights = flights
+        self.transport = transport
+
+    def _send_buffered(self, request: httpx.Request) -> tuple:
+        response = self.transport.handle_request(request)
+        try:
+            # 압축을 풀지 않은 원본 바이트 — 응답 헤더(content-encoding / content-length)와 그대로 맞아야
+            # 각 호출자의 httpx.Client가 한 번만 압축을 푼다
+            body = b"".join(response.stream)
+        finally:
+            response.close()
+        return response.status_code, response.headers, body, {
+            k: v for k, v in response.extensions.items() if k in ("http_version", "reason_phrase")
+        }
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = _request_key(request)
+        if key is None:
+            return self.transport.handle_request(request)
+        status, headers, body, extensions = self.flights.do(key, lambda: self._send_buffered(request))
+        return httpx.Response(status, headers=headers, stream=httpx.ByteStream(body), extensions=extensions)
+
+    def close(self):
+        self.transport.close()
+
+
+def coalescing_transport(backend: str, transport: httpx.BaseTransport) -> httpx.BaseTransport:
+    """SINGLE_FLIGHT_ENABLED이면 transport 앞에 요청 병합 단계를 붙인다 (병합된 요청은 rate limit 예산도 쓰지 않는다)"""
+    if not SINGLE_FLIGHT_ENABLED:
+        return transport
+    return SingleFlightTransport(single_flight("http", backend), transport)
+
@@ -0,0 +1,225 @@
+"""
+구조화 출력(JSON) 공통 레이어
+Agent마다 따로 있던 코드블록 제거 정규식 / fallback 로직을 하나로 통합한다.
+- 모델 호출 시 provider JSON mode(또는 JSON schema) 사용
+- 단일 파서로 파싱 후 state_schema의 TypedDict 형식에 맞게 검증/보정
+- 파싱 실패 시 오류 내용을 담아 repair 재요청
+- 노드별 파싱 실패 / repair 횟수 집계
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+from typing_extensions import is_typeddict
+
+from utils.config import env_int, env_str
+from utils.metrics import metrics
+
+try:
+    import orjson
+
+    def _loads(text: str) -> Any:
+        return orjson.loads(text)
+except ImportError:  # pragma: no cover - orjson은 requirements에 포함
+    def _loads(text: str) -> Any:
+        return json.loads(text)
+
+# json_object: provider JSON mode / json_schema: TypedDict에서 만든 스키마 전달 / none: 프롬프트에만 의존
+STRUCTURED_OUTPUT_MODE = env_str("STRUCTURED_OUTPUT_MODE", "json_object")
+STRUCTURED_MAX_REPAIRS = env_int("STRUCTURED_MAX_REPAIRS", 1)
+
+_FENCE = re.compile(r"```(?:[a-zA-Z]+)?\s*(.*?)```", re.DOTALL)
+
+_lock = threading.Lock()
+_calls = Counter()
+_parse_failures = Counter()
+_repairs = Counter()
+_repaired = Counter()
+_gave_up = Counter()
+
+
+class StructuredOutputError(ValueError):
+    """repair까지 실패한 경우 — raw에 마지막 LLM 응답 원문을 담는다"""
+
+    def __init__(self, message: str, raw: str = ""):
+        super().__init__(message)
+        self.raw = raw
+
+
+REPAIR_PROMPT = ChatPromptTemplate.from_template("""
+    아래 응답은 요구된 JSON 형식으로 파싱되지 않았습니다.
+    오류: {error}
+
+    필수 최상위 키: {keys}
+    내용은 그대로 유지하고, 유효한 JSON 객체 **그 자체만** 출력하세요. 코드블록이나 설명은 금지합니다.
+
+    ==== 원본 응답 ====
+    {raw}
+    """)
+
+
+def parse_json(text: str) -> Any:
+    """JSON 파싱 — 코드블록, 앞뒤 설명 문장이 섞여 있어도 가장 바깥 {...}을 추출"""
+    text = (text or "").strip()
+    try:
+        return _loads(text)
+    except ValueError:
+        pass
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("JSON 객체를 찾을 수 없음")
+    return _loads(text[start:end + 1])
+
+
+def _default(tp: Any) -> Any:
+    if is_typeddict(tp):
+        return {k: _default(v) for k, v in get_type_hints(tp).items()}
+    origin = get_origin(tp)
+    if tp is float or tp is int:
+        return 0.0
+    if tp is bool:
+        return False
+    if tp is str:
+        return ""
+    if origin in (list, List):
+        return []
+    if origin in (dict, Dict):
+        return {}
+    return None
+
+
+def conform(value: Any, tp: Any, path: str = "$") -> Any:
+    """TypedDict 타입 힌트에 맞게 값 검증 — 누락된 하위 필드는 기본값, 숫자 문자열은 float로 보정"""
+    if is_typeddict(tp):
+        if not isinstance(value, dict):
+            raise ValueError(f"{path}: 객체가 아님 ({type(value).__name__})")
+        result = dict(value)
+        for key, sub in get_type_hints(tp).items():
+            result[key] = conform(value[key], sub, f"{path}.{key}") if key in value else _default(sub)
+        return result
+
+    origin = get_origin(tp)
+    if origin is Union:
+        args = [a for a in get_args(tp) if a is not type(None)]
+        return None if value is None else conform(value, args[0], path)
+    if origin in (list, List):
+        if not isinstance(value, list):
+            raise ValueError(f"{path}: 리스트가 아님")
+        (item_tp,) = get_args(tp) or (Any,)
+        return [conform(v, item_tp, f"{path}[{i}]") for i, v in enumerate(value)]
+    if origin in (dict, Dict):
+        if not isinstance(value, dict):
+            raise ValueError(f"{path}: 객체가 아님")
+        _, val_tp = get_args(tp) or (Any, Any)
+        return {k: conform(v, val_tp, f"{path}.{k}") for k, v in value.items()}
+    if tp is float or tp is int:
+        if isinstance(value, bool):
+            return float(value)
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{path}: 숫자가 아님 ({value!r})")
+    if tp is bool:
+        if isinstance(value, str):
+            return value.strip().lower() in ("true", "1", "yes", "적합")
+        return bool(value)
+    if tp is str:
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return "" if value is None else str(value)
+    return value
+
+
+def _validate(data: Any, schema: Any) -> dict:
+    if not isinstance(data, dict):
+        raise ValueError("최상위가 JSON 객체가 아님")
+    hints = get_type_hints(schema)
+    missing = [k for k in hints if k not in data]
+    # 단일 키 wrapper가 빠진 응답({"risk_analysis": {...}} 대신 내용만 온 경우)은 감싸서 보정
+    if missing and len(hints) == 1 and is_typeddict(next(iter(hints.values()))):
+        data = {missing[0]: data}
+        missing = []
+    if missing:
+        raise ValueError(f"필수 키 누락: {missing}")
+    return conform(data, schema)
+
+
+def _bind_json(llm, schema: Any):
+    if STRUCTURED_OUTPUT_MODE == "json_schema":
+        from pydantic import TypeAdapter
+        return llm.bind(response_format={
+            "type": "json_schema",
+            "json_schema": {"name": schema.__name__, "schema": TypeAdapter(schema).json_schema(), "strict": False},
+        })
+    if STRUCTURED_OUTPUT_MODE == "json_object":
+        return llm.bind(response_format={"type": "json_object"})
+    return llm
+
+
+def invoke_structured(prompt, inputs: dict, schema: Any, node: str, llm) -> dict:
+    """
+    prompt | llm 을 JSON 모드로 호출하고 schema(TypedDict)에 맞춘 dict 반환.
+    파싱/검증 실패 시 STRUCTURED_MAX_REPAIRS 만큼 repair 요청, 그래도 실패하면 StructuredOutputError.
+    """
+    model = _bind_json(llm, schema)
+    raw = (prompt | model).invoke(inputs).content
+    with _lock:
+        _calls[node] += 1
+
+    error = None
+    for attempt in range(STRUCTURED_MAX_REPAIRS + 1):
+        try:
+            result = _validate(parse_json(raw), schema)
+            if attempt:
+                with _lock:
+                    _repaired[node] += 1
+            return result
+        except ValueError as e:
+            error = e
+            with _lock:
+                _parse_failures[node] += 1
+            print(f"⚠️ [{node}] JSON 파싱 실패 ({attempt + 1}회차): {e}")
+            if attempt == STRUCTURED_MAX_REPAIRS:
+                break
+            with _lock:
+                _repairs[node] += 1
+            metrics.record_retry("llm", node)
+            raw = (REPAIR_PROMPT | model).invoke({
+                "error": str(e),
+                "keys": ", ".join(get_type_hints(schema)),
+                "raw": raw[:6000],
+            }).content
+
+    with _lock:
+        _gave_up[node] += 1
+    raise StructuredOutputError(f"[{node}] 구조화 출력 실패: {error}", raw=raw)
+
+
+def batch_structured(prompt, inputs_list: list, schema: Any, node: str, llm, max_concurrency: Optional[int] = None) -> list:
+    """invoke_structured를 동시에 실행 — 실패한 항목은 예외 객체로 반환"""
+    runner = RunnableLambda(lambda inputs: invoke_structured(prompt, inputs, schema, node, llm))
+    return runner.batch(inputs_list, config={"max_concurrency": max_concurrency}, return_exceptions=True)
+
+
+def structured_output_stats() -> dict:
+    """노드별 호출 / 파싱 실패 / repair 시도 / repair 성공 / 최종 실패 횟수"""
+    with _lock:
+        nodes = sorted(set(_calls) | set(_parse_failures))
+        return {
+            node: {
+                "calls": _calls[node],
+                "parse_failures": _parse_failures[node],
+                "repairs": _repairs[node],
+                "repaired": _repaired[node],
+                "gave_up": _gave_up[node],
+            }
+            for node in nodes
+        }
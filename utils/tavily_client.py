@@ -0,0 +1,51 @@
+"""
+연결 풀을 사용하는 Tavily 클라이언트
+tavily-python의 TavilyClient는 호출마다 requests.post로 새 연결을 만든다.
+검색 요청만 공유 httpx.Client(keep-alive)로 보내도록 _search를 교체한다.
+"""
+
+import json
+from typing import Optional
+
+import httpx
+from tavily import TavilyClient
+from tavily.errors import (BadRequestError, ForbiddenError, InvalidAPIKeyError, TimeoutError,
+                           UsageLimitExceededError)
+
+
+class PooledTavilyClient(TavilyClient):
+
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[httpx.Client] = None, **kwargs):
+        super().__init__(api_key=api_key, **kwargs)
+        self.http_client = http_client or httpx.Client()
+
+    def _search(self, query: str, timeout: int = 60, **kwargs) -> dict:
+        if self.proxies:
+            # 프록시 설정(TAVILY_HTTP(S)_PROXY)은 기존 requests 경로를 그대로 사용
+            return super()._search(query, timeout=timeout, **kwargs)
+        data = {"query": query, **{k: v for k, v in kwargs.items() if v is not None}}
+        timeout = min(timeout, 120)
+        try:
+            response = self.http_client.post(
+                self.base_url + "/search", content=json.dumps(data), headers=self.headers, timeout=timeout,
+            )
+        except httpx.TimeoutException:
+            raise TimeoutError(timeout)
+
+        if response.status_code == 200:
+            return response.json()
+
+        detail = ""
+        try:
+            detail = response.json().get("detail", {}).get("error", None)
+        except Exception:
+            pass
+        if response.status_code == 429:
+            raise UsageLimitExceededError(detail)
+        if response.status_code in (403, 432, 433):
+            raise ForbiddenError(detail)
+        if response.status_code == 401:
+            raise InvalidAPIKeyError(detail)
+        if response.status_code == 400:
+            raise BadRequestError(detail)
+        response.raise_for_status()
@@ -0,0 +1,61 @@
+"""
+인메모리 NumPy 벡터 인덱스
+트렌드당 20개 안팎의 문서를 검색하는 데에는 Chroma 컬렉션 기동/필터 비용이 검색 자체보다 크다.
+정규화한 임베딩을 연속된 float32 행렬 하나에 담고, 질의는 행렬-벡터 곱 한 번 + argpartition으로 top-k를 고른다.
+- langchain BaseRetriever 구현이라 retriever.invoke(query)로 Chroma retriever와 같은 방식으로 사용한다
+- 점수는 cosine 유사도 (OpenAI 임베딩은 길이 1로 정규화되어 있어 Chroma의 L2 거리 순서와 같다)
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyRetriever(BaseRetriever):
+    """문서 임베딩 행렬 (n, dim)에 대한 cosine top-k 검색"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    embeddings: Embeddings
+    documents: List[Document]
+    matrix: np.ndarray
+    k: int = 5
+
+    @classmethod
+    def from_documents(cls, documents: Sequence[Document], embeddings: Embeddings, k: int = 5) -> "NumpyRetriever":
+        documents = list(documents)
+        if documents:
+            texts = [d.page_content for d in documents]
+            if hasattr(embeddings, "embed_documents_array"):
+                vectors = embeddings.embed_documents_array(texts)  # CachedEmbeddings: 캐시 bytes → 행렬
+            else:
+                vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+            matrix = np.ascontiguousarray(_normalize(vectors))
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        return cls(embeddings=embeddings, documents=documents, matrix=matrix, k=k)
+
+    def similarity_search_with_score(self, query: str, k: int = None) -> List[tuple]:
+        """[(문서, cosine 유사도)] — 유사도 내림차순"""
+        k = min(k or self.k, len(self.documents))
+        if k <= 0:
+            return []
+        q = _normalize(np.asarray(self.embeddings.embed_query(query), dtype=np.float32))
+        scores = self.matrix @ q
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.documents[i], float(scores[i])) for i in top]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query)]